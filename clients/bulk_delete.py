@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import time
+from collections.abc import Awaitable, Callable, Sequence
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from typing import Any
+
+import anyio
+import httpx
+from clients.polling import Backoff
+from httpx import Response
+from rich.console import Console
+from rich.progress import BarColumn, MofNCompleteColumn, Progress, TextColumn, TimeElapsedColumn
+
+
+@dataclass(frozen=True)
+class ResourceFilter:
+    """Select which runs, protocols or data files to delete.
+
+    Every criterion that is set must match. Criteria that refer to fields a resource
+    does not have (status or protocolId on a data file) never match it, nor does
+    created_before match a createdAt that is missing or not an ISO 8601 time.
+    """
+
+    statuses: frozenset[str] | None = None
+    created_before: datetime | None = None
+    protocol_ids: frozenset[str] | None = None
+
+    def matches(self, resource: dict[str, Any]) -> bool:
+        if self.statuses is not None and resource.get("status") not in self.statuses:
+            return False
+        if self.protocol_ids is not None and resource.get("protocolId") not in self.protocol_ids:
+            return False
+        if self.created_before is not None:
+            created_at = _parse_utc(resource.get("createdAt"))
+            # a resource we cannot date is never old enough to delete
+            if created_at is None or created_at >= _as_utc(self.created_before):
+                return False
+        return True
+
+
+def _as_utc(moment: datetime) -> datetime:
+    """The robot reports times in UTC, read a naive one the same way."""
+    return moment.replace(tzinfo=UTC) if moment.tzinfo is None else moment
+
+
+def _parse_utc(value: Any) -> datetime | None:
+    if not isinstance(value, str):
+        return None
+    try:
+        return _as_utc(datetime.fromisoformat(value))
+    except ValueError:
+        return None
+
+
+@dataclass
+class BulkDeleteSummary:
+    """What a bulk delete did and how fast it went."""
+
+    kind: str
+    requested: int = 0
+    deleted: list[str] = field(default_factory=list)
+    failed: dict[str, str] = field(default_factory=dict)
+    retries: int = 0
+    elapsed_sec: float = 0.0
+
+    @property
+    def throughput_per_sec(self) -> float:
+        if self.elapsed_sec == 0:
+            return 0.0
+        return len(self.deleted) / self.elapsed_sec
+
+    def describe(self) -> str:
+        return (
+            f"{self.kind}: deleted {len(self.deleted)}/{self.requested}, failed {len(self.failed)}, "
+            f"retries {self.retries}, {self.elapsed_sec:.2f}s ({self.throughput_per_sec:.1f}/s)"
+        )
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Transport problems and server errors may clear up, client errors (409 current run) will not."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500
+    return isinstance(error, httpx.TransportError)
+
+
+async def bulk_delete(
+    kind: str,
+    ids: Sequence[str],
+    delete: Callable[[str], Awaitable[Response]],
+    concurrency: int = 8,
+    retries: int = 2,
+    backoff: Backoff = Backoff(initial_sec=0.5, ceiling_sec=5.0),
+    console: Console | None = None,
+) -> BulkDeleteSummary:
+    """Delete ids with at most concurrency requests in flight, retrying each up to retries times.
+
+    A 404 counts as deleted since the resource is gone either way.
+    Progress is shown on console if one is given.
+    """
+    summary = BulkDeleteSummary(kind=kind, requested=len(ids))
+    limiter = anyio.CapacityLimiter(max(1, concurrency))
+    start = time.perf_counter()
+
+    with Progress(
+        TextColumn("[sky_blue3]{task.description}"),
+        BarColumn(),
+        MofNCompleteColumn(),
+        TimeElapsedColumn(),
+        console=console,
+        disable=console is None,
+    ) as progress:
+        task = progress.add_task(f"Deleting {kind}", total=len(ids))
+
+        async def _delete_one(resource_id: str) -> None:
+            async with limiter:
+                delays = backoff.delays()
+                for attempt in range(retries + 1):
+                    try:
+                        await delete(resource_id)
+                        summary.deleted.append(resource_id)
+                        break
+                    except httpx.HTTPStatusError as e:
+                        if e.response.status_code == 404:
+                            summary.deleted.append(resource_id)
+                            break
+                        error: Exception = e
+                    except httpx.TransportError as e:
+                        error = e
+                    if attempt == retries or not _is_retryable(error):
+                        summary.failed[resource_id] = repr(error)
+                        break
+                    summary.retries += 1
+                    await anyio.sleep(next(delays))
+            progress.advance(task)
+
+        async with anyio.create_task_group() as tg:
+            for resource_id in ids:
+                tg.start_soon(_delete_one, resource_id)
+
+    summary.elapsed_sec = time.perf_counter() - start
+    return summary
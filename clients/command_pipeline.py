@@ -0,0 +1,213 @@
+"""Send a run's commands back to back and follow their completion with one watcher.
+
+The robot executes a run's commands in the order it received them, so there is no need to hold each
+POST open with waitUntilComplete. CommandPipeline posts them one after another without waiting, which
+keeps their order, while a single watcher polls GET /runs/{run_id}/commands/{command_id} for the oldest
+command that has not finished. Once that one is done it moves straight on to the next, so the robot is
+never left idle waiting for a round trip and there is one poll in flight however long the sequence is.
+
+Each command's timing is split three ways:
+    queue      createdAt to startedAt on the robot, time spent behind earlier commands
+    execution  startedAt to completedAt on the robot
+    round trip from sending the POST to seeing the command finish, what the script waited
+
+    report = await CommandPipeline(robot_client, run_id).run([commands.home_command(), ...])
+    console.print(report.table())
+"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+import anyio
+import httpx
+from anyio.abc import ObjectReceiveStream
+from clients.polling import Backoff
+from clients.robot_client import RobotClient
+from perf.tracing import span
+from rich.table import Table
+from util.json_body import extract
+
+TERMINAL_STATUSES = frozenset(["succeeded", "failed"])
+# not a robot status, the POST itself was refused so the command never existed
+REJECTED = "rejected"
+# not a robot status either, polling the command failed so how it ended is unknown
+UNOBSERVED = "unobserved"
+
+
+def _seconds_between(start: str | None, end: str | None) -> float | None:
+    if start is None or end is None:
+        return None
+    return (datetime.fromisoformat(end) - datetime.fromisoformat(start)).total_seconds()
+
+
+@dataclass
+class CommandTiming:
+    """One command's trip through the pipeline. submitted_at, accepted_at and observed_at are local perf_counter readings."""
+
+    index: int
+    command_type: str
+    submitted_at: float
+    accepted_at: float | None = None
+    observed_at: float | None = None
+    command_id: str | None = None
+    status: str = "queued"
+    created_at: str | None = None
+    started_at: str | None = None
+    completed_at: str | None = None
+    error: Any = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in TERMINAL_STATUSES or self.status in (REJECTED, UNOBSERVED)
+
+    @property
+    def submit_sec(self) -> float | None:
+        """The POST round trip."""
+        return None if self.accepted_at is None else self.accepted_at - self.submitted_at
+
+    @property
+    def queue_sec(self) -> float | None:
+        return _seconds_between(self.created_at, self.started_at)
+
+    @property
+    def execution_sec(self) -> float | None:
+        return _seconds_between(self.started_at, self.completed_at)
+
+    @property
+    def round_trip_sec(self) -> float | None:
+        """Includes up to one polling interval of lag, the watcher backs off while a command runs."""
+        return None if self.observed_at is None else self.observed_at - self.submitted_at
+
+    def update(self, data: dict[str, Any]) -> None:
+        self.command_id = data.get("id", self.command_id)
+        self.status = data.get("status", self.status)
+        self.created_at = data.get("createdAt", self.created_at)
+        self.started_at = data.get("startedAt", self.started_at)
+        self.completed_at = data.get("completedAt", self.completed_at)
+        self.error = data.get("error", self.error)
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "index": self.index,
+            "command_id": self.command_id,
+            "command_type": self.command_type,
+            "status": self.status,
+            "submit_sec": self.submit_sec,
+            "queue_sec": self.queue_sec,
+            "execution_sec": self.execution_sec,
+            "round_trip_sec": self.round_trip_sec,
+            "error": self.error,
+        }
+
+
+@dataclass
+class PipelineReport:
+    timings: list[CommandTiming] = field(default_factory=list)
+    elapsed_sec: float = 0.0
+    polls: int = 0
+
+    @property
+    def failed(self) -> list[CommandTiming]:
+        return [timing for timing in self.timings if timing.status != "succeeded"]
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed
+
+    def table(self) -> Table:
+        def seconds(value: float | None) -> str:
+            return "" if value is None else f"{value:.3f}"
+
+        table = Table(title=f"{len(self.timings)} commands in {self.elapsed_sec:.2f}s, {self.polls} polls")
+        for header in ["#", "Command", "Status", "Submit s", "Queue s", "Execution s", "Round trip s"]:
+            table.add_column(header)
+        for timing in self.timings:
+            style = "green" if timing.status == "succeeded" else "bold red"
+            table.add_row(
+                str(timing.index),
+                timing.command_type,
+                f"[{style}]{timing.status}",
+                seconds(timing.submit_sec),
+                seconds(timing.queue_sec),
+                seconds(timing.execution_sec),
+                seconds(timing.round_trip_sec),
+            )
+        return table
+
+
+class CommandPipeline:
+    """Enqueue commands on a run without waiting for each, tracking their completion with one watcher."""
+
+    def __init__(
+        self,
+        robot_client: RobotClient,
+        run_id: str,
+        backoff: Backoff = Backoff(initial_sec=0.02, ceiling_sec=0.5),
+        timeout_sec: float | None = 600.0,
+    ) -> None:
+        self.robot_client = robot_client
+        self.run_id = run_id
+        self.backoff = backoff
+        self.timeout_sec = timeout_sec
+
+    async def run(self, commands: Sequence[dict[str, Any]]) -> PipelineReport:
+        """
+        Send every command in order and return once each has finished or been refused.
+        A failed command does not stop the ones after it, the robot decides what happens to them.
+        A command whose poll fails, with an error response (the run was deleted) or without one (the
+        robot is unreachable), is marked unobserved with what went wrong in its error, and the watcher
+        moves on to the next one.
+        Raises TimeoutError if they are not all finished after timeout_sec.
+        """
+        report = PipelineReport()
+        start = time.perf_counter()
+        send, receive = anyio.create_memory_object_stream[CommandTiming](max_buffer_size=len(commands))
+        with span("CommandPipeline.run", commands=len(commands)), anyio.fail_after(self.timeout_sec):
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(self._watch, receive, report)
+                async with send:
+                    for index, req_body in enumerate(commands):
+                        timing = CommandTiming(index=index, command_type=req_body["data"]["commandType"], submitted_at=time.perf_counter())
+                        report.timings.append(timing)
+                        response = await self.robot_client.post_run_command(run_id=self.run_id, req_body=req_body, params={})
+                        timing.accepted_at = time.perf_counter()
+                        if response.status_code != 201:
+                            timing.status = REJECTED
+                            timing.error = response.text
+                            timing.observed_at = timing.accepted_at
+                            continue
+                        timing.update(extract(response, "data"))
+                        await send.send(timing)
+        report.elapsed_sec = time.perf_counter() - start
+        return report
+
+    async def _watch(self, receive: ObjectReceiveStream[CommandTiming], report: PipelineReport) -> None:
+        async with receive:
+            async for timing in receive:
+                # a new command to follow is progress, start polling it quickly again
+                delays = self.backoff.delays()
+                while timing.status not in TERMINAL_STATUSES:
+                    await anyio.sleep(next(delays))
+                    try:
+                        response = await self.robot_client.get_run_command(run_id=self.run_id, command_id=str(timing.command_id))
+                    except httpx.HTTPStatusError as e:
+                        response = e.response
+                    except httpx.TransportError as e:
+                        # what is left once ResilientTransport gave up: connect errors, an open circuit, the budget spent
+                        report.polls += 1
+                        timing.status = UNOBSERVED
+                        timing.error = repr(e)
+                        break
+                    report.polls += 1
+                    data = extract(response, "data", default=None) if response.is_success else None
+                    if not isinstance(data, dict):
+                        timing.status = UNOBSERVED
+                        timing.error = f"GET {response.url.path} returned {response.status_code}: {response.text}"
+                        break
+                    timing.update(data)
+                timing.observed_at = time.perf_counter()
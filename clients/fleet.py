@@ -0,0 +1,188 @@
+"""Run the same RobotClient operation on many robots at once.
+
+robots = [Robot.parse(host) for host in ["192.168.50.89", "ot3-bay-2=192.168.50.90"]]
+async with Fleet.make(robots, concurrency=8, timeout_sec=10) as fleet:
+    async with fleet.stream(lambda client: client.get_health()) as results:
+        async for result in results:
+            print(result.robot.name, result.status)
+    report = await fleet.run(lambda client: client.get_runs())
+    console.print(report.table())
+"""
+
+from __future__ import annotations
+
+import contextlib
+import time
+from collections.abc import AsyncGenerator, Awaitable, Callable, Iterable
+from dataclasses import dataclass
+from typing import Generic, TypeVar
+
+import anyio
+import httpx
+from anyio.streams.memory import MemoryObjectReceiveStream, MemoryObjectSendStream
+from clients.pool import PoolLimits
+from clients.resilience import ResiliencePolicy
+from clients.robot_client import RobotClient
+from rich.console import Console
+from rich.table import Table
+
+T = TypeVar("T")
+
+DEFAULT_PORT = "31950"
+
+
+@dataclass(frozen=True)
+class Robot:
+    name: str
+    host: str
+    port: str = DEFAULT_PORT
+
+    @classmethod
+    def parse(cls, spec: str) -> Robot:
+        """Parse host, host:port, name=host or name=host:port."""
+        name, _, address = spec.rpartition("=")
+        host, _, port = address.partition(":")
+        return cls(name=name or host, host=host, port=port or DEFAULT_PORT)
+
+
+@dataclass
+class FleetResult(Generic[T]):
+    """What one robot returned, or why it did not."""
+
+    robot: Robot
+    elapsed_sec: float
+    value: T | None = None
+    error: BaseException | None = None
+    timed_out: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and not self.timed_out
+
+    @property
+    def status(self) -> str:
+        if self.timed_out:
+            return "timeout"
+        if isinstance(self.error, httpx.HTTPStatusError):
+            return f"HTTP {self.error.response.status_code}"
+        if self.error is not None:
+            return type(self.error).__name__
+        if isinstance(self.value, httpx.Response):
+            return f"HTTP {self.value.status_code}"
+        return "ok"
+
+
+@dataclass
+class FleetReport(Generic[T]):
+    results: list[FleetResult[T]]
+    elapsed_sec: float
+
+    @property
+    def failed(self) -> list[FleetResult[T]]:
+        return [result for result in self.results if not result.ok]
+
+    def table(self, title: str = "Fleet") -> Table:
+        table = Table(title=f"{title}: {len(self.results) - len(self.failed)}/{len(self.results)} ok in {self.elapsed_sec:.2f}s")
+        for header in ["Robot", "Host", "Status", "Latency s", "Detail"]:
+            table.add_column(header)
+        for result in sorted(self.results, key=lambda r: r.robot.name):
+            style = "green" if result.ok else "bold red"
+            detail = "" if result.error is None else str(result.error)[:80]
+            table.add_row(
+                result.robot.name,
+                f"{result.robot.host}:{result.robot.port}",
+                f"[{style}]{result.status}",
+                f"{result.elapsed_sec:.3f}",
+                detail,
+            )
+        return table
+
+
+class Fleet:
+    """One RobotClient per robot and a cap on how many of them are busy at once."""
+
+    def __init__(self, clients: dict[Robot, RobotClient], concurrency: int = 16, timeout_sec: float = 30.0) -> None:
+        self.clients = clients
+        self.concurrency = concurrency
+        self.timeout_sec = timeout_sec
+
+    @staticmethod
+    @contextlib.asynccontextmanager
+    async def make(
+        robots: Iterable[Robot],
+        concurrency: int = 16,
+        timeout_sec: float = 30.0,
+        version: str = "*",
+        limits: PoolLimits | None = None,
+        transport_factory: Callable[[Robot], httpx.AsyncBaseTransport] | None = None,
+        resilience: ResiliencePolicy | None = None,
+    ) -> AsyncGenerator[Fleet, None]:
+        """Open a client for every robot, transport_factory replaces the network per robot (like fake_robot.FakeRobot).
+
+        Each robot has its own circuit breaker, so one that is down fails fast instead of using its whole timeout.
+        """
+        async with contextlib.AsyncExitStack() as stack:
+            clients: dict[Robot, RobotClient] = {}
+            for robot in robots:
+                transport = transport_factory(robot) if transport_factory is not None else None
+                clients[robot] = await stack.enter_async_context(
+                    RobotClient.make(
+                        host=f"http://{robot.host}",
+                        port=robot.port,
+                        version=version,
+                        limits=limits,
+                        transport=transport,
+                        resilience=resilience,
+                    )
+                )
+            yield Fleet(clients, concurrency=concurrency, timeout_sec=timeout_sec)
+
+    @contextlib.asynccontextmanager
+    async def stream(
+        self, operation: Callable[[RobotClient], Awaitable[T]], timeout_sec: float | None = None
+    ) -> AsyncGenerator[MemoryObjectReceiveStream[FleetResult[T]], None]:
+        """Run operation on every robot, yielding a stream of results in the order they complete.
+
+        Each robot gets timeout_sec (the fleet's default if None). Operations still running when
+        the block exits are cancelled.
+        """
+        budget = self.timeout_sec if timeout_sec is None else timeout_sec
+        limiter = anyio.CapacityLimiter(max(1, self.concurrency))
+        # room for every result so a robot never waits on a slow reader
+        send, receive = anyio.create_memory_object_stream[FleetResult[T]](max_buffer_size=max(1, len(self.clients)))
+
+        async def _run_one(robot: Robot, client: RobotClient, results: MemoryObjectSendStream[FleetResult[T]]) -> None:
+            async with results, limiter:
+                start = time.perf_counter()
+                result: FleetResult[T] = FleetResult(robot=robot, elapsed_sec=0.0)
+                with anyio.move_on_after(budget) as scope:
+                    try:
+                        result.value = await operation(client)
+                    except Exception as e:
+                        result.error = e
+                result.timed_out = scope.cancelled_caught
+                result.elapsed_sec = time.perf_counter() - start
+                await results.send(result)
+
+        async with anyio.create_task_group() as tg:
+            # the stream ends once every robot's clone of send is closed
+            async with send:
+                for robot, client in self.clients.items():
+                    tg.start_soon(_run_one, robot, client, send.clone())
+            with receive:
+                yield receive
+            tg.cancel_scope.cancel()
+
+    async def run(
+        self, operation: Callable[[RobotClient], Awaitable[T]], timeout_sec: float | None = None, console: Console | None = None
+    ) -> FleetReport[T]:
+        """Run operation on every robot and collect the results, printing each to console as it completes."""
+        start = time.perf_counter()
+        results: list[FleetResult[T]] = []
+        async with self.stream(operation, timeout_sec=timeout_sec) as stream:
+            async for result in stream:
+                results.append(result)
+                if console is not None:
+                    style = "green" if result.ok else "bold red"
+                    console.print(f"[{style}]{result.robot.name}[/] {result.status} {result.elapsed_sec:.3f}s")
+        return FleetReport(results=results, elapsed_sec=time.perf_counter() - start)
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import random
+from collections.abc import Awaitable, Callable, Iterator
+from dataclasses import dataclass
+from typing import TypeVar
+
+import anyio
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class Backoff:
+    """Exponential backoff with jitter.
+
+    Delays start at initial_sec and grow by factor up to ceiling_sec.
+    jitter is the fraction of each delay that is randomized, so harnesses started together drift apart
+    instead of polling the robot in lockstep.
+    """
+
+    initial_sec: float = 0.1
+    factor: float = 2.0
+    ceiling_sec: float = 2.0
+    jitter: float = 0.5
+
+    def delays(self) -> Iterator[float]:
+        delay = self.initial_sec
+        while True:
+            yield delay * (1 - self.jitter * random.random())
+            delay = min(delay * self.factor, self.ceiling_sec)
+
+
+async def poll_until(
+    probe: Callable[[], Awaitable[T]],
+    done: Callable[[T], bool],
+    timeout_sec: float | None,
+    backoff: Backoff = Backoff(),
+    reset_on_change: bool = True,
+) -> T:
+    """Call probe until done(value) is True, returning that value.
+
+    Backs off while the probed value stays the same. With reset_on_change the delay restarts
+    from initial_sec whenever the value changes, since a change usually means the final state is close.
+    Raises TimeoutError after timeout_sec, None waits forever.
+    """
+    with anyio.fail_after(timeout_sec):
+        delays = backoff.delays()
+        value = await probe()
+        while not done(value):
+            await anyio.sleep(next(delays))
+            previous, value = value, await probe()
+            if reset_on_change and value != previous:
+                delays = backoff.delays()
+    return value
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import time
+from collections.abc import AsyncIterator, Callable
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+import anyio
+import httpx
+
+# The first httpcore trace event seen for a request tells us the pool handed it a
+# connection: either a brand new one is being opened or an idle one is being written to.
+_NEW_CONNECTION_EVENT = "connect_tcp.started"
+_CONNECTION_ASSIGNED_EVENTS = (_NEW_CONNECTION_EVENT, "send_request_headers.started")
+
+
+@dataclass(frozen=True)
+class PoolLimits:
+    """Connection pool sizing for RobotClient.make.
+
+    max_connections, max_keepalive_connections and keepalive_expiry are handed to httpx.
+    max_connections_per_host caps concurrent requests to any single robot on top of the
+    global pool size, which matters when one client talks to many robots.
+    http2 requires the optional h2 package (pip install httpx[http2]).
+    """
+
+    max_connections: int | None = 100
+    max_keepalive_connections: int | None = 20
+    keepalive_expiry: float | None = 5.0
+    max_connections_per_host: int | None = None
+    http2: bool = False
+
+    def to_httpx(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+
+@dataclass
+class PoolStats:
+    """Counters describing how requests moved through the connection pool.
+
+    wait is measured from the moment a request enters the transport until a connection
+    is assigned to it, so it includes time spent queued behind the per host cap.
+    """
+
+    requests: int = 0
+    in_flight: int = 0
+    peak_in_flight: int = 0
+    waiting: int = 0
+    peak_waiting: int = 0
+    new_connections: int = 0
+    total_wait_sec: float = 0.0
+    max_wait_sec: float = 0.0
+    per_host_in_flight: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def mean_wait_sec(self) -> float:
+        if self.requests == 0:
+            return 0.0
+        return self.total_wait_sec / self.requests
+
+    def snapshot(self) -> dict[str, Any]:
+        """A plain dict copy of the counters, safe to log or serialize."""
+        snapshot = asdict(self)
+        snapshot["mean_wait_sec"] = self.mean_wait_sec
+        return snapshot
+
+
+class _TrackedStream(httpx.AsyncByteStream):
+    """Response stream that reports back when the body has been consumed and closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, on_close: Callable[[], None]) -> None:
+        self._stream = stream
+        self._on_close = on_close
+        self._closed = False
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            if not self._closed:
+                self._closed = True
+                self._on_close()
+
+
+class PooledTransport(httpx.AsyncBaseTransport):
+    """Wrap an httpx transport to enforce per host caps and record PoolStats.
+
+    A request occupies its slot from the moment it is sent until its response body is closed,
+    which is the same lifetime httpx uses for the underlying connection.
+    """
+
+    def __init__(self, limits: PoolLimits, transport: httpx.AsyncBaseTransport | None = None) -> None:
+        self.limits = limits
+        self.stats = PoolStats()
+        self._transport = transport or httpx.AsyncHTTPTransport(limits=limits.to_httpx(), http2=limits.http2)
+        self._host_slots: dict[str, anyio.Semaphore] = {}
+        # Only the real network transport emits httpcore trace events.
+        self._traced = isinstance(self._transport, httpx.AsyncHTTPTransport)
+
+    def _host_slot(self, host: str) -> anyio.Semaphore | None:
+        if self.limits.max_connections_per_host is None:
+            return None
+        if host not in self._host_slots:
+            self._host_slots[host] = anyio.Semaphore(self.limits.max_connections_per_host)
+        return self._host_slots[host]
+
+    def occupancy(self) -> dict[str, int]:
+        """Open, idle and active connection counts straight from the httpcore pool."""
+        pool = getattr(self._transport, "_pool", None)
+        connections = list(getattr(pool, "connections", []))
+        idle = sum(1 for connection in connections if connection.is_idle())
+        return {"open": len(connections), "idle": idle, "active": len(connections) - idle}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        stats = self.stats
+        host = request.url.host
+        start = time.perf_counter()
+        assigned = False
+
+        def on_assigned() -> None:
+            nonlocal assigned
+            if assigned:
+                return
+            assigned = True
+            wait = time.perf_counter() - start
+            stats.waiting -= 1
+            stats.total_wait_sec += wait
+            stats.max_wait_sec = max(stats.max_wait_sec, wait)
+
+        previous_trace = request.extensions.get("trace")
+
+        async def trace(event_name: str, info: dict[str, Any]) -> None:
+            if event_name.endswith(_CONNECTION_ASSIGNED_EVENTS):
+                on_assigned()
+            if event_name.endswith(_NEW_CONNECTION_EVENT):
+                stats.new_connections += 1
+            if previous_trace is not None:
+                await previous_trace(event_name, info)
+
+        request.extensions["trace"] = trace
+        stats.requests += 1
+        stats.waiting += 1
+        stats.peak_waiting = max(stats.peak_waiting, stats.waiting)
+
+        slot = self._host_slot(host)
+        if slot is not None:
+            try:
+                await slot.acquire()
+            except BaseException:
+                # cancelled while queued behind the per host cap, it is no longer waiting
+                on_assigned()
+                raise
+        if not self._traced:
+            on_assigned()
+        stats.in_flight += 1
+        stats.peak_in_flight = max(stats.peak_in_flight, stats.in_flight)
+        stats.per_host_in_flight[host] = stats.per_host_in_flight.get(host, 0) + 1
+
+        def release() -> None:
+            # A request that failed before a connection was assigned still has to leave
+            # the waiting counter balanced.
+            on_assigned()
+            stats.in_flight -= 1
+            stats.per_host_in_flight[host] -= 1
+            if slot is not None:
+                slot.release()
+
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            release()
+            raise
+        if response.is_closed:
+            # Responses built from in memory content (mock transports) arrive already read.
+            release()
+            return response
+        assert isinstance(response.stream, httpx.AsyncByteStream)
+        response.stream = _TrackedStream(response.stream, release)
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
@@ -0,0 +1,170 @@
+"""Reuse protocols already on the robot instead of uploading and analyzing them again.
+
+Every upload through ProtocolCache is tagged with the robot server's protocol key field, set to a
+hash of the file contents and run-time parameters. Before uploading, the cache looks for a protocol
+with that key in GET /protocols, so a protocol uploaded by an earlier run of a script is found too.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any
+
+import anyio
+from clients.robot_client import RobotClient
+from clients.uploads import Upload, UploadSource
+from httpx import Response
+from util.json_body import body, extract
+
+KEY_PREFIX = "otietalk-sha256:"
+_CHUNK_SIZE = 1024 * 1024
+
+
+def protocol_key(
+    files: Sequence[Upload] | bytes,
+    run_time_parameter_values: dict[str, Any] | None = None,
+    run_time_parameter_files: dict[str, Any] | None = None,
+) -> str:
+    """Hash file names, file contents and run-time parameters into a protocol key."""
+    digest = hashlib.sha256()
+    if isinstance(files, bytes):
+        digest.update(files)
+    else:
+        for upload in files:
+            digest.update(upload.name.encode() + b"\0")
+            if isinstance(upload, UploadSource):
+                reader = upload.reader()
+                while chunk := reader.read(_CHUNK_SIZE):
+                    digest.update(chunk)
+            else:
+                with open(upload, "rb") as f:
+                    while chunk := f.read(_CHUNK_SIZE):
+                        digest.update(chunk)
+            digest.update(b"\0")
+    parameters = {"values": run_time_parameter_values or {}, "files": run_time_parameter_files or {}}
+    digest.update(json.dumps(parameters, sort_keys=True).encode())
+    return KEY_PREFIX + digest.hexdigest()
+
+
+@dataclass
+class ProtocolCacheStats:
+    hits: int = 0
+    misses: int = 0
+    invalidations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def snapshot(self) -> dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses, "invalidations": self.invalidations, "hit_rate": self.hit_rate}
+
+
+@dataclass
+class CachedProtocol:
+    """A protocol on the robot and whether it was reused (hit) or uploaded.
+
+    response is the GET /protocols/{id} of a hit or the POST /protocols of a miss.
+    """
+
+    key: str
+    hit: bool
+    response: Response
+
+    @property
+    def data(self) -> dict[str, Any]:
+        return dict(body(self.response)["data"])
+
+    @property
+    def protocol_id(self) -> str:
+        return str(self.data["id"])
+
+    @property
+    def analysis_id(self) -> str:
+        """The most recent analysis of the protocol."""
+        return str(self.data["analysisSummaries"][-1]["id"])
+
+
+class ProtocolCache:
+    """Opt-in replacement for RobotClient.post_protocol that skips uploads the robot already has."""
+
+    def __init__(self, robot_client: RobotClient) -> None:
+        self.robot_client = robot_client
+        self.stats = ProtocolCacheStats()
+        # key -> protocol id, None until the robot's protocols have been read
+        self._index: dict[str, str] | None = None
+        # protocols that were invalidated but may still be on the robot, never reuse them
+        self._stale: set[str] = set()
+        self._locks: dict[str, anyio.Lock] = {}
+
+    async def refresh(self) -> None:
+        """Re-read the keys of the protocols on the robot."""
+        response = await self.robot_client.get_protocols()
+        index: dict[str, str] = {}
+        # /protocols is oldest first, so the newest protocol with a key wins
+        for protocol in body(response)["data"]:
+            key = protocol.get("key")
+            if key and key.startswith(KEY_PREFIX) and protocol["id"] not in self._stale:
+                index[key] = protocol["id"]
+        self._index = index
+
+    async def post_protocol(
+        self,
+        files: Sequence[Upload] | bytes,
+        run_time_parameter_values: dict[str, Any] | None = None,
+        run_time_parameter_files: dict[str, Any] | None = None,
+    ) -> CachedProtocol:
+        """Return the robot's protocol for these files and parameters, uploading it only if there is none."""
+        key = protocol_key(files, run_time_parameter_values, run_time_parameter_files)
+        # concurrent posts of the same protocol upload it once
+        async with self._locks.setdefault(key, anyio.Lock()):
+            if self._index is None:
+                await self.refresh()
+            assert self._index is not None
+            protocol_id = self._index.get(key)
+            if protocol_id is not None:
+                response = await self.robot_client.get_protocol(protocol_id)
+                if response.status_code == 200:
+                    self.stats.hits += 1
+                    return CachedProtocol(key=key, hit=True, response=response)
+                # deleted behind our back
+                del self._index[key]
+            self.stats.misses += 1
+            response = await self.robot_client.post_protocol(
+                files,
+                run_time_parameter_values=run_time_parameter_values,
+                run_time_parameter_files=run_time_parameter_files,
+                key=key,
+            )
+            self._index[key] = extract(response, "data", "id")
+            return CachedProtocol(key=key, hit=False, response=response)
+
+    async def invalidate(
+        self,
+        files: Sequence[Upload] | bytes,
+        run_time_parameter_values: dict[str, Any] | None = None,
+        run_time_parameter_files: dict[str, Any] | None = None,
+        delete_from_robot: bool = False,
+    ) -> None:
+        """Make the next post_protocol of these files and parameters upload them again."""
+        await self.invalidate_key(protocol_key(files, run_time_parameter_values, run_time_parameter_files), delete_from_robot)
+
+    async def invalidate_key(self, key: str, delete_from_robot: bool = False) -> None:
+        if self._index is None:
+            await self.refresh()
+        assert self._index is not None
+        protocol_id = self._index.pop(key, None)
+        if protocol_id is None:
+            return
+        self.stats.invalidations += 1
+        self._stale.add(protocol_id)
+        if delete_from_robot:
+            await self.robot_client.delete_protocol(protocol_id)
+
+    def clear(self) -> None:
+        """Forget what is on the robot, the next post_protocol reads /protocols again."""
+        self._index = None
@@ -0,0 +1,258 @@
+"""Where the time of each RobotClient request went, from httpx event hooks and httpcore trace events.
+
+response.elapsed lumps everything together. RequestTimings splits a request into
+    pool_wait  waiting for a connection, including the per host cap of PooledTransport
+    connect    TCP connect, DNS is resolved inside it so it is part of this
+    tls        TLS handshake (https only)
+    send       writing the request headers and body
+    ttfb       from the request written to the response headers arriving, server time plus one round trip
+    transfer   from the response headers to the end of the body
+and records payload sizes. A request on a reused connection has no connect; transports that emit no
+trace events (fake_robot.FakeRobot, httpx.MockTransport) only get ttfb, transfer and total.
+When ResilientTransport retried a request, pool_wait is up to the first attempt and the rest describes the last one.
+
+Each finished response carries its RequestTiming in response.extensions[TIMING_EXTENSION], which
+log_response writes to the response log. RequestTimings keeps the last max_records of them and a
+histogram per route and phase:
+
+    console.print(robot_client.request_timings.table())
+"""
+
+from __future__ import annotations
+
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+import httpx
+from perf.histogram import LatencyHistogram, route_path
+from rich.table import Table
+
+TIMING_EXTENSION = "otietalk.timing"
+MAX_RECORDS = 10_000
+PHASES = ["pool_wait", "connect", "tls", "send", "ttfb", "transfer", "total"]
+
+
+def route(method: str, path: str) -> str:
+    """GET /runs/{id}/commands for GET /runs/4a7d.../commands, so requests to different resources aggregate together."""
+    return f"{method} {route_path(path)}"
+
+
+def _between(start: float | None, end: float | None) -> float | None:
+    if start is None or end is None:
+        return None
+    return max(0.0, end - start)
+
+
+@dataclass
+class RequestTiming:
+    """One request. *_at are perf_counter readings, the phases are seconds, None where they did not happen."""
+
+    method: str
+    url: str
+    route: str
+    started_at: float
+    request_bytes: int = 0
+    response_bytes: int = 0
+    status_code: int | None = None
+    attempts: int = 0
+    # when the pool first handed the request a connection
+    assigned_at: float | None = None
+    # httpcore trace events of the last attempt, keyed like connect_tcp.started
+    events: dict[str, float] = field(default_factory=dict)
+    headers_at: float | None = None
+    finished_at: float | None = None
+
+    def _event(self, name: str) -> float | None:
+        return self.events.get(name)
+
+    @property
+    def new_connection(self) -> bool:
+        return "connect_tcp.started" in self.events
+
+    @property
+    def pool_wait_sec(self) -> float | None:
+        return _between(self.started_at, self.assigned_at)
+
+    @property
+    def connect_sec(self) -> float | None:
+        return _between(self._event("connect_tcp.started"), self._event("connect_tcp.complete"))
+
+    @property
+    def tls_sec(self) -> float | None:
+        return _between(self._event("start_tls.started"), self._event("start_tls.complete"))
+
+    @property
+    def send_sec(self) -> float | None:
+        return _between(self._event("send_request_headers.started"), self._event("send_request_body.complete"))
+
+    @property
+    def ttfb_sec(self) -> float | None:
+        sent = self._event("send_request_body.complete")
+        if sent is None:
+            # no trace events, all we know is when the request was handed to the client
+            return _between(self.started_at, self.headers_at)
+        return _between(sent, self._event("receive_response_headers.complete") or self.headers_at)
+
+    @property
+    def transfer_sec(self) -> float | None:
+        return _between(self._event("receive_response_headers.complete") or self.headers_at, self.finished_at)
+
+    @property
+    def total_sec(self) -> float | None:
+        return _between(self.started_at, self.finished_at)
+
+    def phase(self, name: str) -> float | None:
+        value: float | None = getattr(self, f"{name}_sec")
+        return value
+
+    def to_json(self) -> dict[str, Any]:
+        record: dict[str, Any] = {
+            "route": self.route,
+            "status_code": self.status_code,
+            "attempts": self.attempts,
+            "new_connection": self.new_connection,
+            "request_bytes": self.request_bytes,
+            "response_bytes": self.response_bytes,
+        }
+        for name in PHASES:
+            record[f"{name}_sec"] = self.phase(name)
+        return record
+
+
+class _TimedStream(httpx.AsyncByteStream):
+    """The response body, counting bytes and finishing the timing when it is closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, timing: RequestTiming, on_close: Callable[[RequestTiming], None]) -> None:
+        self._stream = stream
+        self._timing = timing
+        self._on_close = on_close
+        self._closed = False
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            self._timing.response_bytes += len(chunk)
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            if not self._closed:
+                self._closed = True
+                self._timing.finished_at = time.perf_counter()
+                self._on_close(self._timing)
+
+
+@dataclass
+class RouteTiming:
+    route: str
+    requests: int = 0
+    new_connections: int = 0
+    request_bytes: int = 0
+    response_bytes: int = 0
+    phases: dict[str, LatencyHistogram] = field(default_factory=lambda: {name: LatencyHistogram() for name in PHASES})
+
+
+class RequestTimings:
+    """Install with event_hooks=timings.event_hooks() on the httpx client, see RobotClient.make."""
+
+    def __init__(self, max_records: int = MAX_RECORDS) -> None:
+        self.records: deque[RequestTiming] = deque(maxlen=max_records)
+        self.routes: dict[str, RouteTiming] = {}
+        self.listeners: list[Callable[[RequestTiming], None]] = []
+
+    def event_hooks(self) -> dict[str, list[Callable[..., Any]]]:
+        return {"request": [self._on_request], "response": [self._on_response]}
+
+    async def _on_request(self, request: httpx.Request) -> None:
+        timing = RequestTiming(
+            method=request.method,
+            url=str(request.url),
+            route=route(request.method, request.url.path),
+            started_at=time.perf_counter(),
+            request_bytes=int(request.headers.get("content-length", 0)),
+        )
+        request.extensions[TIMING_EXTENSION] = timing
+        previous_trace = request.extensions.get("trace")
+
+        async def trace(event_name: str, info: dict[str, Any]) -> None:
+            # http11.send_request_headers.started, connection.connect_tcp.complete, ...
+            name = event_name.split(".", 1)[-1]
+            now = time.perf_counter()
+            if name in ("connect_tcp.started", "send_request_headers.started") and timing.assigned_at is None:
+                timing.assigned_at = now
+            if name == "send_request_headers.started":
+                timing.attempts += 1
+            if name in timing.events or (name == "connect_tcp.started" and "send_request_headers.started" in timing.events):
+                # an event seen before or a connect after the request was written, a retry starting over
+                timing.events.clear()
+            timing.events[name] = now
+            if previous_trace is not None:
+                await previous_trace(event_name, info)
+
+        request.extensions["trace"] = trace
+
+    async def _on_response(self, response: httpx.Response) -> None:
+        timing = response.request.extensions.get(TIMING_EXTENSION)
+        if not isinstance(timing, RequestTiming):
+            return
+        timing.headers_at = time.perf_counter()
+        timing.status_code = response.status_code
+        timing.attempts = max(timing.attempts, 1)
+        response.extensions[TIMING_EXTENSION] = timing
+        assert isinstance(response.stream, httpx.AsyncByteStream)
+        response.stream = _TimedStream(response.stream, timing, self._finish)
+
+    def _finish(self, timing: RequestTiming) -> None:
+        self.records.append(timing)
+        entry = self.routes.get(timing.route)
+        if entry is None:
+            entry = self.routes[timing.route] = RouteTiming(route=timing.route)
+        entry.requests += 1
+        entry.new_connections += timing.new_connection
+        entry.request_bytes += timing.request_bytes
+        entry.response_bytes += timing.response_bytes
+        for name in PHASES:
+            value = timing.phase(name)
+            if value is not None:
+                entry.phases[name].record(value)
+        for listener in self.listeners:
+            listener(timing)
+
+    def summary_rows(self) -> list[dict[str, Any]]:
+        rows = []
+        for entry in sorted(self.routes.values(), key=lambda e: e.route):
+            row: dict[str, Any] = {
+                "route": entry.route,
+                "requests": entry.requests,
+                "new_connections": entry.new_connections,
+                "request_bytes": entry.request_bytes,
+                "response_bytes": entry.response_bytes,
+            }
+            for name, histogram in entry.phases.items():
+                row[f"{name}_mean_sec"] = histogram.mean_sec if histogram.count else None
+                row[f"{name}_p99_sec"] = histogram.percentile(99) if histogram.count else None
+            rows.append(row)
+        return rows
+
+    def table(self, title: str = "Where request time went, mean / p99 seconds") -> Table:
+        def cell(row: dict[str, Any], name: str) -> str:
+            mean, p99 = row[f"{name}_mean_sec"], row[f"{name}_p99_sec"]
+            return "" if mean is None else f"{mean:.4f} / {p99:.4f}"
+
+        table = Table(title=title)
+        for header in ["Route", "Requests", "New conns", "KB out", "KB in"] + [name.replace("_", " ").capitalize() for name in PHASES]:
+            table.add_column(header)
+        for row in self.summary_rows():
+            table.add_row(
+                row["route"],
+                str(row["requests"]),
+                str(row["new_connections"]),
+                f"{row['request_bytes'] / 1e3:.1f}",
+                f"{row['response_bytes'] / 1e3:.1f}",
+                *[cell(row, name) for name in PHASES],
+            )
+        return table
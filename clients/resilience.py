@@ -0,0 +1,249 @@
+"""Timeout budgets, retries and a per robot circuit breaker, as the transport RobotClient sends every request through.
+
+Every request gets a total time budget, looked up by route in TIMEOUT_BUDGETS, that covers all of its
+attempts. Each attempt gets what is left of it, with the connect phase capped so a dead host is noticed
+quickly. Failed requests are retried with backoff when that cannot do harm: any request that never
+reached the robot (connect errors), and idempotent methods after any transport error or a 502/503/504.
+Only bodies held in memory are replayed, streamed uploads get one attempt. The budget runs until the
+response headers arrive; the body is read afterwards, each read bounded by the read timeout of the last attempt.
+
+After failure_threshold failed requests in a row, each counted once however many attempts it took, a robot's circuit opens and its requests fail immediately with
+CircuitOpenError (an httpx.ConnectError, so existing handlers keep working) until reset_sec has passed.
+Then one request is let through to probe it. Requests sent with extensions={PROBE_EXTENSION: True}
+(health checks) always go through, get one attempt and close the circuit when they succeed.
+
+Per request overrides go in httpx extensions:
+    await httpx_client.post(url, json=body, extensions={BUDGET_EXTENSION: 300.0, RETRY_EXTENSION: False})
+"""
+
+from __future__ import annotations
+
+import re
+import time
+from collections.abc import Mapping
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+import anyio
+import httpx
+from clients.polling import Backoff
+
+BUDGET_EXTENSION = "budget_sec"
+RETRY_EXTENSION = "retry"
+PROBE_EXTENSION = "probe"
+
+# httpx's own default, which is what every request without an explicit timeout used to get
+DEFAULT_BUDGET_SEC = 5.0
+CONNECT_TIMEOUT_SEC = 5.0
+
+TIMEOUT_BUDGETS: dict[str, float] = {
+    "GET /health": 60.0,
+    "GET /protocols": 180.0,
+    "POST /protocols": 120.0,
+    "GET /protocols/{protocol_id}": 60.0,
+    "DELETE /protocols/{protocol_id}": 15.0,
+    "GET /protocols/{protocol_id}/analyses": 60.0,
+    # analysis documents of long protocols are huge and slow to build
+    "GET /protocols/{protocol_id}/analyses/{analysis_id}": 6000.0,
+    "GET /protocols/{protocol_id}/analyses/{analysis_id}/asDocument": 6000.0,
+    "GET /dataFiles": 60.0,
+    "POST /dataFiles": 120.0,
+    "DELETE /dataFiles/{data_file_id}": 15.0,
+    "POST /runs": 15.0,
+    "GET /runs/{run_id}": 15.0,
+    "PATCH /runs/{run_id}": 15.0,
+    "DELETE /runs/{run_id}": 15.0,
+    "POST /runs/{run_id}/actions": 15.0,
+    "POST /runs/{run_id}/commands": 30.0,
+    "POST /commands": 30.0,
+    "GET /modules": 15.0,
+}
+
+IDEMPOTENT_METHODS = frozenset(["GET", "HEAD", "OPTIONS", "PUT", "DELETE"])
+RETRY_STATUSES = frozenset([502, 503, 504])
+# the robot never saw these requests, sending them again is safe whatever the method
+_NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class CircuitOpenError(httpx.ConnectError):
+    """The robot failed too many requests in a row, this one was not sent."""
+
+
+class BudgetExceededError(httpx.ReadTimeout):
+    """The request and its retries ran out of their time budget, a ReadTimeout so existing handlers keep working."""
+
+
+def _route_pattern(route: str) -> re.Pattern[str]:
+    method, path = route.split(" ", 1)
+    segments = ["[^/]+" if segment.startswith("{") else re.escape(segment) for segment in path.split("/")]
+    return re.compile(f"{method} " + "/".join(segments))
+
+
+@dataclass(frozen=True)
+class ResiliencePolicy:
+    """attempts includes the first one. failure_threshold 0 turns the circuit breaker off."""
+
+    attempts: int = 3
+    backoff: Backoff = Backoff(initial_sec=0.25, ceiling_sec=2.0)
+    failure_threshold: int = 5
+    reset_sec: float = 15.0
+    budgets: Mapping[str, float] = field(default_factory=lambda: dict(TIMEOUT_BUDGETS))
+    default_budget_sec: float = DEFAULT_BUDGET_SEC
+    connect_timeout_sec: float = CONNECT_TIMEOUT_SEC
+
+
+# for load tests, where a retry would hide exactly the failures being measured
+NO_RETRY = ResiliencePolicy(attempts=1, failure_threshold=0)
+
+
+@dataclass
+class CircuitBreaker:
+    failure_threshold: int
+    reset_sec: float
+    failures: int = 0
+    opened_at: float | None = None
+    probing: bool = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.reset_sec else "open"
+
+    def allow(self) -> bool:
+        """Closed lets everything through, half-open a single probe at a time, open nothing."""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self.probing:
+            self.probing = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self.probing = False
+        if self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+
+@dataclass
+class ResilienceStats:
+    requests: int = 0
+    retries: int = 0
+    budget_exceeded: int = 0
+    short_circuited: int = 0
+
+    def snapshot(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+class ResilientTransport(httpx.AsyncBaseTransport):
+    """Apply a ResiliencePolicy to every request on the way to transport."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, policy: ResiliencePolicy | None = None) -> None:
+        self.policy = policy or ResiliencePolicy()
+        self.stats = ResilienceStats()
+        self.breakers: dict[str, CircuitBreaker] = {}
+        self._transport = transport
+        self._routes = [(_route_pattern(route), budget) for route, budget in self.policy.budgets.items()]
+
+    def budget_for(self, method: str, path: str) -> float:
+        key = f"{method} {path.rstrip('/') or '/'}"
+        for pattern, budget in self._routes:
+            if pattern.fullmatch(key):
+                return budget
+        return self.policy.default_budget_sec
+
+    def _breaker(self, robot: str) -> CircuitBreaker | None:
+        if self.policy.failure_threshold <= 0:
+            return None
+        if robot not in self.breakers:
+            self.breakers[robot] = CircuitBreaker(self.policy.failure_threshold, self.policy.reset_sec)
+        return self.breakers[robot]
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.stats.requests += 1
+        robot = request.url.netloc.decode()
+        route = f"{request.method} {request.url.path}"
+        probe = bool(request.extensions.get(PROBE_EXTENSION))
+        breaker = self._breaker(robot)
+        if breaker is not None and not probe and not breaker.allow():
+            self.stats.short_circuited += 1
+            raise CircuitOpenError(
+                f"{robot} failed {breaker.failures} requests in a row, not sending {route} for up to {self.policy.reset_sec}s",
+                request=request,
+            )
+        budget = float(request.extensions.get(BUDGET_EXTENSION) or self.budget_for(request.method, request.url.path))
+        retry = request.extensions.get(RETRY_EXTENSION)
+        idempotent = request.method in IDEMPOTENT_METHODS if retry is None else bool(retry)
+        # a streamed upload has been consumed by the first attempt
+        replayable = isinstance(request.stream, httpx.ByteStream)
+        attempts = self.policy.attempts if replayable and not probe and retry is not False else 1
+        deadline = time.monotonic() + budget
+        delays = self.policy.backoff.delays()
+        attempt = 0
+        while True:
+            attempt += 1
+            remaining = max(0.0, deadline - time.monotonic())
+            request.extensions["timeout"] = {
+                "connect": min(remaining, self.policy.connect_timeout_sec),
+                "read": remaining,
+                "write": remaining,
+                "pool": remaining,
+            }
+            response: httpx.Response | None = None
+            error: httpx.TransportError | None = None
+            # transports that ignore the timeout extension (like fake_robot.FakeRobot) are held to the budget too
+            with anyio.move_on_after(remaining) as scope:
+                try:
+                    response = await self._transport.handle_async_request(request)
+                except httpx.TransportError as e:
+                    error = e
+                except BaseException:
+                    # cancelled from outside, a half-open circuit must not wait forever on this probe
+                    if breaker is not None:
+                        breaker.probing = False
+                    raise
+            if scope.cancelled_caught:
+                self.stats.budget_exceeded += 1
+                error = BudgetExceededError(f"{route} ran out of its {budget}s budget after {attempt} attempts", request=request)
+            failed = error is not None or (response is not None and response.status_code in RETRY_STATUSES)
+            if not failed:
+                assert response is not None
+                if breaker is not None:
+                    breaker.record_success()
+                return response
+
+            delay = next(delays)
+            if response is not None:
+                # Retry-After on a 503 is the robot telling us when it expects to be back
+                retry_after = response.headers.get("retry-after", "")
+                if retry_after.isdigit():
+                    delay = max(delay, float(retry_after))
+            may_retry = (
+                attempt < attempts
+                and (idempotent or isinstance(error, _NOT_SENT_ERRORS))
+                and not isinstance(error, BudgetExceededError)
+                and (breaker is None or breaker.state == "closed")
+                and time.monotonic() + delay < deadline
+            )
+            if not may_retry:
+                if breaker is not None:
+                    breaker.record_failure()
+                if error is not None:
+                    raise error
+                assert response is not None
+                return response
+            if response is not None:
+                await response.aclose()
+            self.stats.retries += 1
+            await anyio.sleep(delay)
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
@@ -4,10 +4,14 @@ import asyncio
 import concurrent.futures
 import contextlib
 import json
-from pathlib import Path
-from typing import Any, AsyncGenerator, Dict, List
+from typing import Any, AsyncGenerator, Awaitable, Dict, Sequence
 
 import httpx
+from clients.pool import PoolLimits, PooledTransport, PoolStats
+from clients.request_timing import RequestTimings
+from clients.resilience import BUDGET_EXTENSION, PROBE_EXTENSION, ResiliencePolicy, ResilienceStats, ResilientTransport
+from clients.run_commands import DEFAULT_PAGE_LENGTH, RunCommands
+from clients.uploads import MultipartFiles, Upload, UploadStats
 from httpx import Response
 
 STARTUP_WAIT = 15
@@ -28,29 +32,74 @@ class RobotClient:
         worker_executor: concurrent.futures.ThreadPoolExecutor,
         host: str,
         port: str,
+        transport: PooledTransport | None = None,
+        resilience: ResilientTransport | None = None,
+        request_timings: RequestTimings | None = None,
     ) -> None:
         """Initialize the client."""
         self.base_url: str = f"{host}:{port}"
         self.httpx_client: httpx.AsyncClient = httpx_client
         self.worker_executor: concurrent.futures.ThreadPoolExecutor = worker_executor
+        self.transport: PooledTransport | None = transport
+        self.resilience: ResilientTransport | None = resilience
+        self.upload_stats: UploadStats = UploadStats()
+        # filled in only if httpx_client was built with its event hooks, as make() does
+        self.request_timings: RequestTimings = request_timings or RequestTimings()
 
     @staticmethod
     @contextlib.asynccontextmanager
-    async def make(host: str, port: str, version: str) -> AsyncGenerator[RobotClient, None]:
+    async def make(
+        host: str,
+        port: str,
+        version: str,
+        limits: PoolLimits | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+        resilience: ResiliencePolicy | None = None,
+    ) -> AsyncGenerator[RobotClient, None]:
+        """Build a client whose connection pool is sized by limits (httpx defaults if None).
+
+        transport replaces the network, for example with fake_robot.FakeRobot for offline benchmarks.
+        resilience sets timeout budgets, retries and the circuit breaker, see clients.resilience.
+        Every request's time is broken down into request_timings, see clients.request_timing.
+        """
+        if limits is None:
+            limits = PoolLimits()
+        pooled_transport = PooledTransport(limits, transport=transport)
+        resilient_transport = ResilientTransport(pooled_transport, resilience)
+        request_timings = RequestTimings()
         with concurrent.futures.ThreadPoolExecutor() as worker_executor:
-            async with httpx.AsyncClient(headers={"opentrons-version": version}) as httpx_client:
+            async with httpx.AsyncClient(
+                headers={"opentrons-version": version}, transport=resilient_transport, event_hooks=request_timings.event_hooks()
+            ) as httpx_client:
                 yield RobotClient(
                     httpx_client=httpx_client,
                     worker_executor=worker_executor,
                     host=host,
                     port=port,
+                    transport=pooled_transport,
+                    resilience=resilient_transport,
+                    request_timings=request_timings,
                 )
 
+    @property
+    def pool_stats(self) -> PoolStats | None:
+        """Pool occupancy and wait counters, None if the client was built without a PooledTransport."""
+        if self.transport is None:
+            return None
+        return self.transport.stats
+
+    @property
+    def resilience_stats(self) -> ResilienceStats | None:
+        """Retry, budget and circuit breaker counters, None if the client was built without a ResilientTransport."""
+        if self.resilience is None:
+            return None
+        return self.resilience.stats
+
     async def alive(self) -> bool:
         """Are /health and /openapi.json both reachable?"""
         try:
-            await self.get_health()
-            await self.get_openapi()
+            await self.get_health(probe=True)
+            await self.get_openapi(probe=True)
             return True
         except (httpx.ConnectError, httpx.HTTPStatusError):
             return False
@@ -58,14 +107,14 @@ class RobotClient:
     async def dead(self) -> bool:
         """Are /health and /openapi.json both unreachable?"""
         try:
-            await self.get_health()
+            await self.get_health(probe=True)
             return False
         except httpx.HTTPStatusError:
             return False
         except httpx.ConnectError:
             pass
         try:
-            await self.get_openapi()
+            await self.get_openapi(probe=True)
             return False
         except httpx.HTTPStatusError:
             return False
@@ -102,71 +151,89 @@ class RobotClient:
         except asyncio.TimeoutError:
             return False
 
-    async def get_health(self) -> Response:
-        """GET /health."""
-        response = await self.httpx_client.get(url=f"{self.base_url}/health", timeout=60)
+    async def get_health(self, probe: bool = False) -> Response:
+        """GET /health, a probe skips retries and goes through an open circuit breaker."""
+        response = await self.httpx_client.get(url=f"{self.base_url}/health", extensions={PROBE_EXTENSION: probe})
         # response.raise_for_status()
         return response
 
-    async def get_openapi(self) -> Response:
+    async def get_openapi(self, probe: bool = False) -> Response:
         """GET /openapi.json."""
-        response = await self.httpx_client.get(url=f"{self.base_url}/openapi.json")
+        response = await self.httpx_client.get(url=f"{self.base_url}/openapi.json", extensions={PROBE_EXTENSION: probe})
         response.raise_for_status()
         return response
 
     async def get_protocols(self) -> Response:
         """GET /protocols."""
-        response = await self.httpx_client.get(url=f"{self.base_url}/protocols", timeout=180)
+        response = await self.httpx_client.get(url=f"{self.base_url}/protocols")
         response.raise_for_status()
         return response
 
     async def get_protocol(self, protocol_id: str) -> Response:
         """GET /protocols/{protocol_id}."""
-        response = await self.httpx_client.get(url=f"{self.base_url}/protocols/{protocol_id}", timeout=60)
+        response = await self.httpx_client.get(url=f"{self.base_url}/protocols/{protocol_id}")
+        return response
+
+    async def delete_protocol(self, protocol_id: str) -> Response:
+        """DELETE /protocols/{protocol_id}."""
+        response = await self.httpx_client.delete(f"{self.base_url}/protocols/{protocol_id}")
+        response.raise_for_status()
+        return response
+
+    async def get_data_files(self) -> Response:
+        """GET /dataFiles."""
+        response = await self.httpx_client.get(url=f"{self.base_url}/dataFiles")
+        response.raise_for_status()
+        return response
+
+    async def delete_data_file(self, data_file_id: str) -> Response:
+        """DELETE /dataFiles/{data_file_id}."""
+        response = await self.httpx_client.delete(f"{self.base_url}/dataFiles/{data_file_id}")
+        response.raise_for_status()
         return response
 
-    async def post_data_file(self, files: List[Path] | bytes) -> Response:
-        file_payload = []
-        if isinstance(files, bytes):
-            file_payload.append(("file", files))
-        else:
-            for file in files:
-                with open(file, "rb") as f:
-                    file_payload.append(("file", f.read()))
-        response = await self.httpx_client.post(url=f"{self.base_url}/dataFiles", files=file_payload, timeout=120)
+    async def post_data_file(self, files: Sequence[Upload] | bytes) -> Response:
+        """POST /dataFiles, streaming each file from disk or a shared UploadSource."""
+        with MultipartFiles("file", files, self.upload_stats) as file_payload:
+            response = await self.httpx_client.post(url=f"{self.base_url}/dataFiles", files=file_payload)
         return response
 
     async def post_protocol(
-        self, files: List[Path] | bytes, labware_files: Any = None, run_time_parameter_values: Dict[str, Any] | None = None, run_time_parameter_files: Dict[str, Any] | None = None
+        self,
+        files: Sequence[Upload] | bytes,
+        labware_files: Any = None,
+        run_time_parameter_values: Dict[str, Any] | None = None,
+        run_time_parameter_files: Dict[str, Any] | None = None,
+        key: str | None = None,
     ) -> Response:
-        """POST /protocols."""
+        """POST /protocols, streaming each file from disk or a shared UploadSource.
+
+        key is stored with the protocol and returned by GET /protocols, see clients.protocol_cache.
+        """
         if run_time_parameter_files is None:
             run_time_parameter_files = {}
         if run_time_parameter_values is None:
             run_time_parameter_values = {}
-        file_payload: List[Any] = []
-        if isinstance(files, bytes):
-            file_payload.append(("files", files))
-        else:
-            for file in files:
-                file_payload.append(("files", open(file, "rb")))
         if labware_files is not None:
             raise NotImplementedError("Labware files are not yet supported")
-        # Include the form fields (JSON data) as strings
-        file_payload.append(
-            (
-                "runTimeParameterValues",
-                (None, json.dumps(run_time_parameter_values), "application/json"),
+        with MultipartFiles("files", files, self.upload_stats) as file_payload:
+            # Include the form fields (JSON data) as strings
+            file_payload.append(
+                (
+                    "runTimeParameterValues",
+                    (None, json.dumps(run_time_parameter_values), "application/json"),
+                )
             )
-        )
-        file_payload.append(
-            (
-                "runTimeParameterFiles",
-                (None, json.dumps(run_time_parameter_files), "application/json"),
+            file_payload.append(
+                (
+                    "runTimeParameterFiles",
+                    (None, json.dumps(run_time_parameter_files), "application/json"),
+                )
             )
-        )
-        file_payload.append(("protocolKind", (None, "standard")))
-        response = await self.httpx_client.post(url=f"{self.base_url}/protocols", files=file_payload, timeout=120)
+            file_payload.append(("protocolKind", (None, "standard")))
+            if key is not None:
+                file_payload.append(("key", (None, key)))
+            response = await self.httpx_client.post(url=f"{self.base_url}/protocols", files=file_payload)
         response.raise_for_status()
         return response
 
@@ -181,31 +248,32 @@ class RobotClient:
             url=f"{self.base_url}/commands",
             json=req_body,
             params=params,
-            timeout=timeout_sec,
+            extensions={BUDGET_EXTENSION: timeout_sec},
         )
         # response.raise_for_status()
         return response
 
-    async def get_runs(self) -> Response:
-        """GET /runs."""
-        response = await self.httpx_client.get(url=f"{self.base_url}/runs")
+    async def get_runs(self, page_length: int | None = None) -> Response:
+        """GET /runs, only the newest page_length runs if given."""
+        params = {} if page_length is None else {"pageLength": page_length}
+        response = await self.httpx_client.get(url=f"{self.base_url}/runs", params=params)
         response.raise_for_status()
         return response
 
     async def post_run(self, req_body: Dict[str, object]) -> Response:
         """POST /runs."""
-        response = await self.httpx_client.post(url=f"{self.base_url}/runs", json=req_body, timeout=15)
+        response = await self.httpx_client.post(url=f"{self.base_url}/runs", json=req_body)
         return response
 
     async def patch_run(self, run_id: str, req_body: Dict[str, object]) -> Response:
         """POST /runs."""
-        response = await self.httpx_client.patch(url=f"{self.base_url}/runs/{run_id}", json=req_body, timeout=15)
+        response = await self.httpx_client.patch(url=f"{self.base_url}/runs/{run_id}", json=req_body)
         response.raise_for_status()
         return response
 
     async def get_run(self, run_id: str) -> Response:
         """GET /runs/:run_id."""
-        response = await self.httpx_client.get(url=f"{self.base_url}/runs/{run_id}", timeout=15)
+        response = await self.httpx_client.get(url=f"{self.base_url}/runs/{run_id}")
         response.raise_for_status()
         return response
 
@@ -221,17 +289,32 @@ class RobotClient:
             url=f"{self.base_url}/runs/{run_id}/commands",
             json=req_body,
             params=params,
-            timeout=timeout_sec,
+            extensions={BUDGET_EXTENSION: timeout_sec},
         )
         # response.raise_for_status()
         return response
 
-    async def get_run_commands(self, run_id: str) -> Response:
-        """GET /runs/:run_id/commands."""
-        response = await self.httpx_client.get(url=f"{self.base_url}/runs/{run_id}/commands", params={"pageLength": 300})
+    async def get_run_commands(self, run_id: str, cursor: int | None = None, page_length: int = 300) -> Response:
+        """GET /runs/:run_id/commands.
+
+        One page only, without a cursor the robot returns the page ending at the latest command.
+        Use iter_run_commands to walk all of them.
+        """
+        params: Dict[str, int] = {"pageLength": page_length}
+        if cursor is not None:
+            params["cursor"] = cursor
+        response = await self.httpx_client.get(url=f"{self.base_url}/runs/{run_id}/commands", params=params)
         response.raise_for_status()
         return response
 
+    def iter_run_commands(self, run_id: str, cursor: int = 0, page_length: int = DEFAULT_PAGE_LENGTH, prefetch: bool = True) -> RunCommands:
+        """Async iterator over every command of a run from cursor on, see clients.run_commands."""
+
+        def fetch_page(page_cursor: int, length: int) -> Awaitable[Response]:
+            return self.get_run_commands(run_id, cursor=page_cursor, page_length=length)
+
+        return RunCommands(fetch_page, cursor=cursor, page_length=page_length, prefetch=prefetch)
+
     async def get_run_command(self, run_id: str, command_id: str) -> Response:
         """GET /runs/:run_id/commands/:command_id."""
         response = await self.httpx_client.get(url=f"{self.base_url}/runs/{run_id}/commands/{command_id}")
@@ -257,33 +340,31 @@ class RobotClient:
         req_body: Dict[str, object],
     ) -> Response:
         """POST /runs/:run_id/commands."""
-        response = await self.httpx_client.post(url=f"{self.base_url}/runs/{run_id}/actions", json=req_body, timeout=15)
+        response = await self.httpx_client.post(url=f"{self.base_url}/runs/{run_id}/actions", json=req_body)
         response.raise_for_status()
         return response
 
     async def get_analysis(self, protocol_id: str, analysis_id: str) -> Response:
         """GET /protocols/{protocol_id}/{analysis_id}."""
-        response = await self.httpx_client.get(url=f"{self.base_url}/protocols/{protocol_id}/analyses/{analysis_id}", timeout=6000)
+        response = await self.httpx_client.get(url=f"{self.base_url}/protocols/{protocol_id}/analyses/{analysis_id}")
         response.raise_for_status()
         return response
 
     async def get_analysis_as_doc(self, protocol_id: str, analysis_id: str) -> Response:
         """GET /protocols/{protocol_id}/{analysis_id}."""
-        response = await self.httpx_client.get(
-            url=f"{self.base_url}/protocols/{protocol_id}/analyses/{analysis_id}/asDocument", timeout=6000
-        )
+        response = await self.httpx_client.get(url=f"{self.base_url}/protocols/{protocol_id}/analyses/{analysis_id}/asDocument")
         response.raise_for_status()
         return response
 
     async def get_analyses(self, protocol_id: str) -> Response:
         """GET /protocols/{protocol_id}/{analysis_id}."""
-        response = await self.httpx_client.get(url=f"{self.base_url}/protocols/{protocol_id}/analyses", timeout=60)
+        response = await self.httpx_client.get(url=f"{self.base_url}/protocols/{protocol_id}/analyses")
         response.raise_for_status()
         return response
 
     async def delete_run(self, run_id: str) -> Response:
         """DELETE /runs/{run_id}."""
-        response = await self.httpx_client.delete(f"{self.base_url}/runs/{run_id}", timeout=15)
+        response = await self.httpx_client.delete(f"{self.base_url}/runs/{run_id}")
         response.raise_for_status()
         return response
 
@@ -324,7 +405,7 @@ class RobotClient:
 
     async def get_modules(self) -> Response:
         """GET /modules."""
-        response = await self.httpx_client.get(url=f"{self.base_url}/modules", timeout=15)
+        response = await self.httpx_client.get(url=f"{self.base_url}/modules")
         response.raise_for_status()
         return response
 
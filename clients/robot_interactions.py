@@ -1,18 +1,21 @@
-import asyncio
 import random
-from typing import Any, Dict, List, Optional, cast
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 
-import anyio
 import httpx
 from anyio import create_task_group
+from clients.bulk_delete import BulkDeleteSummary, ResourceFilter, bulk_delete
+from clients.command_pipeline import CommandPipeline, PipelineReport
+from clients.polling import Backoff, poll_until
 from clients.robot_client import RobotClient
 from httpx import Response
+from perf.tracing import timed
 from rich.console import Console
 from rich.panel import Panel
-from util.util import log_response, timeit
+from util.json_body import body, extract
+from util.util import log_response
 
 
-@timeit
+@timed()
 def help() -> None:
     for i in range(100000):
         a = 0
@@ -57,6 +60,31 @@ class RobotInteractions:
         await log_response(command, print_timing=print_timing, console=self.console)
         return command
 
+    async def execute_commands(
+        self,
+        run_id: str,
+        req_bodies: List[Dict[str, Any]],
+        timeout_sec: float = 600.0,
+        print_timing: bool = False,
+        print_command: bool = True,
+    ) -> PipelineReport:
+        """Post commands to a run back to back without waiting for each, then wait for all of them to finish.
+
+        Much faster than execute_command in a loop when the commands are short. Use execute_command
+        where a script has to look at one command's result before sending the next.
+        """
+        if print_command:
+            self.console.print()
+            self.console.print(Panel(f"[bold green]Sending {len(req_bodies)} Commands[/]", style="bold magenta"))
+            for req_body in req_bodies:
+                self.console.print(req_body)
+        report = await CommandPipeline(self.robot_client, run_id, timeout_sec=timeout_sec).run(req_bodies)
+        if print_timing:
+            self.console.print(report.table())
+        for timing in report.failed:
+            self.console.print(f"Command {timing.index} {timing.command_type} {timing.status}: {timing.error}", style="bold red")
+        return report
+
     async def execute_simple_command(
         self,
         req_body: Dict[str, Any],
@@ -84,17 +112,18 @@ class RobotInteractions:
         """Post a simple command waiting until complete then log the response."""
         runs = await self.robot_client.get_runs()
         await log_response(runs, print_timing=print_timing, console=self.console)
-        try:
-            return str(runs.json()["links"]["current"]["href"].replace("/runs/", ""))
-        except KeyError:
+        # only the link is decoded, not the whole list of runs
+        current = extract(runs, "links", "current", "href", default=None)
+        if current is None:
             self.console.print("No current run.")
-        return None
+            return None
+        return str(current).replace("/runs/", "")
 
     async def get_module_id(self, module_model: str) -> str:
         """Given a moduleModel get the id of that module."""
         modules = await self.robot_client.get_modules()
         await log_response(modules)
-        ids: List[str] = [module["id"] for module in modules.json()["data"] if module["moduleModel"] == module_model]
+        ids: List[str] = [module["id"] for module in body(modules)["data"] if module["moduleModel"] == module_model]
         if len(ids) > 1:
             raise ValueError(f"You have multiples of a module {module_model} attached and that is not supported.")  # noqa: E501
         if len(ids) == 0:
@@ -103,7 +132,7 @@ class RobotInteractions:
 
     async def query_random_runs(self) -> None:
         runs = await self.robot_client.get_runs()
-        run_ids = [run["id"] for run in runs.json()["data"]]
+        run_ids = [run["id"] for run in body(runs)["data"]]
         random_runs = random.choices(run_ids, k=4)
 
         async def _get_and_log_run(run_id: str) -> None:
@@ -118,40 +147,73 @@ class RobotInteractions:
         """Given a moduleModel get the id of that module."""
         modules = await self.robot_client.get_modules()
         await log_response(modules)
-        data = [module for module in modules.json()["data"] if module["id"] == module_id]
+        data = [module for module in body(modules)["data"] if module["id"] == module_id]
         if len(data) == 0:
             raise ValueError(f"No module attached to the robot has id of {module_id}")
         return data[0]
 
     async def get_attached_pipettes(self) -> List[str]:
         response = await self.robot_client.get_pipettes()
-        pipettes_data = response.json()["data"]
+        pipettes_data = body(response)["data"]
         return [pipette["id"] for pipette in pipettes_data]
 
-    @timeit
+    @timed()
     async def wait_until_run_status(
         self,
         run_id: str,
         expected_status: str,
         timeout_sec: int = 15,
         polling_interval_sec: float = 0.1,
+        max_polling_interval_sec: float = 1.0,
     ) -> Dict[str, Any]:
-        """Wait until a run achieves the expected status, returning its data."""
-        with anyio.fail_after(timeout_sec):  # if say a HS is shaking when you say stop it takes some seconds to actually stop
-            get_run_response = await self.robot_client.get_run(run_id=run_id)
+        """Wait until a run achieves the expected status, returning its data.
+
+        Polls with jittered exponential backoff from polling_interval_sec up to max_polling_interval_sec,
+        dropping back to the fast interval whenever the status changes.
+        """
+        run_data: Dict[str, Any] = {}
+
+        async def run_status() -> str:
+            nonlocal run_data
+            run_data = body(await self.robot_client.get_run(run_id=run_id))["data"]
+            return str(run_data["status"])
+
+        # if say a HS is shaking when you say stop it takes some seconds to actually stop
+        await poll_until(
+            run_status,
+            lambda status: status == expected_status,
+            timeout_sec=timeout_sec,
+            backoff=Backoff(initial_sec=polling_interval_sec, ceiling_sec=max_polling_interval_sec),
+        )
+        return run_data
 
-            while get_run_response.json()["data"]["status"] != expected_status:
-                await anyio.sleep(polling_interval_sec)
-                get_run_response = await self.robot_client.get_run(run_id=run_id)
+    async def wait_until_module_data(
+        self,
+        module_id: str,
+        predicate: Callable[[Dict[str, Any]], bool],
+        timeout_sec: float = 30,
+        polling_interval_sec: float = 0.2,
+        max_polling_interval_sec: float = 2.0,
+    ) -> Dict[str, Any]:
+        """Wait until the module's data satisfies predicate, returning that data.
 
-        return cast(Dict[str, Any], get_run_response.json()["data"])
+        Module readings like currentTemperature change on every poll, so the backoff is not reset on change.
+        """
+        data: Dict[str, Any] = await poll_until(
+            lambda: self.get_module_data_by_id(module_id),
+            predicate,
+            timeout_sec=timeout_sec,
+            backoff=Backoff(initial_sec=polling_interval_sec, ceiling_sec=max_polling_interval_sec),
+            reset_on_change=False,
+        )
+        return data
 
     async def is_current_run_running(self) -> bool:
         """True if there is a current run and it is running, else False."""
         current_run_id = await self.get_current_run()
         if current_run_id:
             get_run_response = await self.robot_client.get_run(run_id=current_run_id)
-            if get_run_response.json()["data"]["status"] in ["running"]:
+            if extract(get_run_response, "data", "status") in ["running"]:
                 return True
         return False
 
@@ -177,11 +239,54 @@ class RobotInteractions:
             )
         return None
 
-    async def delete_all_runs(self) -> None:
+    async def delete_all_runs(self, concurrency: int = 8) -> BulkDeleteSummary:
         """Delete all runs present on the robot."""
-        runs = await self.robot_client.get_runs()
-        for run in runs.json()["data"]:
-            await self.robot_client.delete_run(run_id=run["id"])
+        return await self.delete_runs(concurrency=concurrency)
+
+    async def delete_runs(
+        self, resource_filter: ResourceFilter | None = None, concurrency: int = 8, retries: int = 2, show_progress: bool = True
+    ) -> BulkDeleteSummary:
+        """Delete the runs matching resource_filter (all runs if None) concurrently."""
+        runs = body(await self.robot_client.get_runs())["data"]
+        return await self._bulk_delete("runs", runs, self.robot_client.delete_run, resource_filter, concurrency, retries, show_progress)
+
+    async def delete_protocols(
+        self, resource_filter: ResourceFilter | None = None, concurrency: int = 8, retries: int = 2, show_progress: bool = True
+    ) -> BulkDeleteSummary:
+        """Delete the protocols matching resource_filter (all protocols if None) concurrently.
+
+        Protocols used by an existing run are refused by the robot, delete the runs first.
+        """
+        protocols = body(await self.robot_client.get_protocols())["data"]
+        return await self._bulk_delete(
+            "protocols", protocols, self.robot_client.delete_protocol, resource_filter, concurrency, retries, show_progress
+        )
+
+    async def delete_data_files(
+        self, resource_filter: ResourceFilter | None = None, concurrency: int = 8, retries: int = 2, show_progress: bool = True
+    ) -> BulkDeleteSummary:
+        """Delete the data files matching resource_filter (all data files if None) concurrently."""
+        data_files = body(await self.robot_client.get_data_files())["data"]
+        return await self._bulk_delete(
+            "data files", data_files, self.robot_client.delete_data_file, resource_filter, concurrency, retries, show_progress
+        )
+
+    async def _bulk_delete(
+        self,
+        kind: str,
+        resources: List[Dict[str, Any]],
+        delete: Callable[[str], Awaitable[Response]],
+        resource_filter: ResourceFilter | None,
+        concurrency: int,
+        retries: int,
+        show_progress: bool,
+    ) -> BulkDeleteSummary:
+        ids = [resource["id"] for resource in resources if resource_filter is None or resource_filter.matches(resource)]
+        summary = await bulk_delete(
+            kind, ids, delete, concurrency=concurrency, retries=retries, console=self.console if show_progress else None
+        )
+        self.console.print(summary.describe(), style="bold red" if summary.failed else "bold green")
+        return summary
 
     async def force_create_new_run(self) -> str:
         """Create a new empty run.  Stop the current run and uncurrent if necessary."""
@@ -205,8 +310,8 @@ class RobotInteractions:
             current_run_id = await self.get_current_run()
             if current_run_id:
                 await self.stop_run(current_run_id)
-            stop_timeout_sec = 15
-            await self.wait_until_run_status(run_id=current_run_id, expected_status="stopped", timeout_sec=stop_timeout_sec)
+                stop_timeout_sec = 15
+                await self.wait_until_run_status(run_id=current_run_id, expected_status="stopped", timeout_sec=stop_timeout_sec)
             current_run_id = await self.get_current_run()
             if current_run_id:
                 delete_run = await self.robot_client.delete_run(current_run_id)
@@ -216,7 +321,7 @@ class RobotInteractions:
             run = await self.robot_client.post_run(req_body={"data": {}})
             await log_response(run)
         assert run is not None, "Failed to create run"
-        return str(run.json()["data"]["id"])
+        return str(extract(run, "data", "id"))
 
     async def hmm(self) -> None:
         run_response = await self.robot_client.post_run(req_body={"data": {}})
@@ -232,18 +337,46 @@ class RobotInteractions:
         delete_run = await self.robot_client.delete_run(run_id)
         await log_response(delete_run, print_timing=True)
         final_run = await self.get_current_run(print_timing=True)
-        await help()
+        help()
         assert final_run is None
 
     async def all_analyses_are_complete(self) -> bool:
-        protocols = (await self.robot_client.get_protocols()).json()
+        protocols = body(await self.robot_client.get_protocols())
         for protocol in protocols["data"]:
-            for analysis_summary in protocol["analysisSummaries"]:
-                if analysis_summary["status"] != "completed":
-                    return False
+            if not _analyses_are_complete(protocol):
+                return False
         return True
 
-    async def wait_for_all_analyses_to_complete(self) -> None:
-        """Wait for all analysis summary status to equal completed."""
-        while not await self.all_analyses_are_complete():
-            await asyncio.sleep(0.3)
+    @timed()
+    async def wait_for_all_analyses_to_complete(
+        self,
+        timeout_sec: float | None = None,
+        polling_interval_sec: float = 0.3,
+        max_polling_interval_sec: float = 5.0,
+    ) -> None:
+        """Wait for all analysis summary status to equal completed.
+
+        /protocols is fetched once, after that only the protocols that still have
+        pending analyses are polled individually until none are left.
+        """
+        protocols = body(await self.robot_client.get_protocols())["data"]
+        pending = {protocol["id"] for protocol in protocols if not _analyses_are_complete(protocol)}
+
+        async def still_pending() -> frozenset[str]:
+            for protocol_id in list(pending):
+                response = await self.robot_client.get_protocol(protocol_id)
+                # a protocol deleted while we wait has nothing left to analyze
+                if response.status_code == 404 or _analyses_are_complete(extract(response, "data")):
+                    pending.discard(protocol_id)
+            return frozenset(pending)
+
+        await poll_until(
+            still_pending,
+            lambda remaining: not remaining,
+            timeout_sec=timeout_sec,
+            backoff=Backoff(initial_sec=polling_interval_sec, ceiling_sec=max_polling_interval_sec),
+        )
+
+
+def _analyses_are_complete(protocol: Dict[str, Any]) -> bool:
+    return all(analysis_summary["status"] == "completed" for analysis_summary in protocol["analysisSummaries"])
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+from collections import deque
+from collections.abc import Awaitable, Callable
+from types import TracebackType
+from typing import Any
+
+from httpx import Response
+from util.json_body import body
+
+DEFAULT_PAGE_LENGTH = 200
+
+FetchPage = Callable[[int, int], Awaitable[Response]]
+
+
+class RunCommands:
+    """Walk a run's commands page by page with GET /runs/{run_id}/commands?cursor=...&pageLength=...
+
+    Commands are yielded as their page arrives and at most two pages are held at once. With prefetch
+    the next page is requested while the current one is consumed. cursor is the index of the next
+    command to be yielded, so an interrupted walk resumes with RobotClient.iter_run_commands(run_id, cursor=commands.cursor).
+
+    The walk ends at the totalLength reported by the last page read; commands a running protocol
+    adds after that are left for a later walk.
+
+        async with robot_client.iter_run_commands(run_id, page_length=500) as commands:
+            async for command in commands:
+                ...
+    """
+
+    def __init__(self, fetch_page: FetchPage, cursor: int = 0, page_length: int = DEFAULT_PAGE_LENGTH, prefetch: bool = True) -> None:
+        if page_length < 1:
+            raise ValueError("page_length must be at least 1")
+        self.cursor = cursor
+        self.page_length = page_length
+        self.prefetch = prefetch
+        self.total_length: int | None = None
+        self.pages_fetched = 0
+        self._fetch_page = fetch_page
+        self._page: deque[dict[str, Any]] = deque()
+        # where the next page starts, ahead of cursor by whatever is left in _page
+        self._next_cursor = cursor
+        self._next_page: asyncio.Task[Response] | None = None
+
+    def __aiter__(self) -> RunCommands:
+        return self
+
+    async def __anext__(self) -> dict[str, Any]:
+        if not self._page:
+            await self._load_page()
+            if not self._page:
+                raise StopAsyncIteration
+        command = self._page.popleft()
+        self.cursor += 1
+        return command
+
+    def _exhausted(self) -> bool:
+        return self.total_length is not None and self._next_cursor >= self.total_length
+
+    async def _load_page(self) -> None:
+        if self._next_page is not None:
+            next_page, self._next_page = self._next_page, None
+            response = await next_page
+        elif self._exhausted():
+            return
+        else:
+            response = await self._fetch_page(self._next_cursor, self.page_length)
+        response.raise_for_status()
+        page_body = body(response)
+        page = page_body["data"]
+        self.pages_fetched += 1
+        self.total_length = page_body["meta"]["totalLength"]
+        self._next_cursor = page_body["meta"]["cursor"] + len(page)
+        self._page.extend(page)
+        if self.prefetch and page and not self._exhausted():
+            self._next_page = asyncio.ensure_future(self._fetch_page(self._next_cursor, self.page_length))
+
+    async def aclose(self) -> None:
+        """Cancel a prefetch still in flight."""
+        if self._next_page is not None:
+            self._next_page.cancel()
+            with contextlib.suppress(asyncio.CancelledError, Exception):
+                await self._next_page
+            self._next_page = None
+
+    async def __aenter__(self) -> RunCommands:
+        return self
+
+    async def __aexit__(self, exc_type: type[BaseException] | None, exc: BaseException | None, tb: TracebackType | None) -> None:
+        await self.aclose()
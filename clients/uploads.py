@@ -0,0 +1,181 @@
+"""Streamed multipart file uploads.
+
+httpx streams a multipart body in 64 KiB chunks when a field is a file object rather than bytes,
+so uploads here hand it readers and never the whole file. UploadSource reads a file from disk once
+(memory mapped) and gives every upload its own reader over the same buffer, so one protocol can be
+sent to many robots, concurrently, without reading it again.
+
+    with UploadSource.from_path(Path("protocol.py")) as protocol:
+        for robot_client in robot_clients:
+            await robot_client.post_protocol([protocol])
+"""
+
+from __future__ import annotations
+
+import contextlib
+import mimetypes
+import mmap
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from types import TracebackType
+from typing import IO, Any, Sequence
+
+DEFAULT_CONTENT_TYPE = "application/octet-stream"
+
+
+class UploadSource:
+    """The bytes of one file to upload, shareable across any number of uploads."""
+
+    def __init__(self, name: str, data: bytes | mmap.mmap, content_type: str | None = None) -> None:
+        self.name = name
+        self.content_type = content_type or mimetypes.guess_type(name)[0] or DEFAULT_CONTENT_TYPE
+        self._data = data
+
+    @classmethod
+    def from_path(cls, path: Path, content_type: str | None = None) -> UploadSource:
+        """Memory map path, the file handle is closed before this returns and the map by close()."""
+        with open(path, "rb") as f:
+            # mmap refuses empty files
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else b""
+        return cls(name=path.name, data=data, content_type=content_type)
+
+    @property
+    def size(self) -> int:
+        return len(self._data)
+
+    def reader(self) -> _BufferReader:
+        return _BufferReader(self._data)
+
+    def close(self) -> None:
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+
+    def __enter__(self) -> UploadSource:
+        return self
+
+    def __exit__(self, exc_type: type[BaseException] | None, exc: BaseException | None, tb: TracebackType | None) -> None:
+        self.close()
+
+
+class _BufferReader:
+    """A read only file object over a shared buffer, with its own position."""
+
+    def __init__(self, data: bytes | mmap.mmap) -> None:
+        self._data = data
+        self._position = 0
+
+    def read(self, size: int = -1) -> bytes:
+        end = len(self._data) if size < 0 else min(len(self._data), self._position + size)
+        chunk = self._data[self._position : end]
+        self._position = end
+        return chunk
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        base = {os.SEEK_SET: 0, os.SEEK_CUR: self._position, os.SEEK_END: len(self._data)}[whence]
+        self._position = max(0, base + offset)
+        return self._position
+
+    def tell(self) -> int:
+        return self._position
+
+
+@dataclass
+class UploadStats:
+    """Bytes handed to the transport by file uploads and how long that took.
+
+    transfer_sec runs from the first to the last chunk read for each upload, so it excludes the
+    time the robot spends on the request after the body is sent (analysis kick off and so on).
+    It is summed over uploads, concurrent ones included, so it can exceed the wall time they took
+    and throughput is the rate of one upload, not of all of them together.
+    """
+
+    uploads: int = 0
+    bytes_sent: int = 0
+    transfer_sec: float = 0.0
+
+    @property
+    def throughput_bytes_per_sec(self) -> float:
+        return self.bytes_sent / self.transfer_sec if self.transfer_sec else 0.0
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "uploads": self.uploads,
+            "bytes_sent": self.bytes_sent,
+            "transfer_sec": self.transfer_sec,
+            "throughput_mib_per_sec": self.throughput_bytes_per_sec / 2**20,
+        }
+
+
+class _MeteredReader:
+    """Count the bytes httpx reads from a file object and when."""
+
+    def __init__(self, raw: IO[bytes] | _BufferReader) -> None:
+        self._raw = raw
+        self.bytes_read = 0
+        self.first_read: float | None = None
+        self.last_read = 0.0
+
+    def read(self, size: int = -1) -> bytes:
+        if self.first_read is None:
+            self.first_read = time.perf_counter()
+        chunk = self._raw.read(size)
+        self.bytes_read += len(chunk)
+        self.last_read = time.perf_counter()
+        return chunk
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        return self._raw.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._raw.tell()
+
+
+Upload = Path | UploadSource
+
+
+class MultipartFiles:
+    """Open uploads as streamed multipart file fields, closing every file handle on exit.
+
+    On a clean exit the bytes sent are added to stats.
+    """
+
+    def __init__(self, field_name: str, files: Sequence[Upload] | bytes, stats: UploadStats) -> None:
+        self._field_name = field_name
+        self._files = files
+        self._stats = stats
+        self._readers: list[_MeteredReader] = []
+        self._stack = contextlib.ExitStack()
+
+    def __enter__(self) -> list[tuple[str, Any]]:
+        if isinstance(self._files, bytes):
+            return [(self._field_name, self._files)]
+        fields: list[tuple[str, Any]] = []
+        try:
+            for upload in self._files:
+                raw: IO[bytes] | _BufferReader
+                if isinstance(upload, UploadSource):
+                    name, content_type, raw = upload.name, upload.content_type, upload.reader()
+                else:
+                    name = upload.name
+                    content_type = mimetypes.guess_type(name)[0] or DEFAULT_CONTENT_TYPE
+                    raw = self._stack.enter_context(open(upload, "rb"))
+                reader = _MeteredReader(raw)
+                self._readers.append(reader)
+                fields.append((self._field_name, (name, reader, content_type)))
+        except BaseException:
+            # __exit__ does not run when __enter__ raises, close what was already opened
+            self._stack.close()
+            raise
+        return fields
+
+    def __exit__(self, exc_type: type[BaseException] | None, exc: BaseException | None, tb: TracebackType | None) -> None:
+        self._stack.close()
+        if exc_type is not None:
+            return
+        for reader in self._readers:
+            self._stats.uploads += 1
+            self._stats.bytes_sent += reader.bytes_read
+            if reader.first_read is not None:
+                self._stats.transfer_sec += reader.last_read - reader.first_read
@@ -0,0 +1,642 @@
+"""An in-process stand-in for the robot server.
+
+FakeRobot is an httpx transport, hand it to RobotClient.make(transport=...) and every
+RobotClient/RobotInteractions call is answered locally with configurable latency,
+injected failures and payloads shaped (and sized) like the real robot server's.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import random
+import re
+import uuid
+from collections import Counter
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+from email.parser import BytesParser
+from email.policy import default as default_email_policy
+from typing import Any
+
+import httpx
+
+TERMINAL_RUN_STATUSES = ["stopped", "succeeded", "failed"]
+
+# ---------------- Latency and failure models ----------------
+
+
+@dataclass(frozen=True)
+class Fixed:
+    seconds: float
+
+    def sample(self, rng: random.Random) -> float:
+        return self.seconds
+
+
+@dataclass(frozen=True)
+class Uniform:
+    low_sec: float
+    high_sec: float
+
+    def sample(self, rng: random.Random) -> float:
+        return rng.uniform(self.low_sec, self.high_sec)
+
+
+@dataclass(frozen=True)
+class LogNormal:
+    """Long tailed latency, median_sec is the p50 and sigma widens the tail."""
+
+    median_sec: float
+    sigma: float = 0.5
+
+    def sample(self, rng: random.Random) -> float:
+        return rng.lognormvariate(math.log(self.median_sec), self.sigma)
+
+
+Latency = Fixed | Uniform | LogNormal
+
+
+@dataclass(frozen=True)
+class FailureRule:
+    """Fail matching requests with probability, either with status_code or by raising error.
+
+    route is the route name as listed by FakeRobot.route_names(), for example "GET /runs/{run_id}".
+    """
+
+    route: str
+    probability: float
+    status_code: int = 503
+    error: type[httpx.TransportError] | None = None
+
+
+@dataclass
+class FakeRobotConfig:
+    """Knobs for the fake robot. seed makes latency and failure sampling repeatable."""
+
+    seed: int = 0
+    default_latency: Latency = Fixed(0.0)
+    latency: dict[str, Latency] = field(default_factory=dict)
+    failures: list[FailureRule] = field(default_factory=list)
+    run_count: int = 20
+    offsets_per_run: int = 6
+    analysis_command_count: int = 500
+    analysis_duration_sec: float = 0.5
+    command_duration_sec: float = 0.05
+    run_duration_sec: float = 2.0
+    stop_duration_sec: float = 0.2
+    chunk_size: int = 64 * 1024
+
+
+# ---------------- Payload builders ----------------
+
+
+def _now() -> datetime:
+    return datetime.now(UTC)
+
+
+def _timestamp(moment: datetime) -> str:
+    return moment.isoformat()
+
+
+def _new_id() -> str:
+    return str(uuid.uuid4())
+
+
+def _labware_offset(rng: random.Random, created_at: datetime) -> dict[str, Any]:
+    return {
+        "id": _new_id(),
+        "createdAt": _timestamp(created_at),
+        "definitionUri": rng.choice(
+            [
+                "opentrons/nest_96_wellplate_100ul_pcr_full_skirt/2",
+                "opentrons/opentrons_96_tiprack_300ul/1",
+                "opentrons/corning_96_wellplate_360ul_flat/2",
+            ]
+        ),
+        "location": {"slotName": str(rng.randint(1, 11))},
+        "vector": {axis: round(rng.uniform(-1.5, 1.5), 2) for axis in "xyz"},
+    }
+
+
+def _analysis_command(index: int, created_at: datetime) -> dict[str, Any]:
+    return {
+        "id": _new_id(),
+        "key": _new_id(),
+        "commandType": "moveToWell",
+        "createdAt": _timestamp(created_at),
+        "startedAt": _timestamp(created_at),
+        "completedAt": _timestamp(created_at),
+        "status": "succeeded",
+        "params": {
+            "pipetteId": "pipetteId",
+            "labwareId": "destPlateId",
+            "wellName": f"{'ABCDEFGH'[index % 8]}{index % 12 + 1}",
+            "wellLocation": {"origin": "top", "offset": {"x": 0.0, "y": 0.0, "z": 1.0}},
+        },
+        "result": {"position": {"x": 14.38, "y": 74.24, "z": 102.0}},
+        "notes": [],
+    }
+
+
+@dataclass
+class _Command:
+    data: dict[str, Any]
+    started_at: datetime
+    completed_at: datetime
+
+    def render(self) -> dict[str, Any]:
+        now = _now()
+        data = dict(self.data)
+        if now < self.started_at:
+            data["status"] = "queued"
+        elif now < self.completed_at:
+            data["status"] = "running"
+            data["startedAt"] = _timestamp(self.started_at)
+        else:
+            data["status"] = "succeeded"
+            data["startedAt"] = _timestamp(self.started_at)
+            data["completedAt"] = _timestamp(self.completed_at)
+        return data
+
+
+@dataclass
+class _Run:
+    data: dict[str, Any]
+    commands: list[_Command] = field(default_factory=list)
+    status: str = "idle"
+    transition_at: datetime | None = None
+    next_status: str | None = None
+
+    def render(self) -> dict[str, Any]:
+        if self.transition_at is not None and self.next_status is not None and _now() >= self.transition_at:
+            self.status, self.next_status, self.transition_at = self.next_status, None, None
+        return {**self.data, "status": self.status}
+
+
+@dataclass
+class _Protocol:
+    data: dict[str, Any]
+    analyses: list[dict[str, Any]]
+    analysis_ready_at: datetime
+
+    def render(self) -> dict[str, Any]:
+        self._settle()
+        return {**self.data, "analysisSummaries": [{"id": a["id"], "status": a["status"]} for a in self.analyses]}
+
+    def _settle(self) -> None:
+        if _now() >= self.analysis_ready_at:
+            for analysis in self.analyses:
+                if analysis["status"] == "pending":
+                    analysis["status"] = "completed"
+                    analysis["result"] = "ok"
+
+
+# ---------------- Transport ----------------
+
+
+class _Body(httpx.AsyncByteStream):
+    """Stream the payload in chunks so httpx sees a real body download (and sets elapsed)."""
+
+    def __init__(self, content: bytes, chunk_size: int) -> None:
+        self._content = content
+        self._chunk_size = chunk_size
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        for start in range(0, len(self._content), self._chunk_size):
+            yield self._content[start : start + self._chunk_size]
+
+
+Handler = Callable[[httpx.Request, dict[str, str]], Awaitable[tuple[int, Any]]]
+
+
+class FakeRobot(httpx.AsyncBaseTransport):
+    """Answer RobotClient requests in process, see the module docstring."""
+
+    def __init__(self, config: FakeRobotConfig | None = None) -> None:
+        self.config = config or FakeRobotConfig()
+        self.rng = random.Random(self.config.seed)
+        self.requests: Counter[str] = Counter()
+        self.runs: dict[str, _Run] = {}
+        self.current_run_id: str | None = None
+        self.protocols: dict[str, _Protocol] = {}
+        self.data_files: dict[str, dict[str, Any]] = {}
+        self.settings: dict[str, Any] = {"enableOEMMode": False, "disableLogAggregation": True}
+        self.modules: list[dict[str, Any]] = [
+            {
+                "id": "heater-shaker-id",
+                "serialNumber": "HSFAKE01",
+                "moduleModel": "heaterShakerModuleV1",
+                "moduleType": "heaterShakerModuleType",
+                "data": {"status": "idle", "labwareLatchStatus": "idle_closed", "speedStatus": "idle", "currentSpeed": 0},
+            },
+            {
+                "id": "thermocycler-id",
+                "serialNumber": "TCFAKE01",
+                "moduleModel": "thermocyclerModuleV2",
+                "moduleType": "thermocyclerModuleType",
+                "data": {"status": "idle", "lidStatus": "open", "currentTemperature": 23.0},
+            },
+        ]
+        self._routes: list[tuple[str, str, re.Pattern[str], Handler]] = []
+        self._add_routes()
+        for _ in range(self.config.run_count):
+            self._create_run(protocol_id=None, make_current=False)
+
+    # ---- routing ----
+
+    def _route(self, method: str, template: str, handler: Handler) -> None:
+        pattern = re.sub(r"\{(\w+)\}", r"(?P<\1>[^/]+)", template)
+        self._routes.append((method, f"{method} {template}", re.compile(f"^{pattern}$"), handler))
+
+    def route_names(self) -> list[str]:
+        return [name for _, name, _, _ in self._routes]
+
+    def _add_routes(self) -> None:
+        self._route("GET", "/health", self._get_health)
+        self._route("GET", "/openapi.json", self._get_openapi)
+        self._route("GET", "/networking/status", self._get_networking_status)
+        self._route("GET", "/runs", self._get_runs)
+        self._route("POST", "/runs", self._post_run)
+        self._route("GET", "/runs/{run_id}", self._get_run)
+        self._route("PATCH", "/runs/{run_id}", self._patch_run)
+        self._route("DELETE", "/runs/{run_id}", self._delete_run)
+        self._route("GET", "/runs/{run_id}/commands", self._get_run_commands)
+        self._route("POST", "/runs/{run_id}/commands", self._post_run_command)
+        self._route("GET", "/runs/{run_id}/commands/{command_id}", self._get_run_command)
+        self._route("POST", "/runs/{run_id}/actions", self._post_run_action)
+        self._route("POST", "/runs/{run_id}/labware_offsets", self._post_labware_offset)
+        self._route("POST", "/commands", self._post_simple_command)
+        self._route("GET", "/protocols", self._get_protocols)
+        self._route("POST", "/protocols", self._post_protocol)
+        self._route("GET", "/protocols/{protocol_id}", self._get_protocol)
+        self._route("DELETE", "/protocols/{protocol_id}", self._delete_protocol)
+        self._route("GET", "/protocols/{protocol_id}/analyses", self._get_analyses)
+        self._route("GET", "/protocols/{protocol_id}/analyses/{analysis_id}", self._get_analysis)
+        self._route("GET", "/protocols/{protocol_id}/analyses/{analysis_id}/asDocument", self._get_analysis_as_doc)
+        self._route("GET", "/dataFiles", self._get_data_files)
+        self._route("POST", "/dataFiles", self._post_data_file)
+        self._route("DELETE", "/dataFiles/{data_file_id}", self._delete_data_file)
+        self._route("GET", "/modules", self._get_modules)
+        self._route("GET", "/settings", self._get_settings)
+        self._route("POST", "/settings", self._post_setting)
+        self._route("POST", "/settings/reset", self._post_setting_reset)
+        self._route("GET", "/pipettes", self._get_pipettes)
+        self._route("GET", "/instruments", self._get_instruments)
+        self._route("GET", "/calibration/status", self._get_calibration_status)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        for method, name, pattern, handler in self._routes:
+            match = pattern.match(request.url.path)
+            if method == request.method and match:
+                break
+        else:
+            return self._respond(404, {"errors": [{"id": "RouteNotFound", "detail": f"{request.method} {request.url.path}"}]})
+        self.requests[name] += 1
+        await asyncio.sleep(self.config.latency.get(name, self.config.default_latency).sample(self.rng))
+        for rule in self.config.failures:
+            if rule.route == name and self.rng.random() < rule.probability:
+                if rule.error is not None:
+                    raise rule.error(f"Injected failure on {name}", request=request)
+                return self._respond(rule.status_code, {"errors": [{"id": "InjectedFailure", "detail": name}]})
+        await request.aread()
+        status_code, payload = await handler(request, match.groupdict())
+        return self._respond(status_code, payload)
+
+    def _respond(self, status_code: int, payload: Any) -> httpx.Response:
+        content = json.dumps(payload).encode()
+        return httpx.Response(
+            status_code,
+            headers={"content-type": "application/json", "content-length": str(len(content))},
+            stream=_Body(content, self.config.chunk_size),
+        )
+
+    # ---- helpers ----
+
+    @staticmethod
+    def _not_found(kind: str, resource_id: str) -> tuple[int, Any]:
+        return 404, {"errors": [{"id": f"{kind}NotFound", "detail": f"{kind} {resource_id} was not found."}]}
+
+    def _create_run(self, protocol_id: str | None, make_current: bool) -> _Run:
+        created_at = _now()
+        run_id = _new_id()
+        run = _Run(
+            data={
+                "id": run_id,
+                "createdAt": _timestamp(created_at),
+                "current": make_current,
+                "protocolId": protocol_id,
+                "actions": [],
+                "errors": [],
+                "pipettes": [],
+                "modules": [],
+                "labware": [],
+                "liquids": [],
+                "labwareOffsets": [_labware_offset(self.rng, created_at) for _ in range(self.config.offsets_per_run)],
+                "runTimeParameters": [],
+            },
+            status="idle" if make_current else "stopped",
+        )
+        self.runs[run_id] = run
+        if make_current:
+            if self.current_run_id in self.runs:
+                self.runs[self.current_run_id].data["current"] = False
+            self.current_run_id = run_id
+        return run
+
+    def _runs_links(self) -> dict[str, Any]:
+        if self.current_run_id is None:
+            return {}
+        return {"current": {"href": f"/runs/{self.current_run_id}"}}
+
+    # ---- health ----
+
+    async def _get_health(self, request: httpx.Request, params: dict[str, str]) -> tuple[int, Any]:
+        return 200, {"name": "fake-robot", "robot_model": "OT-3 Standard", "api_version": "8.8.0", "robot_serial": "FAKE0001"}
+
+    async def _get_openapi(self, request: httpx.Request, params: dict[str, str]) -> tuple[int, Any]:
+        return 200, {"openapi": "3.0.2", "info": {"title": "Fake Opentrons HTTP API"}, "paths": {}}
+
+    async def _get_networking_status(self, request: httpx.Request, params: dict[str, str]) -> tuple[int, Any]:
+        return 200, {
+            "status": "full",
+            "interfaces": {"eth0": {"ipAddress": "127.0.0.1/8", "macAddress": "00:00:00:00:00:00", "gatewayAddress": "127.0.0.1", "type": "ethernet"}},
+        }
+
+    # ---- runs ----
+
+    async def _get_runs(self, request: httpx.Request, params: dict[str, str]) -> tuple[int, Any]:
+        runs = [run.render() for run in self.runs.values()]
+        page_length = request.url.params.get("pageLength")
+        if page_length is not None:
+            runs = runs[-int(page_length) :]
+        return 200, {"data": runs, "links": self._runs_links(), "meta": {"cursor": 0, "totalLength": len(self.runs)}}
+
+    async def _post_run(self, request: httpx.Request, params: dict[str, str]) -> tuple[int, Any]:
+        current = self.runs.get(self.current_run_id or "")
+        if current is not None and current.render()["status"] not in TERMINAL_RUN_STATUSES:
+            return 409, {"errors": [{"id": "RunAlreadyActive", "detail": "Cannot create a run while another run is active."}]}
+        body = json.loads(request.content or b"{}")
+        run = self._create_run(protocol_id=body.get("data", {}).get("protocolId"), make_current=True)
+        return 201, {"data": run.render()}
+
+    async def _get_run(self, request: httpx.Request, params: dict[str, str]) -> tuple[int, Any]:
+        run = self.runs.get(params["run_id"])
+        if run is None:
+            return self._not_found("Run", params["run_id"])
+        return 200, {"data": run.render()}
+
+    async def _patch_run(self, request: httpx.Request, params: dict[str, str]) -> tuple[int, Any]:
+        run = self.runs.get(params["run_id"])
+        if run is None:
+            return self._not_found("Run", params["run_id"])
+        if json.loads(request.content)["data"].get("current") is False and self.current_run_id == params["run_id"]:
+            run.data["current"] = False
+            self.current_run_id = None
+        return 200, {"data": run.render()}
+
+    async def _delete_run(self, request: httpx.Request, params: dict[str, str]) -> tuple[int, Any]:
+        run = self.runs.get(params["run_id"])
+        if run is None:
+            return self._not_found("Run", params["run_id"])
+        if params["run_id"] == self.current_run_id and run.render()["status"] not in TERMINAL_RUN_STATUSES:
+            return 409, {"errors": [{"id": "RunNotIdle", "detail": "Run is currently active."}]}
+        del self.runs[params["run_id"]]
+        if self.current_run_id == params["run_id"]:
+            self.current_run_id = None
+        return 200, {}
+
+    async def _post_run_action(self, request: httpx.Request, params: dict[str, str]) -> tuple[int, Any]:
+        run = self.runs.get(params["run_id"])
+        if run is None:
+            return self._not_found("Run", params["run_id"])
+        action_type = json.loads(request.content)["data"]["actionType"]
+        now = _now()
+        if action_type == "play":
+            run.status, run.next_status = "running", "succeeded"
+            run.transition_at = now + timedelta(seconds=self.config.run_duration_sec)
+        elif action_type == "pause":
+            run.status, run.next_status, run.transition_at = "paused", None, None
+        elif action_type == "stop":
+            run.status, run.next_status = "stop-requested", "stopped"
+            run.transition_at = now + timedelta(seconds=self.config.stop_duration_sec)
+        action = {"id": _new_id(), "createdAt": _timestamp(now), "actionType": action_type}
+        run.data["actions"].append(action)
+        return 201, {"data": action}
+
+    async def _post_labware_offset(self, request: httpx.Request, params: dict[str, str]) -> tuple[int, Any]:
+        run = self.runs.get(params["run_id"])
+        if run is None:
+            return self._not_found("Run", params["run_id"])
+        offset = {"id": _new_id(), "createdAt": _timestamp(_now()), **json.loads(request.content)["data"]}
+        run.data["labwareOffsets"].append(offset)
+        return 201, {"data": offset}
+
+    # ---- commands ----
+
+    def _enqueue_command(self, run: _Run, body: dict[str, Any]) -> _Command:
+        now = _now()
+        previous_completion = run.commands[-1].completed_at if run.commands else now
+        started_at = max(now, previous_completion)
+        command = _Command(
+            data={
+                "id": _new_id(),
+                "key": _new_id(),
+                "createdAt": _timestamp(now),
+                "commandType": body["data"]["commandType"],
+                "params": body["data"].get("params", {}),
+                "intent": body["data"].get("intent", "setup"),
+                "result": {},
+                "notes": [],
+            },
+            started_at=started_at,
+            completed_at=started_at + timedelta(seconds=self.config.command_duration_sec),
+        )
+        run.commands.append(command)
+        return command
+
+    async def _wait_for_command(self, request: httpx.Request, command: _Command) -> None:
+        if request.url.params.get("waitUntilComplete", "false").lower() != "true":
+            return
+        timeout_sec = int(request.url.params.get("timeout", "30000")) / 1000
+        remaining = (command.completed_at - _now()).total_seconds()
+        await asyncio.sleep(max(0.0, min(remaining, timeout_sec)))
+
+    async def _post_run_command(self, request: httpx.Request, params: dict[str, str]) -> tuple[int, Any]:
+        run = self.runs.get(params["run_id"])
+        if run is None:
+            return self._not_found("Run", params["run_id"])
+        command = self._enqueue_command(run, json.loads(request.content))
+        await self._wait_for_command(request, command)
+        return 201, {"data": command.render()}
+
+    async def _post_simple_command(self, request: httpx.Request, params: dict[str, str]) -> tuple[int, Any]:
+        command = self._enqueue_command(_Run(data={}), json.loads(request.content))
+        await self._wait_for_command(request, command)
+        return 201, {"data": command.render()}
+
+    async def _get_run_commands(self, request: httpx.Request, params: dict[str, str]) -> tuple[int, Any]:
+        run = self.runs.get(params["run_id"])
+        if run is None:
+            return self._not_found("Run", params["run_id"])
+        total = len(run.commands)
+        page_length = int(request.url.params.get("pageLength", "20"))
+        cursor_param = request.url.params.get("cursor")
+        # like the robot server, no cursor means the page ending at the most recent command
+        cursor = int(cursor_param) if cursor_param is not None else max(0, total - page_length)
+        page = [command.render() for command in run.commands[cursor : cursor + page_length]]
+        links: dict[str, Any] = {}
+        if run.commands:
+            last = run.commands[-1].render()
+            links["current"] = {"href": f"/runs/{params['run_id']}/commands/{last['id']}", "meta": {"id": last["id"], "key": last["key"]}}
+        return 200, {"data": page, "links": links, "meta": {"cursor": cursor, "totalLength": total}}
+
+    async def _get_run_command(self, request: httpx.Request, params: dict[str, str]) -> tuple[int, Any]:
+        run = self.runs.get(params["run_id"])
+        if run is None:
+            return self._not_found("Run", params["run_id"])
+        for command in run.commands:
+            if command.data["id"] == params["command_id"]:
+                return 200, {"data": command.render()}
+        return self._not_found("Command", params["command_id"])
+
+    # ---- protocols and analyses ----
+
+    async def _post_protocol(self, request: httpx.Request, params: dict[str, str]) -> tuple[int, Any]:
+        content_type = request.headers["content-type"]
+        message = BytesParser(policy=default_email_policy).parsebytes(f"Content-Type: {content_type}\r\n\r\n".encode() + request.content)
+        files: list[dict[str, Any]] = []
+        fields: dict[str, Any] = {}
+        for part in message.iter_parts():
+            name = part.get_param("name", header="content-disposition")
+            filename = part.get_filename()
+            payload = part.get_payload(decode=True)
+            assert isinstance(payload, bytes)
+            if name == "files":
+                files.append({"name": filename or "upload", "role": "main", "size": len(payload)})
+            else:
+                fields[str(name)] = payload.decode()
+        created_at = _now()
+        analysis_id = _new_id()
+        protocol_id = _new_id()
+        protocol = _Protocol(
+            data={
+                "id": protocol_id,
+                "createdAt": _timestamp(created_at),
+                "protocolType": "json",
+                "protocolKind": fields.get("protocolKind", "standard"),
+                "robotType": "OT-3 Standard",
+                "metadata": {},
+                "files": files,
+                "key": fields.get("key"),
+            },
+            analyses=[
+                {
+                    "id": analysis_id,
+                    "status": "pending",
+                    "runTimeParameters": [],
+                    "commands": [_analysis_command(i, created_at) for i in range(self.config.analysis_command_count)],
+                    "errors": [],
+                    "labware": [],
+                    "pipettes": [],
+                    "modules": [],
+                    "liquids": [],
+                }
+            ],
+            analysis_ready_at=created_at + timedelta(seconds=self.config.analysis_duration_sec),
+        )
+        self.protocols[protocol_id] = protocol
+        return 201, {"data": protocol.render()}
+
+    async def _get_protocols(self, request: httpx.Request, params: dict[str, str]) -> tuple[int, Any]:
+        protocols = [protocol.render() for protocol in self.protocols.values()]
+        return 200, {"data": protocols, "meta": {"cursor": 0, "totalLength": len(protocols)}}
+
+    async def _get_protocol(self, request: httpx.Request, params: dict[str, str]) -> tuple[int, Any]:
+        protocol = self.protocols.get(params["protocol_id"])
+        if protocol is None:
+            return self._not_found("Protocol", params["protocol_id"])
+        return 200, {"data": protocol.render()}
+
+    async def _delete_protocol(self, request: httpx.Request, params: dict[str, str]) -> tuple[int, Any]:
+        if params["protocol_id"] not in self.protocols:
+            return self._not_found("Protocol", params["protocol_id"])
+        if any(run.data["protocolId"] == params["protocol_id"] for run in self.runs.values()):
+            return 409, {"errors": [{"id": "ProtocolUsedByRun", "detail": "Protocol is used by a run."}]}
+        del self.protocols[params["protocol_id"]]
+        return 200, {}
+
+    def _analysis(self, params: dict[str, str]) -> dict[str, Any] | None:
+        protocol = self.protocols.get(params["protocol_id"])
+        if protocol is None:
+            return None
+        protocol.render()
+        for analysis in protocol.analyses:
+            if analysis["id"] == params["analysis_id"]:
+                return analysis
+        return None
+
+    async def _get_analyses(self, request: httpx.Request, params: dict[str, str]) -> tuple[int, Any]:
+        protocol = self.protocols.get(params["protocol_id"])
+        if protocol is None:
+            return self._not_found("Protocol", params["protocol_id"])
+        protocol.render()
+        return 200, {"data": protocol.analyses, "meta": {"cursor": 0, "totalLength": len(protocol.analyses)}}
+
+    async def _get_analysis(self, request: httpx.Request, params: dict[str, str]) -> tuple[int, Any]:
+        analysis = self._analysis(params)
+        if analysis is None:
+            return self._not_found("Analysis", params["analysis_id"])
+        return 200, {"data": analysis}
+
+    async def _get_analysis_as_doc(self, request: httpx.Request, params: dict[str, str]) -> tuple[int, Any]:
+        analysis = self._analysis(params)
+        if analysis is None:
+            return self._not_found("Analysis", params["analysis_id"])
+        return 200, analysis
+
+    # ---- data files ----
+
+    async def _get_data_files(self, request: httpx.Request, params: dict[str, str]) -> tuple[int, Any]:
+        return 200, {"data": list(self.data_files.values()), "meta": {"cursor": 0, "totalLength": len(self.data_files)}}
+
+    async def _post_data_file(self, request: httpx.Request, params: dict[str, str]) -> tuple[int, Any]:
+        data_file = {"id": _new_id(), "name": "upload.csv", "createdAt": _timestamp(_now()), "source": "uploaded"}
+        self.data_files[data_file["id"]] = data_file
+        return 201, {"data": data_file}
+
+    async def _delete_data_file(self, request: httpx.Request, params: dict[str, str]) -> tuple[int, Any]:
+        if self.data_files.pop(params["data_file_id"], None) is None:
+            return self._not_found("DataFile", params["data_file_id"])
+        return 200, {}
+
+    # ---- hardware ----
+
+    async def _get_modules(self, request: httpx.Request, params: dict[str, str]) -> tuple[int, Any]:
+        return 200, {"data": self.modules, "meta": {"cursor": 0, "totalLength": len(self.modules)}}
+
+    async def _get_settings(self, request: httpx.Request, params: dict[str, str]) -> tuple[int, Any]:
+        return 200, {"settings": [{"id": key, "value": value} for key, value in self.settings.items()], "links": {}}
+
+    async def _post_setting(self, request: httpx.Request, params: dict[str, str]) -> tuple[int, Any]:
+        body = json.loads(request.content)
+        self.settings[body["id"]] = body["value"]
+        return 200, {"settings": [{"id": key, "value": value} for key, value in self.settings.items()], "links": {}}
+
+    async def _post_setting_reset(self, request: httpx.Request, params: dict[str, str]) -> tuple[int, Any]:
+        body = json.loads(request.content)
+        if body.get("runsHistory"):
+            self.runs.clear()
+            self.current_run_id = None
+        return 200, {"message": "Options have been reset", "links": {}}
+
+    async def _get_pipettes(self, request: httpx.Request, params: dict[str, str]) -> tuple[int, Any]:
+        return 200, {"data": [{"id": "fake-pipette", "name": "p1000_single_flex", "mount": "left"}]}
+
+    async def _get_instruments(self, request: httpx.Request, params: dict[str, str]) -> tuple[int, Any]:
+        return 200, {"data": [{"mount": "left", "instrumentType": "pipette", "instrumentModel": "p1000_single_v3.5", "serialNumber": "P1KSV35FAKE"}]}
+
+    async def _get_calibration_status(self, request: httpx.Request, params: dict[str, str]) -> tuple[int, Any]:
+        return 200, {"deckCalibration": {"status": "OK"}, "instrumentCalibration": {}}
@@ -4,14 +4,24 @@
 # wait for run to finish
 # repeat
 
+import argparse
 import asyncio
-from dataclasses import dataclass
+import contextlib
+import math
 from pathlib import Path
 
-import pandas
+import httpx
+from clients.pool import PoolLimits
+from clients.resilience import NO_RETRY
 from clients.robot_client import RobotClient
 from clients.robot_interactions import RobotInteractions
-from httpx import Response
+from clients.uploads import Upload, UploadSource
+from fake_robot.fake_robot import FakeRobot, FakeRobotConfig, LogNormal
+from freeze.base_cli import BaseCli
+from perf.histogram import LatencyRecorder
+from perf.results import ResultSet
+from perf.tracing import tracer
+from perf.load import ENDPOINTS, BackgroundLoad, EndpointLoad, PhaseResult, Scenario, analyze_protocol, ramp_phases, run_scenario
 from rich.console import Console
 from rich.panel import Panel
 from rich.theme import Theme
@@ -19,58 +29,55 @@ from util.util import log_response
 from wizard.wizard import Wizard
 
 
-@dataclass
-class Timing:
-    endpoint: str
-    verb: str
-    elapsed: float
+# Size the pool well above the fan out below so queueing in the client never shows up as server latency.
+LIMITS = PoolLimits(max_connections=50, max_keepalive_connections=50, keepalive_expiry=30.0)
 
 
-async def stuff(robot_ip: str, robot_port: str) -> None:
+async def stuff(
+    robot_ip: str,
+    robot_port: str,
+    transport: httpx.AsyncBaseTransport | None = None,
+    output: Path | None = None,
+    protocol: Path | bytes = Path("loooong.json"),
+) -> None:
     """Do some stuff with the API client or whatever."""
-    async with RobotClient.make(host=f"http://{robot_ip}", port=robot_port, version="*") as robot_client:
+    async with RobotClient.make(
+        host=f"http://{robot_ip}", port=robot_port, version="*", limits=LIMITS, transport=transport
+    ) as robot_client:
         baseline = False
         robot_interactions = RobotInteractions(robot_client=robot_client)
-        responses: list[Response] = []
+        recorder = LatencyRecorder(name="stress")
 
-        async def stressor() -> tuple[Response, Response]:
-            tasks = await asyncio.gather(robot_client.get_health(), robot_client.get_protocols())
+        async def stressor() -> None:
+            for response in await asyncio.gather(robot_client.get_health(), robot_client.get_protocols()):
+                recorder.record_response(response)
+                await log_response(response)
             await asyncio.sleep(5)
-            return tasks
 
         if not baseline:
             enn = 5
-            protocols = []
-            for _ in range(enn):
-                protocols.append(robot_client.post_protocol([Path("loooong.json")]))
             console.print(Panel(f"Analyze N = {enn}", style="bold dodger_blue1"))
-            posts = await asyncio.gather(*protocols)
+            if isinstance(protocol, bytes):
+                posts = await asyncio.gather(*[robot_client.post_protocol(protocol) for _ in range(enn)])
+            else:
+                # read the protocol once and stream the same bytes to every upload
+                with UploadSource.from_path(protocol) as source:
+                    posts = await asyncio.gather(*[robot_client.post_protocol([source]) for _ in range(enn)])
             for p in posts:
                 await log_response(p)
             while not await robot_interactions.all_analyses_are_complete():
-                responses.extend(await stressor())
+                await stressor()
         else:
             console.print(Panel("Baseline", style="bold dodger_blue1"))
             for _ in range(10):
-                responses.extend(await stressor())
-        # run the tasks
-        timings: list[Timing] = []
-        for resp in responses:
-            timings.append(Timing(endpoint=str(resp.url), verb=resp.request.method, elapsed=resp.elapsed.total_seconds()))
-            await log_response(resp)
-        df = pandas.DataFrame(timings)
-        # console.print(df)
-        console.print(Panel("Endpoints", style="bold dodger_blue1"))
-        endpoints = set(df["endpoint"].values)
-        console.print(endpoints)
-        for route in endpoints:
-            console.print(Panel(route, style="bold yellow"))
-            filtered_df = df[df["endpoint"] == route]
-            # console.print(filtered_df)
-            console.print(
-                filtered_df.describe(),
-                style="bold magenta",
-            )
+                await stressor()
+        recorder.stop()
+        console.print(recorder.table(title="Endpoints"))
+        if output is not None:
+            result_set = ResultSet(name=output.stem, phases={"stress": recorder})
+            result_set.set_robot((await robot_client.get_health()).json())
+            save_results(result_set, output)
+        print_client_stats(robot_client)
         # # create many tasks
         # tasks = [task_coro(i) for i in range(10)]
         # # run the tasks
@@ -93,11 +100,121 @@ async def stuff(robot_ip: str, robot_port: str) -> None:
         # # await robot_interactions.wait_until_run_status(run_id=run_id, expected_status="succeeded", timeout_sec=180, polling_interval_sec=3)
 
 
+def save_results(result_set: ResultSet, output: Path) -> None:
+    """Save a result set for python -m perf.compare."""
+    for path in result_set.save(output):
+        console.print(f"Results written to {path}")
+
+
+def print_load_results(results: list[PhaseResult]) -> None:
+    for result in results:
+        console.print(result.latency.table(title=f"{result.phase}: latency from scheduled send"))
+        console.print(result.service.table(title=f"{result.phase}: service time from actual send"))
+        if result.missed:
+            console.print(f"Missed arrivals (in-flight cap reached): {dict(result.missed)}", style="bold red")
+
+
+async def load(
+    robot_ip: str, robot_port: str, scenario: Scenario, transport: httpx.AsyncBaseTransport | None = None, output: Path | None = None
+) -> None:
+    """Run an open-loop scenario and print per phase results."""
+    async with RobotClient.make(
+        host=f"http://{robot_ip}", port=robot_port, version="*", limits=LIMITS, transport=transport, resilience=NO_RETRY
+    ) as robot_client:
+        phases = ", ".join(f"{phase.name} {phase.duration_sec}s" for phase in scenario.phases)
+        console.print(Panel(f"Scenario {scenario.name}: {phases}", style="bold dodger_blue1"))
+        results = await run_scenario(robot_client, scenario)
+        print_load_results(results)
+        if output is not None:
+            # latency from the scheduled send is what a client sees, so that is what gets compared
+            result_set = ResultSet(name=output.stem, phases={result.phase: result.latency for result in results})
+            result_set.set_robot((await robot_client.get_health()).json())
+            save_results(result_set, output)
+        print_client_stats(robot_client)
+
+
+def print_client_stats(robot_client: RobotClient) -> None:
+    console.print(Panel("Client connection pool", style="bold dodger_blue1"))
+    if robot_client.pool_stats is not None:
+        console.print(robot_client.pool_stats.snapshot())
+    resilience = robot_client.resilience_stats
+    if resilience is not None and (resilience.retries or resilience.short_circuited or resilience.budget_exceeded):
+        console.print(Panel("Retries, budgets and circuit breaker", style="bold dodger_blue1"))
+        console.print(resilience.snapshot())
+    if robot_client.request_timings.routes:
+        console.print(robot_client.request_timings.table())
+    if robot_client.upload_stats.uploads:
+        console.print(Panel("Uploads", style="bold dodger_blue1"))
+        console.print(robot_client.upload_stats.snapshot())
+
+
+def parse_rate(rate: str) -> EndpointLoad:
+    """Parse ENDPOINT=RPS like 'GET /runs=20', the argparse type of --rate."""
+    endpoint, _, rps = rate.rpartition("=")
+    if endpoint not in ENDPOINTS:
+        raise argparse.ArgumentTypeError(f"unknown endpoint {endpoint!r}, choose from {sorted(ENDPOINTS)}")
+    try:
+        rate_per_sec = float(rps)
+    except ValueError:
+        rate_per_sec = math.nan
+    if not math.isfinite(rate_per_sec) or rate_per_sec <= 0:
+        raise argparse.ArgumentTypeError(f"{rps!r} in {rate!r} is not a positive number of requests per second")
+    return EndpointLoad(name=endpoint, rate_per_sec=rate_per_sec, call=ENDPOINTS[endpoint])
+
+
 if __name__ == "__main__":
     custom_theme = Theme({"info": "dim cyan", "warning": "magenta", "danger": "bold red"})
     console = Console(theme=custom_theme)
-    wizard = Wizard(console)
-    robot_ip = wizard.validate_ip()
-    robot_port = wizard.validate_port(31950)
-    wizard.reset_log(override=True)
-    asyncio.run(stuff(robot_ip=robot_ip, robot_port=robot_port))
+    cli = BaseCli()
+    cli.parser.description = """
+stress: the original closed loop, analyze 5 protocols while polling /health and /protocols.
+load: open-loop traffic at fixed rates with ramp-up, steady and ramp-down phases, for example
+    --mode load --rate "GET /runs=20" --rate "GET /health=5" --analyses 5
+"""
+    cli.parser.add_argument("--mode", choices=["stress", "load"], default="stress")
+    cli.parser.add_argument(
+        "--rate", action="append", type=parse_rate, default=[], metavar="ENDPOINT=RPS", help=f"repeatable, endpoints: {sorted(ENDPOINTS)}"
+    )
+    cli.parser.add_argument("--analyses", type=int, default=0, help="protocol analyses kept in flight during load mode")
+    cli.parser.add_argument("--protocol", type=Path, default=Path("loooong.json"), help="protocol file analyzed")
+    cli.parser.add_argument("--ramp_up", type=float, default=10.0)
+    cli.parser.add_argument("--steady", type=float, default=60.0)
+    cli.parser.add_argument("--ramp_down", type=float, default=10.0)
+    cli.parser.add_argument("--fake", action="store_true", help="run against an in-process fake robot instead of a real one")
+    cli.parser.add_argument("--output", type=Path, help="save a result set for perf.compare, like results/8.8.0.json")
+    cli.parser.add_argument("--trace", type=Path, help="record spans and write a Chrome/Perfetto trace, like results/trace.json")
+    args = cli.parser.parse_args()
+    if args.trace:
+        tracer.enabled = True
+    transport: httpx.AsyncBaseTransport | None = None
+    if args.fake:
+        robot_ip, robot_port = "fake", "31950"
+        transport = FakeRobot(FakeRobotConfig(default_latency=LogNormal(median_sec=0.02), analysis_duration_sec=5.0))
+    else:
+        wizard = Wizard(console)
+        robot_ip = wizard.validate_ip(args.robot_ip)
+        robot_port = wizard.validate_port(args.robot_port)
+        wizard.reset_log(override=True)
+    if args.mode == "stress":
+        stress_protocol: Path | bytes = b"{}" if args.fake and not args.protocol.exists() else args.protocol
+        asyncio.run(stuff(robot_ip=robot_ip, robot_port=robot_port, transport=transport, output=args.output, protocol=stress_protocol))
+    else:
+        with contextlib.ExitStack() as stack:
+            background = []
+            if args.analyses:
+                # background analyses upload the protocol over and over, read it once up front
+                protocol: Upload | bytes = (
+                    b"{}" if args.fake and not args.protocol.exists() else stack.enter_context(UploadSource.from_path(args.protocol))
+                )
+                background.append(BackgroundLoad("analysis", args.analyses, lambda client: analyze_protocol(client, protocol)))
+            scenario = Scenario(
+                name="cli",
+                phases=ramp_phases(args.ramp_up, args.steady, args.ramp_down),
+                endpoints=args.rate or [parse_rate("GET /runs=20")],
+                background=background,
+            )
+            asyncio.run(load(robot_ip=robot_ip, robot_port=robot_port, scenario=scenario, transport=transport, output=args.output))
+    if args.trace:
+        console.print(tracer.table())
+        tracer.export_chrome_trace(args.trace)
+        console.print(f"Trace written to {args.trace}, open it in https://ui.perfetto.dev")
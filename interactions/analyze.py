@@ -3,10 +3,12 @@ import json
 import time
 from pathlib import Path
 
+from clients.protocol_cache import ProtocolCache
 from clients.robot_client import RobotClient
 from clients.robot_interactions import RobotInteractions
 from rich.console import Console
 from rich.theme import Theme
+from util.json_body import extract, loads
 from util.util import log_response
 from wizard.wizard import Wizard
 
@@ -23,6 +25,8 @@ RESULT_ANALYSIS_FILE = f"ProtocolName-full-analysis-{str(int(time.time()))}.json
 
 # Dry run flag
 GO = True
+# Reuse the protocol and its analysis if the robot already has it with the same files and parameters
+USE_CACHE = True
 
 
 async def analyze() -> None:
@@ -43,18 +47,30 @@ async def analyze() -> None:
         if GO:
             # upload the csv file
             upload = await robot_client.post_data_file([path_to_csv])
-            data_file_id = upload.json()["data"]["id"]
+            data_file_id = extract(upload, "data", "id")
 
             # upload the protocol file
             csv_arg = {VARIABLE_NAME_OF_DATA_FILE_IN_THE_PROTOCOL: data_file_id}
-            protocol_upload = await robot_client.post_protocol(
-                files=[path_to_protocol], run_time_parameter_values={}, run_time_parameter_files=csv_arg
-            )
-            await log_response(protocol_upload, print_timing=True, console=console)
-            protocol_id = protocol_upload.json()["data"]["id"]
+            # the cache key includes the data file id, so the protocol is reused when the robot
+            # hands back the same id for a CSV it already has
+            if USE_CACHE:
+                protocol_cache = ProtocolCache(robot_client)
+                cached = await protocol_cache.post_protocol(
+                    files=[path_to_protocol], run_time_parameter_values={}, run_time_parameter_files=csv_arg
+                )
+                await log_response(cached.response, print_timing=True, console=console)
+                console.print(f"Protocol {cached.protocol_id} {'reused' if cached.hit else 'uploaded'}")
+                protocol_data = cached.data
+            else:
+                protocol_upload = await robot_client.post_protocol(
+                    files=[path_to_protocol], run_time_parameter_values={}, run_time_parameter_files=csv_arg
+                )
+                await log_response(protocol_upload, print_timing=True, console=console)
+                protocol_data = extract(protocol_upload, "data")
+            protocol_id = protocol_data["id"]
 
             # understand the analyses
-            analyses_summaries = protocol_upload.json()["data"]["analysisSummaries"]
+            analyses_summaries = protocol_data["analysisSummaries"]
             analysis_id = ""
             for analysis_summary in analyses_summaries:
                 if analysis_summary["status"] == "pending":
@@ -75,13 +91,13 @@ async def analyze() -> None:
             # get the analysis
             analysis_response = await robot_client.get_analysis(protocol_id, analysis_id)
             await log_response(analysis_response, print_timing=True, console=console)
-            analysis = analysis_response.json()["data"]
+            # a copy, the decoded body is shared and the fields below are replaced
+            analysis = dict(extract(analysis_response, "data"))
 
             # read the app analysis file
             try:
-                with open(path_to_app_analysis, "r") as f:
-                    app_analysis = json.load(f)
-            except json.JSONDecodeError as e:
+                app_analysis = loads(path_to_app_analysis.read_bytes())
+            except ValueError as e:
                 print(f"Error decoding JSON: {e}")
 
             analysis["createdAt"] = app_analysis["createdAt"]
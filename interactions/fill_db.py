@@ -7,6 +7,7 @@
 import asyncio
 from pathlib import Path
 
+from clients.protocol_cache import ProtocolCache
 from clients.robot_client import RobotClient
 from clients.robot_interactions import RobotInteractions
 from rich.console import Console
@@ -19,12 +20,12 @@ async def stuff(robot_ip: str, robot_port: str) -> None:
     """Do some stuff with the API client or whatever."""
     async with RobotClient.make(host=f"http://{robot_ip}", port=robot_port, version="*") as robot_client:
         robot_interactions: RobotInteractions = RobotInteractions(robot_client=robot_client)
-        post_protocol = await robot_client.post_protocol([Path("basic.json")])
-        await log_response(post_protocol, True, console)
-        console.print(post_protocol.text)
-        protocol_id = post_protocol.json()["data"]["id"]
-        post_protocol.json()["data"]["analysisSummaries"][0]["id"]
-        console.print(protocol_id)
+        # basic.json never changes, reuse the copy an earlier fill already uploaded and analyzed
+        protocol_cache = ProtocolCache(robot_client)
+        protocol = await protocol_cache.post_protocol([Path("basic.json")])
+        await log_response(protocol.response, True, console)
+        protocol_id = protocol.protocol_id
+        console.print(f"{protocol_id} {'reused' if protocol.hit else 'uploaded'}")
         await robot_interactions.wait_for_all_analyses_to_complete()
         # analysis_resp = await robot_client.get_analysis(protocol_id=protocol_id, analysis_id=analysis_id)
         # await log_response(analysis_resp)
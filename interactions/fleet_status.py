@@ -0,0 +1,58 @@
+import asyncio
+import time
+
+from clients.fleet import Fleet, Robot
+from fake_robot.fake_robot import FakeRobot, FakeRobotConfig, LogNormal
+from freeze.base_cli import BaseCli
+from perf.load import ENDPOINTS
+from rich.console import Console
+from rich.theme import Theme
+from robot_discovery.robots import DeviceRegistry, MyListener
+from zeroconf import ServiceBrowser, Zeroconf
+
+
+def discover(seconds: float) -> list[Robot]:
+    """Browse mDNS for seconds and return every robot that resolved to an ip."""
+    registry = DeviceRegistry()
+    zeroconf = Zeroconf()
+    try:
+        ServiceBrowser(zeroconf, "_http._tcp.local.", MyListener(registry))
+        time.sleep(seconds)
+    finally:
+        zeroconf.close()
+    return [Robot(name=device.instance, host=device.ip) for device in registry.snapshot() if "unresolved" not in device.ip]
+
+
+async def status(robots: list[Robot], endpoint: str, concurrency: int, timeout_sec: float, fake: bool) -> None:
+    """Call endpoint on every robot and print each result as it lands, then a table of all of them."""
+    transport_factory = (lambda robot: FakeRobot(FakeRobotConfig(default_latency=LogNormal(median_sec=0.05)))) if fake else None
+    async with Fleet.make(robots, concurrency=concurrency, timeout_sec=timeout_sec, transport_factory=transport_factory) as fleet:
+        report = await fleet.run(ENDPOINTS[endpoint], console=console)
+    console.print(report.table(title=endpoint))
+
+
+if __name__ == "__main__":
+    custom_theme = Theme({"info": "dim cyan", "warning": "magenta", "danger": "bold red"})
+    console = Console(theme=custom_theme)
+    cli = BaseCli()
+    cli.parser.description = """
+Call one endpoint on many robots at once, for example
+    --robot 192.168.50.89 --robot bay-2=192.168.50.90:31950 --endpoint "GET /runs"
+    --discover 5
+--robot_ip is added to the --robot list.
+"""
+    cli.parser.add_argument("--robot", action="append", default=[], metavar="[NAME=]HOST[:PORT]", help="repeatable")
+    cli.parser.add_argument("--discover", type=float, default=0.0, metavar="SECONDS", help="also add robots found over mDNS")
+    cli.parser.add_argument("--endpoint", choices=sorted(ENDPOINTS), default="GET /health")
+    cli.parser.add_argument("--concurrency", type=int, default=16)
+    cli.parser.add_argument("--timeout", type=float, default=10.0, help="seconds each robot gets")
+    cli.parser.add_argument("--fake", action="store_true", help="answer every robot from an in-process fake robot")
+    args = cli.parser.parse_args()
+    robots = [Robot.parse(spec) for spec in args.robot]
+    if args.robot_ip:
+        robots.append(Robot(name=args.robot_ip, host=args.robot_ip, port=args.robot_port))
+    if args.discover:
+        robots.extend(discover(args.discover))
+    if not robots:
+        cli.parser.error("no robots, pass --robot, --robot_ip or --discover")
+    asyncio.run(status(robots, args.endpoint, args.concurrency, args.timeout, args.fake))
@@ -1,40 +1,32 @@
 import asyncio
 import json
 import textwrap
+from pathlib import Path
 
 from clients.robot_client import RobotClient
-from clients.robot_interactions import RobotInteractions
+from offset_mirror.offset_mirror import OffsetMirror
 from rich.console import Console
 from rich.markdown import Markdown
 from rich.panel import Panel
 from rich.theme import Theme
-from util.util import log_response
 from wizard.wizard import Wizard
 
+MIRROR_PATH = Path("offsets.sqlite")
 
-async def stuff(robot_ip: str, robot_port: str) -> None:
-    """Retrieve format and output the labwareOffsets from runs."""
-    async with RobotClient.make(host=f"http://{robot_ip}", port=robot_port, version="*") as robot_client:
-        RobotInteractions(robot_client=robot_client)
-        resp = await robot_client.get_runs()
-        await log_response(response=resp)
-        runs = resp.json()["data"]
 
-        # The list comprehension for the below overwhelmed me.
-        # It is more readable in two parts.
-        # get all the lists of labware offsets
-        # must have empty [] check
-        labware_offsets_groups = [run["labwareOffsets"] for run in runs if run["labwareOffsets"] != []]
-        offsets = []
-        # make a list of just the offset objects
-        for group in labware_offsets_groups:
-            for offset in group:
-                # empty check but I don't think these are ever []
-                if offset != []:
-                    offsets.append(offset)
-        console.print(offsets)
-        with open("offsets.json", "w") as outfile:
-            json.dump(offsets, outfile)
+async def stuff(robot_ip: str, robot_port: str) -> None:
+    """Sync the offset mirror with the robot's runs then output the labwareOffsets from them."""
+    mirror = OffsetMirror(MIRROR_PATH)
+    try:
+        async with RobotClient.make(host=f"http://{robot_ip}", port=robot_port, version="*") as robot_client:
+            summary = await mirror.sync(robot_client, robot=robot_ip)
+        console.print(summary.describe())
+        offsets = mirror.find_offsets(robot=robot_ip)
+    finally:
+        mirror.close()
+    console.print(offsets)
+    with open("offsets.json", "w") as outfile:
+        json.dump(offsets, outfile)
 
 
 if __name__ == "__main__":
@@ -47,7 +39,8 @@ if __name__ == "__main__":
 
         > Notes:
         - No filtering is done on the runs.
-        - Look in responses.log for the full /runs response
+        - Runs are mirrored into offsets.sqlite, only runs not seen before are downloaded.
+        - Query offsets.sqlite with offset_mirror.OffsetMirror.find_offsets, it holds every robot synced from this directory.
         """
     )
     console.print(
@@ -57,8 +57,8 @@ async def hs_commands(robot_ip: str, robot_port: str) -> None:
             console.print(command)
             await robot_interactions.execute_simple_command(req_body=command, print_timing=True)
             if command["data"]["commandType"] in ["heaterShaker/deactivateHeater"]:
-                console.print(Panel("Wait 3 seconds to see if deactivate works.", style="bold blue"))
-                await asyncio.sleep(3)
+                console.print(Panel("Waiting for the heater to report idle.", style="bold blue"))
+                await robot_interactions.wait_until_module_data(hs_id, lambda data: data["data"]["temperatureStatus"] == "idle")
             hs_module_data = await robot_interactions.get_module_data_by_id(hs_id)
             console.print("Module data after the command completes")
             console.print(hs_module_data)
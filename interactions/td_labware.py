@@ -8,6 +8,7 @@ from rich.console import Console
 from rich.panel import Panel
 from rich.prompt import Confirm, IntPrompt, Prompt
 from rich.theme import Theme
+from util.json_body import body
 from util.util import prompt
 from wizard.wizard import Wizard
 
@@ -31,7 +32,7 @@ async def app() -> None:
             console.print("Let us make sure your robot is reachable.")
             health = await robot_client.get_health()
             console.print(f"Robot is reachable. Here is the {health.request.url} response")
-            console.print(health.json())
+            console.print(body(health))
             console.print(
                 Panel(
                     "Now we will see what pipettes are attached.",
@@ -40,8 +41,8 @@ async def app() -> None:
             )
             ri = RobotInteractions(robot_client=robot_client)
             pipettes = await robot_client.get_pipettes()
-            console.print(pipettes.json())
-            pipettes_json = pipettes.json()
+            pipettes_json = body(pipettes)
+            console.print(pipettes_json)
             choices = []
             if not ((pipettes_json["left"]["name"] is None) or (pipettes_json["left"]["name"] == "none")):
                 choices.append(pipettes_json["left"]["name"])
@@ -40,7 +40,8 @@ async def main(robot_ip: str, robot_port: str) -> None:
 
         run_id = await robot_interactions.force_create_new_run()
 
-        commands_to_run = [
+        # nothing to watch during setup, send it all at once
+        setup_commands = [
             commands.load_labware_command(
                 deck_slot_name=TIP_RACK_SLOT,
                 load_name=TIP_RACK,
@@ -50,6 +51,10 @@ async def main(robot_ip: str, robot_port: str) -> None:
             ),
             commands.load_pipette_command(pipette_name=PIPETTE, mount=MOUNT, pipette_id="pipette"),
             commands.home_command(),
+        ]
+        await robot_interactions.execute_commands(run_id=run_id, req_bodies=setup_commands, print_timing=True)
+
+        commands_to_run = [
             commands.move_to_coordinates_command(
                 pipette_id="pipette",
                 x=CROSS_X,
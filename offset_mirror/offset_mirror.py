@@ -0,0 +1,205 @@
+"""A local SQLite mirror of runs and their labware offsets, across any number of robots.
+
+sync() only downloads runs the mirror has not seen: GET /runs?pageLength=N returns the newest N runs,
+so it asks for a small page and grows it until the page reaches a run already mirrored. Runs that were
+not finished at the last sync are fetched again, they can still gain offsets. Runs deleted from the
+robot stay in the mirror.
+
+    mirror = OffsetMirror(Path("offsets.sqlite"))
+    await mirror.sync(robot_client, robot="192.168.50.89")
+    mirror.find_offsets(definition_uri="opentrons/opentrons_96_tiprack_300ul/1", slot_name="5")
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import httpx
+from clients.robot_client import RobotClient
+from util.json_body import body, extract
+
+TERMINAL_RUN_STATUSES = frozenset(["stopped", "succeeded", "failed"])
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    robot TEXT NOT NULL,
+    run_id TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    status TEXT,
+    current INTEGER NOT NULL,
+    protocol_id TEXT,
+    PRIMARY KEY (robot, run_id)
+);
+CREATE INDEX IF NOT EXISTS runs_unfinished ON runs (robot, status);
+CREATE TABLE IF NOT EXISTS offsets (
+    robot TEXT NOT NULL,
+    offset_id TEXT NOT NULL,
+    run_id TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    definition_uri TEXT NOT NULL,
+    slot_name TEXT,
+    module_model TEXT,
+    location_definition_uri TEXT,
+    x REAL NOT NULL,
+    y REAL NOT NULL,
+    z REAL NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (robot, offset_id)
+);
+CREATE INDEX IF NOT EXISTS offsets_definition ON offsets (definition_uri, created_at);
+CREATE INDEX IF NOT EXISTS offsets_location ON offsets (slot_name, module_model, location_definition_uri);
+CREATE INDEX IF NOT EXISTS offsets_vector ON offsets (x, y, z);
+"""
+
+
+@dataclass
+class SyncSummary:
+    robot: str
+    new_runs: int = 0
+    refreshed_runs: int = 0
+    new_offsets: int = 0
+    requests: int = 0
+    elapsed_sec: float = 0.0
+
+    def describe(self) -> str:
+        return (
+            f"{self.robot}: {self.new_runs} new runs, {self.refreshed_runs} refreshed, {self.new_offsets} new offsets "
+            f"in {self.requests} requests, {self.elapsed_sec:.2f}s"
+        )
+
+
+class OffsetMirror:
+    """Runs and labware offsets from many robots in one SQLite file, keyed by a robot name of your choosing."""
+
+    def __init__(self, path: Path | str = ":memory:") -> None:
+        self.connection = sqlite3.connect(path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def known_runs(self, robot: str) -> set[str]:
+        return {row["run_id"] for row in self.connection.execute("SELECT run_id FROM runs WHERE robot = ?", (robot,))}
+
+    def _unfinished_runs(self, robot: str) -> set[str]:
+        placeholders = ",".join("?" * len(TERMINAL_RUN_STATUSES))
+        rows = self.connection.execute(
+            f"SELECT run_id FROM runs WHERE robot = ? AND (current = 1 OR status IS NULL OR status NOT IN ({placeholders}))",
+            (robot, *TERMINAL_RUN_STATUSES),
+        )
+        return {row["run_id"] for row in rows}
+
+    async def sync(self, robot_client: RobotClient, robot: str, initial_page_length: int = 20) -> SyncSummary:
+        """Bring the mirror of robot up to date, downloading only runs it has not seen or that were unfinished."""
+        summary = SyncSummary(robot=robot)
+        start = time.perf_counter()
+        known = self.known_runs(robot)
+        unfinished = self._unfinished_runs(robot)
+        page_length = initial_page_length
+        while True:
+            response = await robot_client.get_runs(page_length=page_length)
+            summary.requests += 1
+            page_body = body(response)
+            runs: list[dict[str, Any]] = page_body["data"]
+            # the page reaches back to a run we already have, or it is every run on the robot
+            if not runs or runs[0]["id"] in known or len(runs) >= page_body["meta"]["totalLength"]:
+                break
+            page_length *= 4
+        fetched = {run["id"] for run in runs}
+        for run_id in unfinished - fetched:
+            summary.requests += 1
+            try:
+                runs.append(extract(await robot_client.get_run(run_id), "data"))
+            except httpx.HTTPStatusError as e:
+                # deleted from the robot, keep what the mirror has
+                if e.response.status_code != 404:
+                    raise
+        to_store = [run for run in runs if run["id"] not in known or run["id"] in unfinished]
+        summary.new_runs = sum(1 for run in to_store if run["id"] not in known)
+        summary.refreshed_runs = len(to_store) - summary.new_runs
+        summary.new_offsets = self._store(robot, to_store)
+        summary.elapsed_sec = time.perf_counter() - start
+        return summary
+
+    def _store(self, robot: str, runs: list[dict[str, Any]]) -> int:
+        """Upsert runs and insert their offsets in one transaction, returning how many offsets were new."""
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO runs (robot, run_id, created_at, status, current, protocol_id) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (robot, run["id"], run["createdAt"], run.get("status"), int(bool(run.get("current"))), run.get("protocolId"))
+                    for run in runs
+                ],
+            )
+            before = self.connection.total_changes
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO offsets (robot, offset_id, run_id, created_at, definition_uri, slot_name, module_model, "
+                "location_definition_uri, x, y, z, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        robot,
+                        offset["id"],
+                        run["id"],
+                        offset["createdAt"],
+                        offset["definitionUri"],
+                        offset["location"].get("slotName"),
+                        offset["location"].get("moduleModel"),
+                        offset["location"].get("definitionUri"),
+                        offset["vector"]["x"],
+                        offset["vector"]["y"],
+                        offset["vector"]["z"],
+                        json.dumps(offset),
+                    )
+                    for run in runs
+                    for offset in run.get("labwareOffsets", [])
+                ],
+            )
+            return self.connection.total_changes - before
+
+    def find_offsets(
+        self,
+        robot: str | None = None,
+        definition_uri: str | None = None,
+        slot_name: str | None = None,
+        module_model: str | None = None,
+        near: tuple[float, float, float] | None = None,
+        tolerance_mm: float = 0.1,
+        limit: int | None = None,
+    ) -> list[dict[str, Any]]:
+        """Offsets matching every criterion given, newest first.
+
+        near matches vectors within tolerance_mm of (x, y, z) on every axis.
+        Each offset is the robot's JSON plus the robot and runId it came from.
+        """
+        clauses: list[str] = []
+        args: list[Any] = []
+        for column, value in [
+            ("robot", robot),
+            ("definition_uri", definition_uri),
+            ("slot_name", slot_name),
+            ("module_model", module_model),
+        ]:
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                args.append(value)
+        if near is not None:
+            for axis, coordinate in zip("xyz", near, strict=True):
+                clauses.append(f"{axis} BETWEEN ? AND ?")
+                args.extend([coordinate - tolerance_mm, coordinate + tolerance_mm])
+        query = "SELECT robot, run_id, data FROM offsets"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY created_at DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            args.append(limit)
+        return [{**json.loads(row["data"]), "robot": row["robot"], "runId": row["run_id"]} for row in self.connection.execute(query, args)]
+
+    def robots(self) -> list[str]:
+        return [row["robot"] for row in self.connection.execute("SELECT DISTINCT robot FROM runs ORDER BY robot")]
@@ -0,0 +1,212 @@
+"""Compare saved OT3_perf result sets and fail on regressions.
+
+    python -m perf.compare results/8.7.0.json results/8.8.0.json --threshold 10
+
+The first result set is the baseline, every later one is compared against it endpoint by endpoint
+within each phase. An endpoint regresses when its latency percentile grows by more than threshold
+percent and the change is significant (two sided Mann-Whitney U on the recorded histograms), when
+its throughput drops by more than threshold percent, or when its error rate grows by more than
+max_error_rate_increase. The exit code is 1 if anything regressed, so release qualification can
+gate on it.
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from freeze.base_cli import Formatter
+from perf.histogram import EndpointLatency, LatencyHistogram, LatencyRecorder
+from perf.results import ResultSet
+from rich.console import Console
+from rich.table import Table
+
+
+def mann_whitney_p(first: LatencyHistogram, second: LatencyHistogram) -> float:
+    """Two sided p-value that first and second come from the same distribution.
+
+    Samples sharing a bucket are treated as ties, so differences below the histogram
+    precision are never significant. Uses the normal approximation with tie correction,
+    which is sound for the sample counts a benchmark phase produces.
+    """
+    if not first.same_layout(second):
+        raise ValueError("Histograms with different bucket layouts cannot be compared")
+    n1, n2 = first.count, second.count
+    n = n1 + n2
+    if n1 == 0 or n2 == 0:
+        return 1.0
+    rank_sum = 0.0
+    ties = 0.0
+    below = 0
+    for count1, count2 in zip(first.counts, second.counts, strict=True):
+        tied = count1 + count2
+        if tied == 0:
+            continue
+        # every sample in a bucket gets the mean of the ranks the bucket spans
+        rank_sum += count1 * (below + (tied + 1) / 2)
+        ties += tied**3 - tied
+        below += tied
+    u = rank_sum - n1 * (n1 + 1) / 2
+    variance = n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0
+    # continuity correction
+    z = max(0.0, abs(u - n1 * n2 / 2) - 0.5) / math.sqrt(variance)
+    return math.erfc(z / math.sqrt(2))
+
+
+def _change_pct(before: float, after: float) -> float:
+    if before == 0:
+        return 0.0 if after == 0 else math.inf
+    return (after - before) / before * 100
+
+
+@dataclass
+class EndpointComparison:
+    """Baseline against candidate for one endpoint in one phase."""
+
+    phase: str
+    endpoint: str
+    verb: str
+    percentile: float
+    baseline_latency_sec: float
+    candidate_latency_sec: float
+    baseline_throughput_per_sec: float
+    candidate_throughput_per_sec: float
+    baseline_error_rate: float
+    candidate_error_rate: float
+    p_value: float
+    regressions: list[str] = field(default_factory=list)
+
+    @property
+    def latency_change_pct(self) -> float:
+        return _change_pct(self.baseline_latency_sec, self.candidate_latency_sec)
+
+    @property
+    def throughput_change_pct(self) -> float:
+        return _change_pct(self.baseline_throughput_per_sec, self.candidate_throughput_per_sec)
+
+    @property
+    def regressed(self) -> bool:
+        return bool(self.regressions)
+
+
+def _throughput(recorder: LatencyRecorder, entry: EndpointLatency) -> float:
+    return entry.histogram.count / recorder.duration_sec if recorder.duration_sec else 0.0
+
+
+def compare(
+    baseline: ResultSet,
+    candidate: ResultSet,
+    threshold_pct: float = 10.0,
+    alpha: float = 0.05,
+    percentile: float = 99.0,
+    max_error_rate_increase: float = 0.01,
+) -> tuple[list[EndpointComparison], list[str]]:
+    """Compare every endpoint both result sets measured, returning the comparisons and notes on what only one side has."""
+    comparisons: list[EndpointComparison] = []
+    notes: list[str] = []
+    for phase in sorted(set(baseline.phases) | set(candidate.phases)):
+        if phase not in baseline.phases or phase not in candidate.phases:
+            notes.append(f"phase {phase} only in {baseline.name if phase in baseline.phases else candidate.name}")
+            continue
+        before_recorder, after_recorder = baseline.phases[phase], candidate.phases[phase]
+        for key in sorted(set(before_recorder.endpoints) | set(after_recorder.endpoints)):
+            if key not in before_recorder.endpoints or key not in after_recorder.endpoints:
+                side = baseline.name if key in before_recorder.endpoints else candidate.name
+                notes.append(f"{phase} {key[1]} {key[0]} only in {side}")
+                continue
+            before, after = before_recorder.endpoints[key], after_recorder.endpoints[key]
+            comparison = EndpointComparison(
+                phase=phase,
+                endpoint=before.endpoint,
+                verb=before.verb,
+                percentile=percentile,
+                baseline_latency_sec=before.histogram.percentile(percentile),
+                candidate_latency_sec=after.histogram.percentile(percentile),
+                baseline_throughput_per_sec=_throughput(before_recorder, before),
+                candidate_throughput_per_sec=_throughput(after_recorder, after),
+                baseline_error_rate=before.error_rate,
+                candidate_error_rate=after.error_rate,
+                p_value=mann_whitney_p(before.histogram, after.histogram),
+            )
+            if comparison.latency_change_pct > threshold_pct and comparison.p_value < alpha:
+                comparison.regressions.append(f"p{percentile:g} +{comparison.latency_change_pct:.1f}%")
+            if comparison.throughput_change_pct < -threshold_pct:
+                comparison.regressions.append(f"throughput {comparison.throughput_change_pct:.1f}%")
+            if comparison.candidate_error_rate - comparison.baseline_error_rate > max_error_rate_increase:
+                comparison.regressions.append(f"errors {comparison.candidate_error_rate * 100:.1f}%")
+            comparisons.append(comparison)
+    return comparisons, notes
+
+
+def comparison_table(baseline: ResultSet, candidate: ResultSet, comparisons: list[EndpointComparison]) -> Table:
+    table = Table(title=f"{candidate.describe()}\nvs {baseline.describe()}", expand=True)
+    percentile = f"p{comparisons[0].percentile:g}" if comparisons else "latency"
+    for header in [
+        "Phase",
+        "Endpoint",
+        "Verb",
+        f"{percentile} s",
+        f"{percentile} Δ%",
+        "p-value",
+        "Throughput /s",
+        "Throughput Δ%",
+        "Error %",
+        "Result",
+    ]:
+        table.add_column(header)
+    for comparison in comparisons:
+        table.add_row(
+            comparison.phase,
+            comparison.endpoint,
+            comparison.verb,
+            f"{comparison.baseline_latency_sec:.4f} → {comparison.candidate_latency_sec:.4f}",
+            f"{comparison.latency_change_pct:+.1f}",
+            f"{comparison.p_value:.3g}",
+            f"{comparison.baseline_throughput_per_sec:.1f} → {comparison.candidate_throughput_per_sec:.1f}",
+            f"{comparison.throughput_change_pct:+.1f}",
+            f"{comparison.baseline_error_rate * 100:.1f} → {comparison.candidate_error_rate * 100:.1f}",
+            "[bold red]" + ", ".join(comparison.regressions) if comparison.regressed else "[green]ok",
+        )
+    return table
+
+
+def main(argv: list[str] | None = None, console: Console | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=Formatter)
+    parser.add_argument("results", nargs="+", type=Path, help="result sets written by OT3_perf --output, baseline first")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent change that counts as a regression")
+    parser.add_argument("--alpha", type=float, default=0.05, help="significance level for latency changes")
+    parser.add_argument("--percentile", type=float, default=99.0, help="latency percentile to compare")
+    parser.add_argument("--max_error_rate_increase", type=float, default=0.01, help="as a fraction, 0.01 is one percentage point")
+    args = parser.parse_args(argv)
+    if len(args.results) < 2:
+        parser.error("need a baseline and at least one result set to compare against it")
+    console = console or Console()
+    baseline, *candidates = [ResultSet.load(path) for path in args.results]
+    regressed = False
+    for candidate in candidates:
+        comparisons, notes = compare(
+            baseline,
+            candidate,
+            threshold_pct=args.threshold,
+            alpha=args.alpha,
+            percentile=args.percentile,
+            max_error_rate_increase=args.max_error_rate_increase,
+        )
+        console.print(comparison_table(baseline, candidate, comparisons))
+        for note in notes:
+            console.print(note, style="magenta")
+        regressed = regressed or any(comparison.regressed for comparison in comparisons)
+    if regressed:
+        console.print("Regressions found", style="bold red")
+        return 1
+    console.print("No regressions", style="bold green")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
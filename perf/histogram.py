@@ -0,0 +1,261 @@
+"""Fixed memory latency histograms and per endpoint recorders.
+
+LatencyHistogram buckets values logarithmically (HDR style): every bucket is precision wider
+than the one before it, so any recorded value is reproduced within that relative error
+and memory does not grow with the number of samples.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import math
+import re
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from httpx import Response
+from rich.table import Table
+
+PERCENTILES = [50.0, 90.0, 99.0, 99.9]
+
+# ids in robot server paths are uuids or hashes, sometimes plain numbers
+_ID_SEGMENT = re.compile(r"[0-9a-fA-F-]{8,}|\d+")
+
+
+def route_path(path: str) -> str:
+    """/runs/{id}/commands for /runs/4a7d.../commands, so requests to different resources aggregate together."""
+    return "/".join("{id}" if _ID_SEGMENT.fullmatch(segment) else segment for segment in path.split("/"))
+
+
+class LatencyHistogram:
+    """Log-bucketed histogram of latencies in seconds between lowest_sec and highest_sec."""
+
+    def __init__(self, lowest_sec: float = 1e-5, highest_sec: float = 3600.0, precision: float = 0.01) -> None:
+        self.lowest_sec = lowest_sec
+        self.highest_sec = highest_sec
+        self.precision = precision
+        self._log_base = math.log1p(precision)
+        self.counts = [0] * (self._index(highest_sec) + 1)
+        self.count = 0
+        self.total_sec = 0.0
+        self.min_sec = math.inf
+        self.max_sec = 0.0
+
+    def _index(self, value_sec: float) -> int:
+        if value_sec <= self.lowest_sec:
+            return 0
+        return int(math.log(value_sec / self.lowest_sec) / self._log_base) + 1
+
+    def _bucket_value(self, index: int) -> float:
+        """The upper edge of a bucket, so reported percentiles never understate latency."""
+        return self.lowest_sec * math.exp(index * self._log_base)
+
+    def same_layout(self, other: LatencyHistogram) -> bool:
+        return (self.lowest_sec, self.highest_sec, self.precision) == (other.lowest_sec, other.highest_sec, other.precision)
+
+    def record(self, value_sec: float) -> None:
+        self.counts[min(self._index(value_sec), len(self.counts) - 1)] += 1
+        self.count += 1
+        self.total_sec += value_sec
+        self.min_sec = min(self.min_sec, value_sec)
+        self.max_sec = max(self.max_sec, value_sec)
+
+    @property
+    def mean_sec(self) -> float:
+        return self.total_sec / self.count if self.count else 0.0
+
+    def percentile(self, percent: float) -> float:
+        """Value at percent (0-100), clamped to the exact observed min and max."""
+        if self.count == 0:
+            return 0.0
+        if percent <= 0:
+            return self.min_sec
+        rank = max(1, math.ceil(percent / 100 * self.count))
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return min(max(self._bucket_value(index), self.min_sec), self.max_sec)
+        return self.max_sec
+
+    def buckets(self) -> list[tuple[float, int]]:
+        """(value, count) for every non empty bucket, in increasing value order."""
+        return [(self._bucket_value(index), bucket_count) for index, bucket_count in enumerate(self.counts) if bucket_count]
+
+    def merge(self, other: LatencyHistogram) -> None:
+        if not self.same_layout(other):
+            raise ValueError("Histograms with different bucket layouts cannot be merged")
+        for index, bucket_count in enumerate(other.counts):
+            self.counts[index] += bucket_count
+        self.count += other.count
+        self.total_sec += other.total_sec
+        self.min_sec = min(self.min_sec, other.min_sec)
+        self.max_sec = max(self.max_sec, other.max_sec)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "lowest_sec": self.lowest_sec,
+            "highest_sec": self.highest_sec,
+            "precision": self.precision,
+            "count": self.count,
+            "total_sec": self.total_sec,
+            "min_sec": self.min_sec if self.count else None,
+            "max_sec": self.max_sec,
+            # sparse, most buckets are empty
+            "counts": {str(index): bucket_count for index, bucket_count in enumerate(self.counts) if bucket_count},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> LatencyHistogram:
+        histogram = cls(lowest_sec=data["lowest_sec"], highest_sec=data["highest_sec"], precision=data["precision"])
+        for index, bucket_count in data["counts"].items():
+            histogram.counts[int(index)] = bucket_count
+        histogram.count = data["count"]
+        histogram.total_sec = data["total_sec"]
+        histogram.min_sec = math.inf if data["min_sec"] is None else data["min_sec"]
+        histogram.max_sec = data["max_sec"]
+        return histogram
+
+
+@dataclass
+class EndpointLatency:
+    """Successful request latencies and error count for one endpoint and verb."""
+
+    endpoint: str
+    verb: str
+    histogram: LatencyHistogram = field(default_factory=LatencyHistogram)
+    errors: int = 0
+
+    @property
+    def requests(self) -> int:
+        return self.histogram.count + self.errors
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.requests if self.requests else 0.0
+
+
+class LatencyRecorder:
+    """Streaming latency statistics keyed by endpoint and verb.
+
+    Responses are reduced to a histogram bucket increment as they arrive, nothing else is kept.
+    duration_sec is the wall clock the samples were collected over and drives throughput,
+    it is set by stop() or accumulated by merge().
+    """
+
+    def __init__(self, name: str = "") -> None:
+        self.name = name
+        self.endpoints: dict[tuple[str, str], EndpointLatency] = {}
+        self.duration_sec = 0.0
+        self._started = time.perf_counter()
+
+    def _entry(self, endpoint: str, verb: str) -> EndpointLatency:
+        key = (endpoint, verb)
+        if key not in self.endpoints:
+            self.endpoints[key] = EndpointLatency(endpoint=endpoint, verb=verb)
+        return self.endpoints[key]
+
+    def record(self, endpoint: str, verb: str, latency_sec: float) -> None:
+        self._entry(endpoint, verb).histogram.record(latency_sec)
+
+    def record_error(self, endpoint: str, verb: str) -> None:
+        self._entry(endpoint, verb).errors += 1
+
+    def record_response(self, response: Response) -> None:
+        """Record a completed response by its route (ids replaced, see route_path), 4xx and 5xx count as errors."""
+        endpoint, verb = route_path(response.url.path), response.request.method
+        if response.is_error:
+            self.record_error(endpoint, verb)
+        else:
+            self.record(endpoint, verb, response.elapsed.total_seconds())
+
+    def stop(self) -> None:
+        self.duration_sec = time.perf_counter() - self._started
+
+    def merge(self, other: LatencyRecorder) -> None:
+        for (endpoint, verb), entry in other.endpoints.items():
+            mine = self._entry(endpoint, verb)
+            mine.histogram.merge(entry.histogram)
+            mine.errors += entry.errors
+        self.duration_sec += other.duration_sec
+
+    def summary_rows(self) -> list[dict[str, Any]]:
+        rows = []
+        for entry in sorted(self.endpoints.values(), key=lambda e: (e.endpoint, e.verb)):
+            histogram = entry.histogram
+            row: dict[str, Any] = {
+                "endpoint": entry.endpoint,
+                "verb": entry.verb,
+                "requests": entry.requests,
+                "errors": entry.errors,
+                "error_rate": entry.error_rate,
+                "throughput_per_sec": histogram.count / self.duration_sec if self.duration_sec else 0.0,
+                "mean_sec": histogram.mean_sec,
+            }
+            for percent in PERCENTILES:
+                row[f"p{percent:g}_sec"] = histogram.percentile(percent)
+            row["max_sec"] = histogram.max_sec
+            rows.append(row)
+        return rows
+
+    def table(self, title: str | None = None) -> Table:
+        rows = self.summary_rows()
+        table = Table(title=title or self.name or "Latency", expand=True)
+        headers = ["Endpoint", "Verb", "Requests", "Error %", "Throughput /s"] + [f"p{p:g} s" for p in PERCENTILES] + ["Max s"]
+        for header in headers:
+            table.add_column(header)
+        for row in rows:
+            table.add_row(
+                row["endpoint"],
+                row["verb"],
+                str(row["requests"]),
+                f"{row['error_rate'] * 100:.1f}",
+                f"{row['throughput_per_sec']:.1f}",
+                *[f"{row[f'p{p:g}_sec']:.4f}" for p in PERCENTILES],
+                f"{row['max_sec']:.4f}",
+            )
+        return table
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "duration_sec": self.duration_sec,
+            "endpoints": [
+                {"endpoint": entry.endpoint, "verb": entry.verb, "errors": entry.errors, "histogram": entry.histogram.to_dict()}
+                for entry in self.endpoints.values()
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> LatencyRecorder:
+        recorder = cls(name=data["name"])
+        recorder.duration_sec = data["duration_sec"]
+        for item in data["endpoints"]:
+            recorder.endpoints[(item["endpoint"], item["verb"])] = EndpointLatency(
+                endpoint=item["endpoint"],
+                verb=item["verb"],
+                histogram=LatencyHistogram.from_dict(item["histogram"]),
+                errors=item["errors"],
+            )
+        return recorder
+
+    def save_json(self, path: Path) -> None:
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load_json(cls, path: Path) -> LatencyRecorder:
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+    def save_csv(self, path: Path) -> None:
+        rows = self.summary_rows()
+        if not rows:
+            return
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
@@ -0,0 +1,201 @@
+"""Open-loop load generation against a robot.
+
+Requests for each endpoint are issued on a fixed schedule derived from the target rate,
+whether or not earlier requests have returned. Latency is measured from the scheduled
+send time, so a slow server shows up as latency instead of silently lowering the request
+rate (coordinated omission).
+"""
+
+from __future__ import annotations
+
+import time
+from collections import Counter
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+import anyio
+from anyio.abc import TaskGroup
+from clients.polling import Backoff, poll_until
+from clients.robot_client import RobotClient
+from clients.uploads import Upload
+from httpx import Response
+from perf.histogram import LatencyRecorder
+from perf.tracing import span, timed
+
+Call = Callable[[RobotClient], Awaitable[Response]]
+
+ENDPOINTS: dict[str, Call] = {
+    "GET /health": lambda client: client.get_health(),
+    "GET /runs": lambda client: client.get_runs(),
+    "GET /protocols": lambda client: client.get_protocols(),
+    "GET /modules": lambda client: client.get_modules(),
+    "GET /settings": lambda client: client.get_settings(),
+    "GET /dataFiles": lambda client: client.get_data_files(),
+}
+
+
+@dataclass(frozen=True)
+class Phase:
+    """A stretch of the run where every endpoint's rate moves linearly from start_scale to end_scale of its target."""
+
+    name: str
+    duration_sec: float
+    start_scale: float = 1.0
+    end_scale: float = 1.0
+
+    def scale_at(self, elapsed_sec: float) -> float:
+        if self.duration_sec <= 0:
+            return self.end_scale
+        return self.start_scale + (self.end_scale - self.start_scale) * min(1.0, elapsed_sec / self.duration_sec)
+
+
+def ramp_phases(ramp_up_sec: float, steady_sec: float, ramp_down_sec: float) -> list[Phase]:
+    phases = [
+        Phase("ramp-up", ramp_up_sec, start_scale=0.0, end_scale=1.0),
+        Phase("steady", steady_sec),
+        Phase("ramp-down", ramp_down_sec, start_scale=1.0, end_scale=0.0),
+    ]
+    return [phase for phase in phases if phase.duration_sec > 0]
+
+
+@dataclass(frozen=True)
+class EndpointLoad:
+    """Issue call at rate_per_sec (scaled by the current phase)."""
+
+    name: str
+    rate_per_sec: float
+    call: Call
+
+
+@dataclass(frozen=True)
+class BackgroundLoad:
+    """Keep in_flight copies of call running back to back for the whole scenario, like 5 analyses in flight."""
+
+    name: str
+    in_flight: int
+    call: Callable[[RobotClient], Awaitable[Any]]
+
+
+@dataclass
+class Scenario:
+    name: str
+    phases: list[Phase]
+    endpoints: list[EndpointLoad] = field(default_factory=list)
+    background: list[BackgroundLoad] = field(default_factory=list)
+    # arrivals beyond this many outstanding requests per endpoint are counted as missed, not sent
+    max_in_flight: int = 1000
+
+
+@dataclass
+class PhaseResult:
+    """What one phase measured, per endpoint.
+
+    latency is measured from the scheduled send time, service from the actual send time;
+    a gap between the two means requests were not leaving on schedule.
+    """
+
+    phase: str
+    duration_sec: float
+    latency: LatencyRecorder
+    service: LatencyRecorder
+    missed: Counter[str] = field(default_factory=Counter)
+
+
+@timed()
+async def analyze_protocol(client: RobotClient, protocol: Upload | bytes, timeout_sec: float = 600) -> None:
+    """Upload a protocol and wait until its analysis completes.
+
+    Pass an UploadSource when analyzing the same protocol repeatedly so it is read from disk once.
+    """
+    files: list[Upload] | bytes = protocol if isinstance(protocol, bytes) else [protocol]
+    upload = await client.post_protocol(files)
+    protocol_id = upload.json()["data"]["id"]
+
+    async def analysis_statuses() -> list[str]:
+        protocol_data = (await client.get_protocol(protocol_id)).json()["data"]
+        return [summary["status"] for summary in protocol_data["analysisSummaries"]]
+
+    await poll_until(
+        analysis_statuses,
+        lambda statuses: all(status == "completed" for status in statuses),
+        timeout_sec=timeout_sec,
+        backoff=Backoff(initial_sec=0.2, ceiling_sec=2.0),
+    )
+
+
+async def run_scenario(client: RobotClient, scenario: Scenario) -> list[PhaseResult]:
+    """Drive scenario against client phase by phase, returning one PhaseResult per phase."""
+    results: list[PhaseResult] = []
+
+    async def _background_worker(load: BackgroundLoad, stop: anyio.Event) -> None:
+        while not stop.is_set():
+            try:
+                await load.call(client)
+            except Exception:
+                # background load only exists to keep the robot busy, a failure should not end the scenario
+                await anyio.sleep(1)
+
+    async def _fire(load: EndpointLoad, result: PhaseResult, scheduled: float, outstanding: list[int]) -> None:
+        verb, _, endpoint = load.name.partition(" ")
+        sent = time.perf_counter()
+        try:
+            response = await load.call(client)
+            failed = response.is_error
+        except Exception:
+            failed = True
+        finally:
+            outstanding[0] -= 1
+        if failed:
+            result.latency.record_error(endpoint, verb)
+            result.service.record_error(endpoint, verb)
+            return
+        done = time.perf_counter()
+        result.latency.record(endpoint, verb, done - scheduled)
+        result.service.record(endpoint, verb, done - sent)
+
+    async def _drive(
+        load: EndpointLoad, phase: Phase, result: PhaseResult, phase_start: float, outstanding: list[int], fire_tg: TaskGroup
+    ) -> None:
+        scheduled = phase_start
+        while True:
+            rate = load.rate_per_sec * phase.scale_at(scheduled - phase_start)
+            # at (near) zero rate step forward in small increments until the ramp brings traffic back
+            scheduled += 1 / rate if rate > 0.01 else 0.1
+            if scheduled - phase_start >= phase.duration_sec:
+                return
+            await anyio.sleep(max(0.0, scheduled - time.perf_counter()))
+            if rate <= 0.01:
+                continue
+            if outstanding[0] >= scenario.max_in_flight:
+                result.missed[load.name] += 1
+                continue
+            outstanding[0] += 1
+            fire_tg.start_soon(_fire, load, result, scheduled, outstanding)
+
+    # one boxed counter per endpoint so _fire can decrement it across phase boundaries
+    outstanding = {load.name: [0] for load in scenario.endpoints}
+    stop_background = anyio.Event()
+    async with anyio.create_task_group() as background_tg:
+        for background in scenario.background:
+            for _ in range(background.in_flight):
+                background_tg.start_soon(_background_worker, background, stop_background)
+        # requests still in flight when their phase ends keep running and count toward that phase,
+        # the next phase starts on schedule rather than waiting for them
+        async with anyio.create_task_group() as fire_tg:
+            for phase in scenario.phases:
+                result = PhaseResult(
+                    phase=phase.name,
+                    duration_sec=phase.duration_sec,
+                    latency=LatencyRecorder(name=f"{scenario.name} {phase.name}"),
+                    service=LatencyRecorder(name=f"{scenario.name} {phase.name} service"),
+                )
+                result.latency.duration_sec = result.service.duration_sec = phase.duration_sec
+                results.append(result)
+                phase_start = time.perf_counter()
+                async with span(f"phase {phase.name}", scenario=scenario.name), anyio.create_task_group() as drive_tg:
+                    for load in scenario.endpoints:
+                        drive_tg.start_soon(_drive, load, phase, result, phase_start, outstanding[load.name], fire_tg)
+        stop_background.set()
+        background_tg.cancel_scope.cancel()
+    return results
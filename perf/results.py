@@ -0,0 +1,71 @@
+"""Saved benchmark result sets, the input to perf.compare."""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from perf.histogram import LatencyRecorder
+
+FORMAT_VERSION = 1
+# what to keep from /health so a result set says which robot and software it measured
+HEALTH_FIELDS = ["name", "robot_model", "api_version", "fw_version", "system_version", "robot_serial"]
+
+
+@dataclass
+class ResultSet:
+    """Every phase of one OT3_perf run, with enough metadata to tell runs apart."""
+
+    name: str
+    phases: dict[str, LatencyRecorder] = field(default_factory=dict)
+    robot: dict[str, Any] = field(default_factory=dict)
+    created_at: str = field(default_factory=lambda: datetime.now(UTC).isoformat())
+
+    def set_robot(self, health: dict[str, Any]) -> None:
+        self.robot = {key: health[key] for key in HEALTH_FIELDS if key in health}
+
+    def describe(self) -> str:
+        version = self.robot.get("api_version", "unknown version")
+        return f"{self.name} ({self.robot.get('name', 'unknown robot')} {version}, {self.created_at})"
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "format_version": FORMAT_VERSION,
+            "name": self.name,
+            "created_at": self.created_at,
+            "robot": self.robot,
+            "phases": {phase: recorder.to_dict() for phase, recorder in self.phases.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> ResultSet:
+        if data.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported result set format {data.get('format_version')!r}, expected {FORMAT_VERSION}")
+        return cls(
+            name=data["name"],
+            created_at=data["created_at"],
+            robot=data["robot"],
+            phases={phase: LatencyRecorder.from_dict(recorder) for phase, recorder in data["phases"].items()},
+        )
+
+    def save(self, path: Path) -> list[Path]:
+        """Write the result set to path as JSON and a CSV summary per phase beside it, returning every file written."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        written = [path]
+        for phase, recorder in self.phases.items():
+            if not recorder.endpoints:
+                continue
+            csv_path = path.with_name(f"{path.stem}-{phase}.csv")
+            recorder.save_csv(csv_path)
+            written.append(csv_path)
+        return written
+
+    @classmethod
+    def load(cls, path: Path) -> ResultSet:
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
@@ -0,0 +1,291 @@
+"""Spans: named, nested timings aggregated per name and exportable as a Chrome/Perfetto trace.
+
+    with span("upload", files=3):
+        ...
+    async with span("wait for analysis"):
+        ...
+
+    @timed()
+    async def wait_until_run_status(...): ...
+
+Every finished span is added to a LatencyHistogram for its name and kept in a ring buffer of the
+last max_spans spans. A span opened inside another, in the same thread or asyncio task, records the
+outer one as its parent. Timings come from perf_counter_ns.
+
+Tracing is off unless OTIETALK_TRACE is set (or tracer.enabled = True). Off, span() hands back one
+shared no-op object and timed() wrappers cost an attribute check, so instrumentation can stay in hot code.
+
+    tracer.enabled = True
+    ...
+    console.print(tracer.table())
+    tracer.export_chrome_trace(Path("results/trace.json"))  # open in https://ui.perfetto.dev or chrome://tracing
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import inspect
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import TracebackType
+from typing import Any, ParamSpec, TypeVar, cast
+
+from perf.histogram import PERCENTILES, LatencyHistogram
+from rich.table import Table
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+MAX_SPANS = 100_000
+
+_current_span: ContextVar[int | None] = ContextVar("otietalk_current_span", default=None)
+
+
+@dataclass(slots=True)
+class SpanRecord:
+    name: str
+    span_id: int
+    parent_id: int | None
+    start_ns: int
+    duration_ns: int
+    # the asyncio task or thread the span ran in, one row in the trace viewer
+    track: str
+    attrs: dict[str, Any] | None = None
+    error: str | None = None
+
+
+@dataclass
+class SpanStats:
+    name: str
+    histogram: LatencyHistogram = field(default_factory=LatencyHistogram)
+    errors: int = 0
+
+
+def _track() -> str:
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    if task is not None:
+        # anyio names tasks after their function, so concurrent copies of one function share a name
+        return f"{task.get_name()} {id(task):x}"
+    return threading.current_thread().name
+
+
+class Span:
+    """A running span, use through Tracer.span as a context manager (with or async with)."""
+
+    __slots__ = ("tracer", "name", "attrs", "span_id", "parent_id", "start_ns", "_token")
+
+    def __init__(self, tracer: Tracer, name: str, attrs: dict[str, Any] | None) -> None:
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.span_id = 0
+        self.parent_id: int | None = None
+        self.start_ns = 0
+        self._token: Token[int | None] | None = None
+
+    def __enter__(self) -> Span:
+        self.parent_id = _current_span.get()
+        self.span_id = next(self.tracer._ids)
+        self._token = _current_span.set(self.span_id)
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type: type[BaseException] | None, exc: BaseException | None, traceback: TracebackType | None) -> None:
+        duration_ns = time.perf_counter_ns() - self.start_ns
+        if self._token is not None:
+            _current_span.reset(self._token)
+        self.tracer._finish(self, duration_ns, exc_type)
+
+    async def __aenter__(self) -> Span:
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type: type[BaseException] | None, exc: BaseException | None, traceback: TracebackType | None) -> None:
+        self.__exit__(exc_type, exc, traceback)
+
+
+class _NoopSpan:
+    """What span() returns while tracing is off, shared and stateless."""
+
+    span_id = 0
+    parent_id = None
+
+    def __enter__(self) -> _NoopSpan:
+        return self
+
+    def __exit__(self, exc_type: type[BaseException] | None, exc: BaseException | None, traceback: TracebackType | None) -> None:
+        return None
+
+    async def __aenter__(self) -> _NoopSpan:
+        return self
+
+    async def __aexit__(self, exc_type: type[BaseException] | None, exc: BaseException | None, traceback: TracebackType | None) -> None:
+        return None
+
+
+_NOOP = _NoopSpan()
+
+
+class Tracer:
+    """Collects spans from every thread and task of the process."""
+
+    def __init__(self, enabled: bool = False, max_spans: int = MAX_SPANS) -> None:
+        self.enabled = enabled
+        self.stats: dict[str, SpanStats] = {}
+        self.spans: deque[SpanRecord] = deque(maxlen=max_spans)
+        # spans pushed out of the ring buffer, still counted in stats
+        self.dropped = 0
+        self.origin_ns = time.perf_counter_ns()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def span(self, name: str, **attrs: Any) -> Span | _NoopSpan:
+        if not self.enabled:
+            return _NOOP
+        return Span(self, name, attrs or None)
+
+    def timed(self, name: str | None = None) -> Callable[[Callable[P, R]], Callable[P, R]]:
+        """Decorator putting every call of a function or coroutine function in a span named name, the qualified name by default."""
+
+        def decorate(func: Callable[P, R]) -> Callable[P, R]:
+            span_name = name or func.__qualname__
+            if inspect.iscoroutinefunction(func):
+                coroutine_function = cast(Callable[P, Awaitable[Any]], func)
+
+                @functools.wraps(func)
+                async def async_wrapper(*args: P.args, **kwargs: P.kwargs) -> Any:
+                    if not self.enabled:
+                        return await coroutine_function(*args, **kwargs)
+                    with Span(self, span_name, None):
+                        return await coroutine_function(*args, **kwargs)
+
+                return cast(Callable[P, R], async_wrapper)
+
+            @functools.wraps(func)
+            def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with Span(self, span_name, None):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorate
+
+    def _finish(self, span: Span, duration_ns: int, exc_type: type[BaseException] | None) -> None:
+        record = SpanRecord(
+            name=span.name,
+            span_id=span.span_id,
+            parent_id=span.parent_id,
+            start_ns=span.start_ns,
+            duration_ns=duration_ns,
+            track=_track(),
+            attrs=span.attrs,
+            error=None if exc_type is None else exc_type.__name__,
+        )
+        with self._lock:
+            stats = self.stats.get(span.name)
+            if stats is None:
+                stats = self.stats[span.name] = SpanStats(name=span.name)
+            stats.histogram.record(duration_ns / 1e9)
+            # a cancelled span was cut short, it did not fail
+            if exc_type is not None and issubclass(exc_type, Exception):
+                stats.errors += 1
+            if len(self.spans) == self.spans.maxlen:
+                self.dropped += 1
+            self.spans.append(record)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.stats = {}
+            self.spans.clear()
+            self.dropped = 0
+            self.origin_ns = time.perf_counter_ns()
+
+    def summary_rows(self) -> list[dict[str, Any]]:
+        rows = []
+        with self._lock:
+            stats = sorted(self.stats.values(), key=lambda s: s.name)
+        for entry in stats:
+            histogram = entry.histogram
+            row: dict[str, Any] = {
+                "span": entry.name,
+                "count": histogram.count,
+                "errors": entry.errors,
+                "total_sec": histogram.total_sec,
+                "mean_sec": histogram.mean_sec,
+            }
+            for percent in PERCENTILES[:3]:
+                row[f"p{percent:g}_sec"] = histogram.percentile(percent)
+            row["max_sec"] = histogram.max_sec
+            rows.append(row)
+        return rows
+
+    def table(self, title: str = "Spans") -> Table:
+        table = Table(title=title)
+        for header in ["Span", "Count", "Errors", "Total s", "Mean s"] + [f"p{p:g} s" for p in PERCENTILES[:3]] + ["Max s"]:
+            table.add_column(header)
+        for row in self.summary_rows():
+            table.add_row(
+                row["span"],
+                str(row["count"]),
+                str(row["errors"]),
+                f"{row['total_sec']:.4f}",
+                f"{row['mean_sec']:.4f}",
+                *[f"{row[f'p{p:g}_sec']:.4f}" for p in PERCENTILES[:3]],
+                f"{row['max_sec']:.4f}",
+            )
+        return table
+
+    def chrome_trace(self) -> dict[str, Any]:
+        """The buffered spans in Chrome's Trace Event Format, complete (X) events with one track per task or thread."""
+        with self._lock:
+            spans = list(self.spans)
+            origin_ns = self.origin_ns
+        pid = os.getpid()
+        tracks: dict[str, int] = {}
+        events: list[dict[str, Any]] = []
+        for record in spans:
+            tid = tracks.setdefault(record.track, len(tracks) + 1)
+            args: dict[str, Any] = {"span_id": record.span_id, "parent_id": record.parent_id}
+            if record.attrs:
+                args.update(record.attrs)
+            if record.error is not None:
+                args["error"] = record.error
+            events.append(
+                {
+                    "name": record.name,
+                    "cat": "otietalk",
+                    "ph": "X",
+                    "ts": (record.start_ns - origin_ns) / 1000,
+                    "dur": record.duration_ns / 1000,
+                    "pid": pid,
+                    "tid": tid,
+                    "args": args,
+                }
+            )
+        for track, tid in tracks.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": track}})
+        return {"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"dropped_spans": self.dropped}}
+
+    def export_chrome_trace(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            # attrs come from callers, anything json cannot handle is written as its repr
+            json.dump(self.chrome_trace(), f, default=repr)
+
+
+tracer = Tracer(enabled=os.environ.get("OTIETALK_TRACE", "") not in ("", "0"))
+span = tracer.span
+timed = tracer.timed
@@ -7,20 +7,45 @@
 # ]
 # ///
 
+import argparse
 import asyncio
+import ipaddress
+import json
+import os
 import socket
+import sys
 import threading
 import time
-from dataclasses import dataclass, field
+from dataclasses import asdict, dataclass, field, replace
+from pathlib import Path
 from typing import Any, List
 
 import httpx
 from rich.align import Align
-from rich.console import Console, Group
+from rich.console import Console, ConsoleOptions, Group, RenderResult
 from rich.live import Live
+from rich.segment import Segment
+from rich.spinner import Spinner
 from rich.table import Table
 from zeroconf import ServiceBrowser, ServiceListener, Zeroconf
 
+STATUS_PORT = 31950
+# A device is polled every FAST_POLL_SEC after it appears or its status changes,
+# the interval doubles each time nothing changed, up to SLOW_POLL_SEC.
+FAST_POLL_SEC = 0.5
+SLOW_POLL_SEC = 300.0
+# Devices are remembered between launches so the table is populated at startup, then revalidated.
+# One that has not answered for CACHE_MAX_AGE_SEC is dropped.
+CACHE_PATH = Path.home() / ".cache" / "otietalk" / "discovered.json"
+CACHE_MAX_AGE_SEC = 7 * 24 * 3600.0
+CACHE_FORMAT_VERSION = 1
+# An active sweep probes every address for GET /health, for VLANs where mDNS does not get through.
+# Almost every address is empty, so the connect timeout decides how long a sweep takes.
+SWEEP_CONCURRENCY = 256
+SWEEP_RATE_PER_SEC = 2000.0
+SWEEP_CONNECT_TIMEOUT_SEC = 0.3
+SWEEP_READ_TIMEOUT_SEC = 2.0
+
 # ---------------- Data Classes ----------------
 
 
@@ -39,156 +64,533 @@ class Device:
     last_seen: str
     interfaces: List[InterfaceInfo] = field(default_factory=list)
     status_raw: dict[str, Any] = field(default_factory=dict)
+    # epoch seconds, first_seen survives restarts through the cache
+    first_seen: float = field(default_factory=time.time)
+    last_ok: float = 0.0
+    # loaded from the cache and not answered since
+    cached: bool = False
+    # bumped by the registry on every change, the UI re-renders a row only when it moves
+    revision: int = 0
+    poll_interval_sec: float = FAST_POLL_SEC
+    next_poll: float = 0.0
+
+    @property
+    def healthy(self) -> bool:
+        return bool(self.status_raw) and "error" not in self.status_raw
+
+    def to_json(self) -> dict[str, Any]:
+        data = asdict(self)
+        for scheduling in ["cached", "revision", "poll_interval_sec", "next_poll"]:
+            data.pop(scheduling)
+        return data
+
+    @classmethod
+    def from_json(cls, data: dict[str, Any]) -> "Device":
+        device = cls(**{**data, "interfaces": [InterfaceInfo(**iface) for iface in data["interfaces"]]})
+        # last_seen is a time of day, which means nothing on a later day
+        device.last_seen = time.strftime("%m-%d %H:%M", time.localtime(device.last_ok or device.first_seen))
+        return device
+
+
+# ---------------- Registry ----------------
 
 
-# Global dictionary of discovered devices.
-discovered: dict[str, Device] = {}
+class DeviceRegistry:
+    """Every known device, safe to change from the zeroconf thread and the poller at once.
+
+    Readers get copies, so nothing they hold changes under them.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._devices: dict[str, Device] = {}
+        # bumped on every change so readers can tell cheaply whether anything moved
+        self.version = 0
+        # bumped on every poll answer, changed or not, for views showing last_seen
+        self.seen = 0
+
+    def _changed(self, device: Device) -> None:
+        self.version += 1
+        device.revision = self.version
+
+    def upsert(self, instance: str, ip: str) -> None:
+        """Add a device or move it to a new ip, a new or moved device is polled right away."""
+        with self._lock:
+            device = self._devices.get(instance)
+            if device is not None and device.ip == ip:
+                return
+            if device is None:
+                device = Device(instance=instance, ip=ip, last_seen=time.strftime("%H:%M:%S"))
+                self._devices[instance] = device
+            device.ip = ip
+            device.poll_interval_sec = FAST_POLL_SEC
+            device.next_poll = 0.0
+            self._changed(device)
+
+    def remove(self, instance: str) -> None:
+        with self._lock:
+            if self._devices.pop(instance, None) is not None:
+                self.version += 1
+
+    def update_status(self, instance: str, status_raw: dict[str, Any], interfaces: List[InterfaceInfo]) -> bool:
+        """Record a poll result and schedule the next poll, returning whether the status changed."""
+        with self._lock:
+            device = self._devices.get(instance)
+            if device is None:
+                return False
+            changed = status_raw != device.status_raw
+            device.last_seen = time.strftime("%H:%M:%S")
+            self.seen += 1
+            if "error" not in status_raw:
+                device.last_ok = time.time()
+                if device.cached:
+                    device.cached = False
+                    changed = True
+            if changed:
+                device.status_raw = status_raw
+                device.interfaces = interfaces
+                device.poll_interval_sec = FAST_POLL_SEC
+                self._changed(device)
+            else:
+                device.poll_interval_sec = min(device.poll_interval_sec * 2, SLOW_POLL_SEC)
+            device.next_poll = time.monotonic() + device.poll_interval_sec
+            return changed
+
+    def restore(self, devices: List[Device]) -> None:
+        """Add devices from the cache that discovery has not already found, to be revalidated right away."""
+        with self._lock:
+            for device in devices:
+                if device.instance in self._devices:
+                    continue
+                device.cached = True
+                device.poll_interval_sec = FAST_POLL_SEC
+                device.next_poll = 0.0
+                self._devices[device.instance] = device
+                self._changed(device)
+
+    def expire(self, max_age_sec: float) -> List[str]:
+        """Drop devices that are not answering and have not answered for max_age_sec, returning their names."""
+        cutoff = time.time() - max_age_sec
+        with self._lock:
+            expired = [
+                device.instance
+                for device in self._devices.values()
+                if not device.healthy and max(device.last_ok, device.first_seen) < cutoff
+            ]
+            for instance in expired:
+                del self._devices[instance]
+            if expired:
+                self.version += 1
+        return expired
+
+    def snapshot(self) -> list[Device]:
+        with self._lock:
+            return [replace(device, interfaces=list(device.interfaces)) for device in self._devices.values()]
+
+    def due(self, now: float) -> tuple[list[Device], float]:
+        """Devices whose next poll is due and the monotonic time of the next one after them."""
+        with self._lock:
+            due = [replace(device) for device in self._devices.values() if device.next_poll <= now]
+            upcoming = [device.next_poll for device in self._devices.values() if device.next_poll > now]
+            for device in due:
+                # claimed, so an overlapping pass does not poll it twice
+                self._devices[device.instance].next_poll = now + SLOW_POLL_SEC
+        return due, min(upcoming, default=now + SLOW_POLL_SEC)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._devices)
+
+
+# ---------------- Cache ----------------
+
+
+def load_cache(path: Path, max_age_sec: float = CACHE_MAX_AGE_SEC) -> List[Device]:
+    """Devices saved by an earlier launch that answered within max_age_sec, nothing if the cache is missing or unreadable."""
+    try:
+        with open(path) as f:
+            data = json.load(f)
+        if data.get("format_version") != CACHE_FORMAT_VERSION:
+            return []
+        devices = [Device.from_json(device) for device in data["devices"]]
+    except (OSError, ValueError, KeyError, TypeError):
+        return []
+    cutoff = time.time() - max_age_sec
+    return [device for device in devices if max(device.last_ok, device.first_seen) >= cutoff]
+
+
+def save_cache(path: Path, devices: List[Device]) -> None:
+    """Write atomically so a crash mid-write never leaves a truncated cache behind."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = {"format_version": CACHE_FORMAT_VERSION, "saved_at": time.time(), "devices": [device.to_json() for device in devices]}
+    temporary = path.with_suffix(".tmp")
+    with open(temporary, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(temporary, path)
+
+
+async def persist(
+    registry: DeviceRegistry, path: Path, stop: asyncio.Event, max_age_sec: float = CACHE_MAX_AGE_SEC, interval_sec: float = 5.0
+) -> None:
+    """Age out dead devices and save the registry whenever it changed, at most every interval_sec and once more on stop."""
+    saved_version = -1
+    while True:
+        registry.expire(max_age_sec)
+        if registry.version != saved_version:
+            saved_version = registry.version
+            save_cache(path, registry.snapshot())
+        if stop.is_set():
+            return
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=interval_sec)
+        except asyncio.TimeoutError:
+            pass
+
 
 # ---------------- Zeroconf Listener ----------------
 
 
 class MyListener(ServiceListener):
+    def __init__(self, registry: DeviceRegistry) -> None:
+        self.registry = registry
+
     def add_service(self, zeroconf: Zeroconf, service_type: str, name: str) -> None:
         info = zeroconf.get_service_info(service_type, name)
         if info:
             instance = name.split(".")[0]
-            ip = (
-                socket.inet_ntoa(info.addresses[0])
-                if info.addresses
-                else "[unresolved]"
-            )
-            discovered[instance] = Device(
-                instance=instance, ip=ip, last_seen=time.strftime("%H:%M:%S")
-            )
+            ip = socket.inet_ntoa(info.addresses[0]) if info.addresses else "[unresolved]"
+            self.registry.upsert(instance, ip)
 
     def update_service(self, zeroconf: Zeroconf, service_type: str, name: str) -> None:
         self.add_service(zeroconf, service_type, name)
 
     def remove_service(self, zeroconf: Zeroconf, service_type: str, name: str) -> None:
         instance = name.split(".")[0]
-        discovered.pop(instance, None)
+        self.registry.remove(instance)
 
 
 # ---------------- Async Polling ----------------
 
 
-async def fetch_and_update_status(device: Device, client: httpx.AsyncClient) -> None:
-    url = f"http://{device.ip}:31950/networking/status"
-    try:
-        response = await client.get(
-            url, headers={"opentrons-version": "*"}, timeout=3.0
+def parse_interfaces(data: dict[str, Any]) -> List[InterfaceInfo]:
+    return [
+        InterfaceInfo(
+            name=iface_name,
+            gateway=details.get("gatewayAddress", "N/A"),
+            mac=details.get("macAddress", "N/A"),
+            iface_type=details.get("type", "N/A"),
         )
+        for iface_name, details in data.get("interfaces", {}).items()
+    ]
+
+
+async def fetch_status(device: Device, client: httpx.AsyncClient) -> tuple[dict[str, Any], List[InterfaceInfo]]:
+    url = f"http://{device.ip}:{STATUS_PORT}/networking/status"
+    try:
+        response = await client.get(url, headers={"opentrons-version": "*"}, timeout=3.0)
         data = response.json()
-        device.status_raw = data
-        interfaces = []
-        for iface_name, details in data.get("interfaces", {}).items():
-            interfaces.append(
-                InterfaceInfo(
-                    name=iface_name,
-                    gateway=details.get("gatewayAddress", "N/A"),
-                    mac=details.get("macAddress", "N/A"),
-                    iface_type=details.get("type", "N/A"),
-                )
-            )
-        device.interfaces = interfaces
-        device.last_seen = time.strftime("%H:%M:%S")
+        return data, parse_interfaces(data)
     except Exception as e:
-        device.status_raw = {"error": str(e)}
-        device.interfaces = []
-        device.last_seen = time.strftime("%H:%M:%S")
+        return {"error": str(e)}, []
 
 
-async def poll_status_async() -> None:
+async def poll_status_async(registry: DeviceRegistry, concurrency: int = 32, stop: asyncio.Event | None = None) -> None:
     """
-    For the first 15 seconds, poll with a very short sleep interval (0.5 sec).
-    Then change the polling interval to every 5 minutes.
+    Poll each device's /networking/status on its own schedule with at most concurrency requests in flight.
+    New devices and devices whose status just changed are polled every FAST_POLL_SEC,
+    stable ones back off to SLOW_POLL_SEC.
     """
-    poll_start = time.monotonic()
-    async with httpx.AsyncClient() as client:
-        while True:
-            tasks = []
-            for device in list(discovered.values()):
-                if device.ip and "unresolved" not in device.ip:
-                    tasks.append(fetch_and_update_status(device, client))
-            if tasks:
-                await asyncio.gather(*tasks)
-            elapsed = time.monotonic() - poll_start
-            if elapsed < 15:
-                sleep_duration = 0.5
-            else:
-                sleep_duration = 300  # 5 minutes
-            await asyncio.sleep(sleep_duration)
+    stop = stop or asyncio.Event()
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async def poll_one(device: Device, client: httpx.AsyncClient) -> None:
+        async with semaphore:
+            status_raw, interfaces = await fetch_status(device, client)
+        registry.update_status(device.instance, status_raw, interfaces)
+
+    async with httpx.AsyncClient(limits=limits) as client:
+        tasks: set[asyncio.Task[None]] = set()
+        while not stop.is_set():
+            due, next_due = registry.due(time.monotonic())
+            for device in due:
+                if "unresolved" in device.ip:
+                    continue
+                task = asyncio.create_task(poll_one(device, client))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            # wake at least every FAST_POLL_SEC to pick up devices zeroconf just added
+            sleep_duration = max(0.0, min(next_due - time.monotonic(), FAST_POLL_SEC))
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=sleep_duration)
+            except asyncio.TimeoutError:
+                pass
+        for task in tasks:
+            task.cancel()
+
+
+# ---------------- Subnet Sweep ----------------
+
 
+@dataclass
+class SweepSummary:
+    probed: int = 0
+    found: int = 0
+    elapsed_sec: float = 0.0
+
+    def describe(self) -> str:
+        rate = self.probed / self.elapsed_sec if self.elapsed_sec else 0.0
+        return f"swept {self.probed} addresses in {self.elapsed_sec:.2f}s ({rate:.0f}/s), {self.found} robots"
+
+
+class RateLimit:
+    """Hand out start times at most per_sec apart. Slots are reserved synchronously, so no lock is needed."""
+
+    def __init__(self, per_sec: float) -> None:
+        self.interval_sec = 1.0 / per_sec if per_sec > 0 else 0.0
+        self._next = time.monotonic()
+
+    async def wait(self) -> None:
+        slot = max(self._next, time.monotonic())
+        self._next = slot + self.interval_sec
+        delay = slot - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
 
-def start_async_loop(loop: asyncio.AbstractEventLoop) -> None:
-    asyncio.set_event_loop(loop)
-    loop.run_until_complete(poll_status_async())
+
+def sweep_hosts(networks: List[str]) -> List[str]:
+    """Every host address in the CIDR ranges, a bare address is its own /32."""
+    hosts: dict[str, None] = {}
+    for network in networks:
+        parsed = ipaddress.ip_network(network, strict=False)
+        # hosts() leaves out the network and broadcast addresses, and is empty for a /32
+        for host in parsed.hosts() if parsed.num_addresses > 1 else [parsed.network_address]:
+            hosts[str(host)] = None
+    return list(hosts)
+
+
+async def probe_health(ip: str, client: httpx.AsyncClient) -> dict[str, Any] | None:
+    """The robot's /health body, None when nothing at ip answers like a robot."""
+    try:
+        response = await client.get(f"http://{ip}:{STATUS_PORT}/health", headers={"opentrons-version": "*"})
+        if response.status_code != 200:
+            return None
+        health = response.json()
+    except (httpx.HTTPError, ValueError):
+        return None
+    return health if isinstance(health, dict) and "name" in health else None
+
+
+async def sweep(
+    registry: DeviceRegistry,
+    networks: List[str],
+    concurrency: int = SWEEP_CONCURRENCY,
+    rate_per_sec: float = SWEEP_RATE_PER_SEC,
+    connect_timeout_sec: float = SWEEP_CONNECT_TIMEOUT_SEC,
+    transport: httpx.AsyncBaseTransport | None = None,
+) -> SweepSummary:
+    """
+    Probe every address in networks for a robot and upsert each one found under the name from its /health.
+    concurrency workers share the addresses, each probe starts no sooner than rate_per_sec allows.
+    """
+    summary = SweepSummary()
+    start = time.monotonic()
+    hosts = iter(sweep_hosts(networks))
+    rate_limit = RateLimit(rate_per_sec)
+    timeout = httpx.Timeout(SWEEP_READ_TIMEOUT_SEC, connect=connect_timeout_sec)
+    # nearly every connection is refused or times out, keeping the rare success alive is not worth the sockets
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=0)
+
+    async def worker(client: httpx.AsyncClient) -> None:
+        for ip in hosts:
+            await rate_limit.wait()
+            summary.probed += 1
+            health = await probe_health(ip, client)
+            if health is not None:
+                summary.found += 1
+                registry.upsert(str(health["name"]), ip)
+
+    async with httpx.AsyncClient(timeout=timeout, limits=limits, transport=transport) as client:
+        await asyncio.gather(*(worker(client) for _ in range(max(1, concurrency))))
+    summary.elapsed_sec = time.monotonic() - start
+    return summary
+
+
+async def sweep_periodically(
+    registry: DeviceRegistry, networks: List[str], stop: asyncio.Event, interval_sec: float, concurrency: int, log: Console | None
+) -> None:
+    """Sweep right away, then every interval_sec until stop (once if interval_sec is 0)."""
+    while not stop.is_set():
+        summary = await sweep(registry, networks, concurrency=concurrency)
+        if log is not None:
+            log.log(summary.describe())
+        if not interval_sec:
+            return
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=interval_sec)
+        except asyncio.TimeoutError:
+            pass
 
 
 # ---------------- Live View Generation ----------------
 
 
-def generate_spinner_line() -> str:
-    spinner_frames = ["|", "/", "-", "\\"]  # spinner frames
-    frame = spinner_frames[int(time.time() * 2) % len(spinner_frames)]
-    if discovered:
-        names = ", ".join(sorted(discovered.keys()))
-        return f"{frame} Discovered: {names}"
+def spinner_text(devices: list[Device]) -> str:
+    if devices:
+        return f"Discovered {len(devices)} devices"
     else:
-        return f"{frame} No devices discovered yet."
+        return "No devices discovered yet."
+
+
+class DeviceTable:
+    """The device table, laid out again only after update(), not on every refresh of the Live display.
 
+    Rows are formatted only for devices that changed since the last update. The rendered lines are kept
+    and replayed until the next update or a terminal resize, so the spinner can animate for free.
+    """
 
-def generate_table() -> Table:
-    table = Table(title="Device Details", expand=True)
-    table.add_column("Instance", style="cyan", no_wrap=True)
-    table.add_column("IP", style="green")
-    table.add_column("Last Seen", style="dim")
-    table.add_column("Interfaces", style="magenta")
+    def __init__(self) -> None:
+        self._rows: dict[str, tuple[int, tuple[str, str, str, str]]] = {}
+        self._table = self._build([])
+        # (table, width, lines), replaced as a whole since Live renders from its own thread
+        self._rendered: tuple[Table, int, list[list[Segment]]] | None = None
 
-    for device in sorted(discovered.values(), key=lambda d: d.instance):
+    def _row(self, device: Device) -> tuple[str, str, str, str]:
+        cached = self._rows.get(device.instance)
+        if cached is not None and cached[0] == device.revision and cached[1][2].startswith(device.last_seen):
+            return cached[1]
         if device.interfaces:
             iface_lines = "\n".join(
-                f"{iface.name}: gateway={iface.gateway}, mac={iface.mac}, type={iface.iface_type}"
-                for iface in device.interfaces
+                f"{iface.name}: gateway={iface.gateway}, mac={iface.mac}, type={iface.iface_type}" for iface in device.interfaces
             )
         else:
             iface_lines = "[pending]"
-        table.add_row(device.instance, device.ip, device.last_seen, iface_lines)
-    return table
+        last_seen = f"{device.last_seen} (cached)" if device.cached else device.last_seen
+        row = (device.instance, device.ip, last_seen, iface_lines)
+        self._rows[device.instance] = (device.revision, row)
+        return row
+
+    def _build(self, devices: list[Device]) -> Table:
+        table = Table(title="Device Details", expand=True)
+        table.add_column("Instance", style="cyan", no_wrap=True)
+        table.add_column("IP", style="green")
+        table.add_column("Last Seen", style="dim")
+        table.add_column("Interfaces", style="magenta")
+        present = set()
+        for device in sorted(devices, key=lambda d: d.instance):
+            present.add(device.instance)
+            table.add_row(*self._row(device))
+        for gone in set(self._rows) - present:
+            del self._rows[gone]
+        return table
+
+    def update(self, devices: list[Device]) -> None:
+        self._table = self._build(devices)
+
+    def __rich_console__(self, console: Console, options: ConsoleOptions) -> RenderResult:
+        table, rendered = self._table, self._rendered
+        if rendered is None or rendered[0] is not table or rendered[1] != options.max_width:
+            rendered = (table, options.max_width, console.render_lines(table, options, new_lines=True))
+            self._rendered = rendered
+        for line in rendered[2]:
+            yield from line
+
+
+async def live_view(registry: DeviceRegistry, console: Console, stop: asyncio.Event) -> None:
+    """Rebuild the table when the registry changes, in between Live only animates the spinner."""
+    device_table = DeviceTable()
+    devices = registry.snapshot()
+    device_table.update(devices)
+    spinner = Spinner("line", text=spinner_text(devices))
+    seen_version = (registry.version, registry.seen)
+    with Live(Group(Align.center(spinner), device_table), console=console, refresh_per_second=4, screen=True):
+        while not stop.is_set():
+            # "Last Seen" moves on every poll, also when nothing else changed
+            if (registry.version, registry.seen) != seen_version:
+                seen_version = (registry.version, registry.seen)
+                devices = registry.snapshot()
+                device_table.update(devices)
+                spinner.update(text=spinner_text(devices))
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=0.25)
+            except asyncio.TimeoutError:
+                pass
+
+
+async def headless(registry: DeviceRegistry, stop: asyncio.Event, interval_sec: float = 0.5) -> None:
+    """Write one JSON line per device each time it changes."""
+    emitted: dict[str, int] = {}
+    while True:
+        for device in registry.snapshot():
+            if emitted.get(device.instance) != device.revision:
+                emitted[device.instance] = device.revision
+                sys.stdout.write(json.dumps(device.to_json()) + "\n")
+        sys.stdout.flush()
+        # checked after writing so changes from the final moments are not lost
+        if stop.is_set():
+            return
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=interval_sec)
+        except asyncio.TimeoutError:
+            pass
 
 
-def generate_live_group() -> Group:
-    spinner_line = generate_spinner_line()
-    table = generate_table()
-    return Group(Align.center(spinner_line), table)
+# ---------------- Main ----------------
 
 
-# ---------------- Main ----------------
+async def run(args: argparse.Namespace, registry: DeviceRegistry, console: Console) -> None:
+    stop = asyncio.Event()
+    if args.duration:
+        asyncio.get_running_loop().call_later(args.duration, stop.set)
+    view = headless(registry, stop) if args.json else live_view(registry, console, stop)
+    tasks = [poll_status_async(registry, concurrency=args.concurrency, stop=stop), view]
+    if args.sweep:
+        # the JSON lines on stdout stay machine readable, sweep summaries go to stderr
+        log = Console(stderr=True) if args.json else console
+        tasks.append(sweep_periodically(registry, args.sweep, stop, args.sweep_interval, args.sweep_concurrency, log))
+    if not args.no_cache:
+        tasks.append(persist(registry, args.cache, stop, max_age_sec=args.max_age_hours * 3600))
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        if not args.no_cache:
+            save_cache(args.cache, registry.snapshot())
 
 
 def main() -> None:
+    parser = argparse.ArgumentParser(description="Find robots on the LAN with mDNS or a subnet sweep and watch their network status.")
+    parser.add_argument("--json", action="store_true", help="headless, write a JSON line per device change to stdout")
+    parser.add_argument("--duration", type=float, default=0.0, help="stop after this many seconds (0 runs until Ctrl-C)")
+    parser.add_argument("--concurrency", type=int, default=32, help="status requests in flight at once")
+    parser.add_argument("--cache", type=Path, default=CACHE_PATH, help="where devices are remembered between launches")
+    parser.add_argument("--no_cache", action="store_true", help="start empty and do not save")
+    parser.add_argument(
+        "--max_age_hours", type=float, default=CACHE_MAX_AGE_SEC / 3600, help="forget devices that have not answered for this long"
+    )
+    parser.add_argument("--sweep", action="append", default=[], metavar="CIDR", help="also probe every address in this range, repeatable")
+    parser.add_argument("--sweep_interval", type=float, default=300.0, help="seconds between sweeps (0 sweeps once)")
+    parser.add_argument("--sweep_concurrency", type=int, default=SWEEP_CONCURRENCY, help="probes in flight at once")
+    args = parser.parse_args()
+    try:
+        sweep_hosts(args.sweep)
+    except ValueError as e:
+        parser.error(str(e))
+
     console = Console()
+    registry = DeviceRegistry()
+    if not args.no_cache:
+        # show what was known last time right away, the poller revalidates every entry first thing
+        registry.restore(load_cache(args.cache, max_age_sec=args.max_age_hours * 3600))
     # Start Zeroconf discovery.
     zeroconf = Zeroconf()
-    listener = MyListener()
-    ServiceBrowser(zeroconf, "_http._tcp.local.", listener)
-
-    # Start the async polling loop in a separate thread.
-    loop = asyncio.new_event_loop()
-    threading.Thread(target=start_async_loop, args=(loop,), daemon=True).start()
+    ServiceBrowser(zeroconf, "_http._tcp.local.", MyListener(registry))
 
     try:
-        with Live(
-            generate_live_group(), console=console, refresh_per_second=4, screen=True
-        ) as live:
-            while True:
-                live.update(generate_live_group())
-                time.sleep(0.25)
+        asyncio.run(run(args, registry, console))
     except KeyboardInterrupt:
         console.print("\n[bold red]Exiting...[/bold red]")
     finally:
         zeroconf.close()
-        loop.stop()
 
 
 if __name__ == "__main__":
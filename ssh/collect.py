@@ -0,0 +1,169 @@
+"""Pull /data from many robots at once, one streamed tar per robot and a manifest of what arrived.
+
+    uv run python -m ssh.collect --robot 192.168.50.89 --robot bay-2=192.168.50.90 --output results/triage
+
+paramiko blocks, so each robot gets a worker thread and at most --concurrency robots stream at once.
+Sessions come from the shared SessionPool, a second collection in the same process reuses them.
+"""
+
+import json
+import time
+from collections import Counter
+from collections.abc import Iterable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from clients.fleet import Robot
+from freeze.base_cli import BaseCli
+from rich.table import Table
+from ssh.sessions import SessionPool, sessions
+from ssh.ssh import DATA_DIR, Compression, StreamStats, console, stream_data, stream_progress
+
+MANIFEST_NAME = "manifest.json"
+
+
+@dataclass
+class Collected:
+    """What came back from one robot, or why nothing did."""
+
+    robot: Robot
+    path: Path
+    elapsed_sec: float = 0.0
+    stats: StreamStats = field(default_factory=StreamStats)
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "name": self.robot.name,
+            "host": self.robot.host,
+            "file": self.path.name,
+            "bytes": self.stats.compressed_bytes,
+            "uncompressed_bytes": self.stats.uncompressed_bytes,
+            "expected_bytes": self.stats.expected_bytes,
+            "duration_sec": round(self.elapsed_sec, 3),
+            "sha256": self.stats.sha256,
+            "warning": self.stats.warning or None,
+            "error": self.error,
+        }
+
+
+def archive_stems(robots: Sequence[Robot]) -> list[str]:
+    """A file name stem per robot, the name unless two robots share it, then name-host, then a counter on top."""
+    names = Counter(robot.name for robot in robots)
+    stems = [robot.name if names[robot.name] == 1 else f"{robot.name}-{robot.host}" for robot in robots]
+    repeats = Counter(stems)
+    seen: Counter[str] = Counter()
+    unique = []
+    for stem in stems:
+        seen[stem] += 1
+        unique.append(stem if repeats[stem] == 1 else f"{stem}-{seen[stem]}")
+    return unique
+
+
+def collect(
+    robots: Iterable[Robot],
+    output_dir: Path,
+    compression: str = Compression.GZIP,
+    level: int = 6,
+    concurrency: int = 8,
+    remote_path: str = DATA_DIR,
+    pool: SessionPool = sessions,
+) -> list[Collected]:
+    """
+    Stream remote_path from every robot into output_dir in parallel with a progress bar each,
+    then write manifest.json next to the archives. A robot that fails is recorded, without a partial
+    archive, and the others carry on.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    started = time.strftime("%Y%m%d-%H%M%S")
+    robots = list(robots)
+    results = [
+        Collected(robot=robot, path=output_dir / f"{stem}-{started}{Compression.SUFFIXES[compression]}")
+        for robot, stem in zip(robots, archive_stems(robots))
+    ]
+    with stream_progress() as progress:
+        # every robot is on screen from the start, waiting ones simply have not started
+        tasks = {id(result): progress.add_task(f"[sky_blue3]{result.robot.name}", start=False) for result in results}
+
+        def collect_one(result: Collected) -> None:
+            task = tasks[id(result)]
+            progress.start_task(task)
+            start = time.perf_counter()
+            try:
+                with pool.session(result.robot.host) as ssh_client:
+                    result.stats = stream_data(
+                        ssh_client,
+                        result.path,
+                        compression=compression,
+                        level=level,
+                        remote_path=remote_path,
+                        progress=progress,
+                        task_id=task,
+                    )
+                progress.update(task, description=f"[green]{result.robot.name}")
+            except Exception as e:
+                result.error = f"{type(e).__name__}: {e}"
+                result.path.unlink(missing_ok=True)
+                progress.update(task, description=f"[bold red]{result.robot.name} {type(e).__name__}")
+            result.elapsed_sec = time.perf_counter() - start
+
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as workers:
+            # list() surfaces anything collect_one did not catch
+            list(workers.map(collect_one, results))
+    write_manifest(output_dir / MANIFEST_NAME, results, compression)
+    return results
+
+
+def write_manifest(path: Path, results: list[Collected], compression: str) -> None:
+    manifest = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "compression": compression,
+        "robots": [result.to_json() for result in results],
+    }
+    path.write_text(json.dumps(manifest, indent=2) + "\n")
+
+
+def collected_table(results: list[Collected]) -> Table:
+    table = Table(title=f"/data from {sum(result.ok for result in results)}/{len(results)} robots")
+    for header in ["Robot", "File", "MB", "Tar MB", "Seconds", "sha256 / error"]:
+        table.add_column(header)
+    for result in results:
+        style = "green" if result.ok else "bold red"
+        table.add_row(
+            f"[{style}]{result.robot.name}",
+            result.path.name if result.ok else "",
+            f"{result.stats.compressed_bytes / 1e6:.1f}",
+            f"{result.stats.uncompressed_bytes / 1e6:.1f}",
+            f"{result.elapsed_sec:.1f}",
+            result.stats.sha256[:16] if result.ok else str(result.error)[:80],
+        )
+    return table
+
+
+if __name__ == "__main__":
+    cli = BaseCli()
+    cli.parser.description = """
+Stream /data from many robots in parallel into one directory with a manifest.json of sizes, durations and sha256s, for example
+    --robot 192.168.50.89 --robot bay-2=192.168.50.90 --output results/triage
+--robot_ip is added to the --robot list.
+"""
+    cli.parser.add_argument("--robot", action="append", default=[], metavar="[NAME=]HOST", help="repeatable")
+    cli.parser.add_argument("--output", type=Path, default=Path("results") / "collected")
+    cli.parser.add_argument("--compression", choices=Compression.CHOICES, default=Compression.GZIP)
+    cli.parser.add_argument("--level", type=int, default=6, choices=range(1, 10))
+    cli.parser.add_argument("--concurrency", type=int, default=8, help="robots streaming at once")
+    args = cli.parser.parse_args()
+    robots = [Robot.parse(spec) for spec in args.robot]
+    if args.robot_ip:
+        robots.append(Robot(name=args.robot_ip, host=args.robot_ip))
+    if not robots:
+        cli.parser.error("no robots, pass --robot or --robot_ip")
+    collected = collect(robots, args.output, compression=args.compression, level=args.level, concurrency=args.concurrency)
+    console.print(collected_table(collected))
+    console.print(f"manifest written to {args.output / MANIFEST_NAME}")
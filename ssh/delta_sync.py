@@ -0,0 +1,183 @@
+"""Bring a directory on the robot in line with a local one, sending only files that changed.
+
+Files are compared the way rsync's quick check does: a different size means changed, the same size and
+mtime means unchanged, and anything in between is settled by sha256 on both sides. Uploaded files get
+the local mtime so the next sync skips them without hashing. Each upload lands under a temporary name
+and is renamed into place, then every uploaded file is hashed on the robot and checked.
+
+    summary = delta_sync(ssh_client, Path("results/opentrons_robot_server"), "/data/opentrons_robot_server")
+"""
+
+import hashlib
+import shlex
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path, PurePosixPath
+
+import paramiko
+from rich.progress import Progress, TaskID
+from ssh.sessions import run
+
+HASH_CHUNK_SIZE = 1024 * 1024
+# keep each remote command line well under ARG_MAX
+PATHS_PER_COMMAND = 200
+
+
+@dataclass(frozen=True)
+class FileEntry:
+    size: int
+    mtime: int
+
+
+Manifest = dict[str, FileEntry]
+
+
+@dataclass
+class SyncPlan:
+    upload: list[str] = field(default_factory=list)
+    delete: list[str] = field(default_factory=list)
+    unchanged: int = 0
+    # files whose size matched but mtime did not, hashed on both sides to decide
+    hashed: int = 0
+
+
+@dataclass
+class SyncSummary:
+    uploaded: int = 0
+    deleted: int = 0
+    unchanged: int = 0
+    hashed: int = 0
+    bytes_sent: int = 0
+    elapsed_sec: float = 0.0
+
+    def describe(self) -> str:
+        return (
+            f"{self.uploaded} uploaded ({self.bytes_sent / 1e6:.1f} MB), {self.deleted} deleted, {self.unchanged} unchanged "
+            f"({self.hashed} checked by hash) in {self.elapsed_sec:.1f}s"
+        )
+
+
+def _batches(paths: list[str]) -> list[list[str]]:
+    return [paths[i : i + PATHS_PER_COMMAND] for i in range(0, len(paths), PATHS_PER_COMMAND)]
+
+
+def local_manifest(root: Path) -> Manifest:
+    manifest: Manifest = {}
+    for path in sorted(root.rglob("*")):
+        if path.is_file():
+            stat = path.stat()
+            manifest[path.relative_to(root).as_posix()] = FileEntry(size=stat.st_size, mtime=int(stat.st_mtime))
+    return manifest
+
+
+def local_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def parse_remote_manifest(output: str) -> Manifest:
+    """Lines of stat -c '%s %Y %n' run from the root, names are ./relative."""
+    manifest: Manifest = {}
+    for line in output.splitlines():
+        size, mtime, name = line.split(" ", 2)
+        manifest[name.removeprefix("./")] = FileEntry(size=int(size), mtime=int(mtime))
+    return manifest
+
+
+def remote_manifest(ssh_client: paramiko.SSHClient, remote_root: str) -> Manifest:
+    """Every file under remote_root, empty if it does not exist yet."""
+    root = shlex.quote(remote_root)
+    return parse_remote_manifest(run(ssh_client, f"if [ -d {root} ]; then cd {root} && find . -type f -exec stat -c '%s %Y %n' {{}} +; fi"))
+
+
+def remote_hashes(ssh_client: paramiko.SSHClient, remote_root: str, paths: list[str]) -> dict[str, str]:
+    hashes: dict[str, str] = {}
+    for batch in _batches(paths):
+        quoted = " ".join(shlex.quote(f"./{path}") for path in batch)
+        for line in run(ssh_client, f"cd {shlex.quote(remote_root)} && sha256sum -- {quoted}").splitlines():
+            digest, name = line.split(maxsplit=1)
+            hashes[name.lstrip("*").removeprefix("./")] = digest
+    return hashes
+
+
+def plan(local_root: Path, local: Manifest, remote: Manifest, hash_remote: Callable[[list[str]], dict[str, str]]) -> SyncPlan:
+    """What to upload and delete so remote matches local, hashing only files the quick check cannot settle."""
+    result = SyncPlan(delete=sorted(set(remote) - set(local)))
+    undecided: list[str] = []
+    for path, entry in local.items():
+        theirs = remote.get(path)
+        if theirs is None or theirs.size != entry.size:
+            result.upload.append(path)
+        elif theirs.mtime == entry.mtime:
+            result.unchanged += 1
+        else:
+            undecided.append(path)
+    if undecided:
+        result.hashed = len(undecided)
+        theirs_hashed = hash_remote(undecided)
+        for path in undecided:
+            if theirs_hashed.get(path) == local_hash(local_root / path):
+                result.unchanged += 1
+            else:
+                result.upload.append(path)
+    result.upload.sort()
+    return result
+
+
+def delta_sync(
+    ssh_client: paramiko.SSHClient,
+    local_root: Path,
+    remote_root: str,
+    progress: Progress | None = None,
+    task_id: TaskID | None = None,
+) -> SyncSummary:
+    """
+    Make remote_root match local_root: upload new and changed files, delete ones that are gone locally,
+    then verify the uploads by hash. Raises RuntimeError if a file on the robot does not match.
+    """
+    start = time.perf_counter()
+    local = local_manifest(local_root)
+    sync_plan = plan(
+        local_root, local, remote_manifest(ssh_client, remote_root), lambda paths: remote_hashes(ssh_client, remote_root, paths)
+    )
+    summary = SyncSummary(unchanged=sync_plan.unchanged, hashed=sync_plan.hashed)
+    total_bytes = sum(local[path].size for path in sync_plan.upload)
+    if progress is not None and task_id is not None:
+        progress.update(task_id, total=total_bytes, completed=0)
+
+    for batch in _batches(sync_plan.delete):
+        run(ssh_client, f"cd {shlex.quote(remote_root)} && rm -f -- " + " ".join(shlex.quote(f"./{path}") for path in batch))
+    summary.deleted = len(sync_plan.delete)
+
+    if sync_plan.upload:
+        directories = sorted({str(PurePosixPath(remote_root, path).parent) for path in sync_plan.upload})
+        run(ssh_client, "mkdir -p -- " + " ".join(shlex.quote(directory) for directory in directories))
+        sftp = ssh_client.open_sftp()
+        try:
+            for path in sync_plan.upload:
+                sent_before = summary.bytes_sent
+
+                def callback(transferred: int, _total: int) -> None:
+                    if progress is not None and task_id is not None:
+                        progress.update(task_id, completed=sent_before + transferred)
+
+                remote_path = str(PurePosixPath(remote_root, path))
+                temporary = f"{remote_path}.delta-sync"
+                sftp.put(str(local_root / path), temporary, callback=callback)
+                sftp.utime(temporary, (local[path].mtime, local[path].mtime))
+                sftp.posix_rename(temporary, remote_path)
+                summary.bytes_sent += local[path].size
+                summary.uploaded += 1
+        finally:
+            sftp.close()
+
+        theirs = remote_hashes(ssh_client, remote_root, sync_plan.upload)
+        mismatched = [path for path in sync_plan.upload if theirs.get(path) != local_hash(local_root / path)]
+        if mismatched:
+            raise RuntimeError(f"{len(mismatched)} files do not match after upload: {', '.join(mismatched[:5])}")
+    summary.elapsed_sec = time.perf_counter() - start
+    return summary
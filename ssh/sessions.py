@@ -0,0 +1,183 @@
+"""Authenticated SSH sessions to robots, kept open and reused across actions.
+
+The handshake and key exchange dominate short remote operations, so a SessionPool keeps one
+paramiko client per robot ip alive with keepalives and hands it out again. Sessions idle for
+longer than idle_sec are closed by a background reaper, and dead ones are replaced on the next use.
+
+    with sessions.session("192.168.50.89") as ssh_client:
+        stream_data(ssh_client, Path("data.tar.gz"))
+    sessions.run("192.168.50.89", "systemctl restart opentrons-robot-server")
+"""
+
+import atexit
+import contextlib
+import functools
+import threading
+import time
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+
+import paramiko
+
+KEY_FILE = Path("results/key")
+KEEPALIVE_SEC = 15
+IDLE_SEC = 300.0
+
+
+@functools.cache
+def load_key(key_file: Path) -> paramiko.RSAKey:
+    """Parsed once per process, decoding the key is most of the local cost of a connect."""
+    assert key_file.is_file()
+    return paramiko.RSAKey.from_private_key_file(str(key_file))
+
+
+def connect(robot_ip: str, key_file: Path = KEY_FILE, keepalive_sec: int = KEEPALIVE_SEC) -> paramiko.SSHClient:
+    """A new SSH session as root on the robot, authenticated with results/key."""
+    ssh_client = paramiko.SSHClient()
+    ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    # https://medium.com/@michal_73101/paramiko-and-openssh-generated-keys-26524dccb259
+    # ssh-keygen -m PEM -t rsa -b 2048 -f id_paramiko
+    # https://support.opentrons.com/en/articles/3203681-setting-up-ssh-access-to-your-ot-2
+    # connect robot via usb and get ip
+    # from ~/.ssh
+    # curl \
+    # -H 'Content-Type: application/json' \
+    # -d "{\"key\":\"$(cat id_paramiko.pub)\"}" \
+    # $ROBOT_IP:31950/server/ssh_keys
+    disabled_algorithms = {"pubkeys": ["rsa-sha2-512", "rsa-sha2-256"]}
+    # must have disabled_algorithms so it uses the 2048?
+    ssh_client.connect(hostname=robot_ip, username="root", pkey=load_key(key_file.resolve()), disabled_algorithms=disabled_algorithms)
+    transport = ssh_client.get_transport()
+    if transport is not None:
+        # robots sit behind NAT and Wi-Fi that drop quiet connections
+        transport.set_keepalive(keepalive_sec)
+    return ssh_client
+
+
+def run(ssh_client: paramiko.SSHClient, command: str) -> str:
+    """stdout of command, raising RuntimeError if it exits non-zero."""
+    _, stdout, stderr = ssh_client.exec_command(command)
+    output = stdout.read().decode(errors="replace")
+    exit_status = stdout.channel.recv_exit_status()
+    if exit_status != 0:
+        raise RuntimeError(f"{command} exited {exit_status}: {stderr.read().decode(errors='replace').strip()}")
+    return output
+
+
+def _alive(ssh_client: paramiko.SSHClient) -> bool:
+    transport = ssh_client.get_transport()
+    return transport is not None and transport.is_active()
+
+
+@dataclass
+class _Session:
+    client: paramiko.SSHClient
+    last_used: float
+    in_use: int = 0
+
+
+@dataclass
+class SessionStats:
+    connects: int = 0
+    reuses: int = 0
+    evictions: int = 0
+
+
+class SessionPool:
+    """One live SSH session per robot ip, safe to share between threads."""
+
+    def __init__(self, connector: Callable[[str], paramiko.SSHClient] = connect, idle_sec: float = IDLE_SEC) -> None:
+        self.connector = connector
+        self.idle_sec = idle_sec
+        self.stats = SessionStats()
+        self._sessions: dict[str, _Session] = {}
+        self._lock = threading.Lock()
+        # per robot, so two threads wanting the same robot connect once and different robots connect in parallel
+        self._connect_locks: dict[str, threading.Lock] = {}
+        self._stop = threading.Event()
+        self._reaper: threading.Thread | None = None
+
+    def _acquire(self, robot_ip: str) -> paramiko.SSHClient:
+        with self._lock:
+            connect_lock = self._connect_locks.setdefault(robot_ip, threading.Lock())
+        with connect_lock:
+            with self._lock:
+                session = self._sessions.get(robot_ip)
+                if session is not None and _alive(session.client):
+                    session.in_use += 1
+                    self.stats.reuses += 1
+                    return session.client
+                stale = self._sessions.pop(robot_ip, None)
+            if stale is not None:
+                stale.client.close()
+            client = self.connector(robot_ip)
+            with self._lock:
+                self._sessions[robot_ip] = _Session(client=client, last_used=time.monotonic(), in_use=1)
+                self.stats.connects += 1
+                self._start_reaper()
+            return client
+
+    def _release(self, robot_ip: str, client: paramiko.SSHClient) -> None:
+        with self._lock:
+            session = self._sessions.get(robot_ip)
+            if session is not None and session.client is client:
+                session.in_use -= 1
+                session.last_used = time.monotonic()
+
+    @contextlib.contextmanager
+    def session(self, robot_ip: str) -> Iterator[paramiko.SSHClient]:
+        """The robot's session, connecting only if there is no live one."""
+        client = self._acquire(robot_ip)
+        try:
+            yield client
+        finally:
+            self._release(robot_ip, client)
+
+    def run(self, robot_ip: str, command: str) -> str:
+        with self.session(robot_ip) as ssh_client:
+            return run(ssh_client, command)
+
+    def evict_idle(self, now: float | None = None) -> int:
+        """Close sessions nobody is using that have been idle for idle_sec, returning how many."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            idle = [ip for ip, session in self._sessions.items() if not session.in_use and now - session.last_used >= self.idle_sec]
+            evicted = [self._sessions.pop(ip) for ip in idle]
+            self.stats.evictions += len(evicted)
+        for session in evicted:
+            session.client.close()
+        return len(evicted)
+
+    def close(self, robot_ip: str) -> None:
+        with self._lock:
+            session = self._sessions.pop(robot_ip, None)
+        if session is not None:
+            session.client.close()
+
+    def close_all(self) -> None:
+        self._stop.set()
+        with self._lock:
+            sessions, self._sessions = list(self._sessions.values()), {}
+        for session in sessions:
+            session.client.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+    def _start_reaper(self) -> None:
+        """Called holding _lock."""
+        if self._reaper is not None and self._reaper.is_alive():
+            return
+        self._stop.clear()
+        self._reaper = threading.Thread(target=self._reap, name="ssh-session-reaper", daemon=True)
+        self._reaper.start()
+
+    def _reap(self) -> None:
+        while not self._stop.wait(max(1.0, self.idle_sec / 2)):
+            self.evict_idle()
+
+
+sessions = SessionPool()
+atexit.register(sessions.close_all)
@@ -1,50 +1,300 @@
+import bz2
+import hashlib
+import io
+import lzma
+import shlex
+import tarfile
 import time
+import zlib
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Tuple
+from typing import Callable, Protocol, Tuple
 
 import paramiko
 from rich.console import Console
 from rich.panel import Panel
-from rich.progress import BarColumn, Progress, TaskID, TextColumn
+from rich.progress import BarColumn, DownloadColumn, Progress, TaskID, TextColumn, TimeRemainingColumn, TransferSpeedColumn
 from rich.theme import Theme
 from scp import SCPClient
+from ssh.delta_sync import delta_sync
+from ssh.sessions import SessionPool, run, sessions
 from wizard.wizard import Wizard
 
 
 class Action:
     GET = "data.get"
+    GET_STREAM = "data.get.stream"
+    GET_EXTRACT = "data.get.extract"
     PUT = "data.put"
     PUT_DB = "data.put.db"
     DELETE = "data.delete"
-    CHOICES = [GET, PUT, PUT_DB, DELETE]
+    CHOICES = [GET, GET_STREAM, GET_EXTRACT, PUT, PUT_DB, DELETE]
 
 
+class Compression:
+    """How the robot compresses a streamed tar, the robot's CPU is usually the bottleneck so gzip -1 to -6 is a good default."""
+
+    NONE = "none"
+    GZIP = "gzip"
+    BZIP2 = "bzip2"
+    XZ = "xz"
+    CHOICES = [NONE, GZIP, BZIP2, XZ]
+    SUFFIXES = {NONE: ".tar", GZIP: ".tar.gz", BZIP2: ".tar.bz2", XZ: ".tar.xz"}
+    TARFILE_MODES = {NONE: "r|", GZIP: "r|gz", BZIP2: "r|bz2", XZ: "r|xz"}
+
+
+DATA_DIR = "/data"
+LOCAL_DB_DIR = Path("results/opentrons_robot_server")
+REMOTE_DB_DIR = "/data/opentrons_robot_server"
+CHUNK_SIZE = 256 * 1024
+
 custom_theme = Theme({"info": "dim cyan", "warning": "magenta", "danger": "bold red"})
 console = Console(theme=custom_theme)
 
 
-def ssh(_robot_ip: str, action: str) -> None:
-    """Do the work."""
-
-    ssh_client = paramiko.SSHClient()
-    ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-    # https://medium.com/@michal_73101/paramiko-and-openssh-generated-keys-26524dccb259
-    # ssh-keygen -m PEM -t rsa -b 2048 -f id_paramiko
-    # https://support.opentrons.com/en/articles/3203681-setting-up-ssh-access-to-your-ot-2
-    # connect robot via usb and get ip
-    # from ~/.ssh
-    # curl \
-    # -H 'Content-Type: application/json' \
-    # -d "{\"key\":\"$(cat id_paramiko.pub)\"}" \
-    # $ROBOT_IP:31950/server/ssh_keys
-
-    # local
-    key_file: Path = Path("results/key")
-    pkey = paramiko.RSAKey.from_private_key_file(str(key_file.resolve()))
-    assert key_file.is_file()
-    disabled_algorithms = {"pubkeys": ["rsa-sha2-512", "rsa-sha2-256"]}
-    # must have disabled_algorithms so it uses the 2048?
-    ssh_client.connect(hostname=_robot_ip, username="root", pkey=pkey, disabled_algorithms=disabled_algorithms)
+# ---------------- Streaming /data ----------------
+
+
+class Channel(Protocol):
+    """The part of paramiko.Channel streaming needs."""
+
+    def exec_command(self, command: str) -> None: ...
+    def recv(self, nbytes: int) -> bytes: ...
+    def recv_stderr_ready(self) -> bool: ...
+    def recv_stderr(self, nbytes: int) -> bytes: ...
+    def recv_exit_status(self) -> int: ...
+    def close(self) -> None: ...
+
+
+@dataclass
+class StreamStats:
+    compressed_bytes: int = 0
+    uncompressed_bytes: int = 0
+    # du of the remote directory, the tar is a little bigger because of its headers
+    expected_bytes: int | None = None
+    elapsed_sec: float = 0.0
+    # of the file written, empty when extracting
+    sha256: str = ""
+    # tar exited 1, usually "file changed as we read it" on a live /data, the archive is still complete
+    warning: str = ""
+
+    @property
+    def throughput(self) -> float:
+        """Bytes of tar per second, what the ETA is based on."""
+        return self.uncompressed_bytes / self.elapsed_sec if self.elapsed_sec else 0.0
+
+    def describe(self) -> str:
+        ratio = self.uncompressed_bytes / self.compressed_bytes if self.compressed_bytes else 0.0
+        return (
+            f"{self.uncompressed_bytes / 1e6:.1f} MB ({self.compressed_bytes / 1e6:.1f} MB over the wire, {ratio:.1f}x) "
+            f"in {self.elapsed_sec:.1f}s, {self.throughput / 1e6:.1f} MB/s"
+        )
+
+
+TAR_STATUS_PREFIX = "tar exited "
+
+
+def tar_command(remote_path: str, compression: str, level: int) -> str:
+    """
+    Write the tar to stdout, nothing is written on the robot.
+    tar's own exit status goes to stderr, a pipeline only reports the compressor's and not every shell has pipefail.
+    """
+    tar = f"{{ tar -C {shlex.quote(remote_path)} -cf - .; echo {TAR_STATUS_PREFIX}$? >&2; }}"
+    if compression == Compression.NONE:
+        return tar
+    return f"{tar} | {compression} -{level} -c"
+
+
+def _tar_status(stderr: str) -> tuple[int | None, str]:
+    """tar's exit status from tar_command's stderr and the rest of stderr, None if tar never reported one."""
+    status = None
+    lines = []
+    for line in stderr.splitlines():
+        if line.startswith(TAR_STATUS_PREFIX) and line.removeprefix(TAR_STATUS_PREFIX).isdigit():
+            status = int(line.removeprefix(TAR_STATUS_PREFIX))
+        else:
+            lines.append(line)
+    return status, "\n".join(lines).strip()
+
+
+def remote_size(ssh_client: paramiko.SSHClient, remote_path: str = DATA_DIR) -> int | None:
+    """Bytes under remote_path from du, None if it could not be measured."""
+    _, stdout, _ = ssh_client.exec_command(f"du -sk {shlex.quote(remote_path)}")
+    try:
+        return int(stdout.read().split()[0]) * 1024
+    except (IndexError, ValueError):
+        return None
+
+
+class _Meter:
+    """Count compressed and uncompressed bytes as chunks arrive.
+
+    Decompressing to count is cheap next to the network, and it is what makes the ETA honest: the
+    compression ratio of /data changes a lot between logs and sqlite files. Output is pulled in bounded
+    steps so a run of zeros never balloons memory.
+    """
+
+    STEP = 1024 * 1024
+
+    def __init__(self, compression: str, stats: StreamStats) -> None:
+        self.compression = compression
+        self.stats = stats
+        self._zlib = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS) if compression == Compression.GZIP else None
+        self._other: bz2.BZ2Decompressor | lzma.LZMADecompressor | None = None
+        if compression == Compression.BZIP2:
+            self._other = bz2.BZ2Decompressor()
+        elif compression == Compression.XZ:
+            self._other = lzma.LZMADecompressor()
+
+    def add(self, chunk: bytes) -> None:
+        self.stats.compressed_bytes += len(chunk)
+        if self._zlib is not None:
+            count = len(self._zlib.decompress(chunk, self.STEP))
+            while self._zlib.unconsumed_tail:
+                count += len(self._zlib.decompress(self._zlib.unconsumed_tail, self.STEP))
+        elif self._other is not None:
+            count = len(self._other.decompress(chunk, self.STEP))
+            while not self._other.eof and not self._other.needs_input:
+                count += len(self._other.decompress(b"", self.STEP))
+        else:
+            count = len(chunk)
+        self.stats.uncompressed_bytes += count
+
+
+class _ChannelReader(io.RawIOBase):
+    """A read-only file over the channel's stdout so tarfile can extract straight from it."""
+
+    def __init__(self, channel: Channel, meter: _Meter, on_chunk: Callable[[StreamStats], None] | None, start: float) -> None:
+        self.channel = channel
+        self.meter = meter
+        self.on_chunk = on_chunk
+        self.start = start
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: memoryview) -> int:  # type: ignore[override]
+        chunk = self.channel.recv(min(len(buffer), CHUNK_SIZE))
+        buffer[: len(chunk)] = chunk
+        if chunk:
+            self.meter.add(chunk)
+            self.meter.stats.elapsed_sec = time.perf_counter() - self.start
+            if self.on_chunk is not None:
+                self.on_chunk(self.meter.stats)
+        return len(chunk)
+
+
+def stream_tar(
+    channel: Channel,
+    destination: Path,
+    compression: str = Compression.GZIP,
+    level: int = 6,
+    extract: bool = False,
+    remote_path: str = DATA_DIR,
+    expected_bytes: int | None = None,
+    on_chunk: Callable[[StreamStats], None] | None = None,
+) -> StreamStats:
+    """
+    Stream a tar of remote_path over channel into destination, a file or with extract a directory.
+    on_chunk gets the running totals after every chunk, for progress and ETA.
+    Raises RuntimeError if tar or the compressor failed. tar exiting 1 (files changed while being read)
+    is only a warning, kept in stats.warning.
+    """
+    stats = StreamStats(expected_bytes=expected_bytes)
+    start = time.perf_counter()
+    channel.exec_command(tar_command(remote_path, compression, level))
+    reader = io.BufferedReader(_ChannelReader(channel, _Meter(compression, stats), on_chunk, start), buffer_size=CHUNK_SIZE)
+    stderr = bytearray()
+    try:
+        if extract:
+            destination.mkdir(parents=True, exist_ok=True)
+            with tarfile.open(fileobj=reader, mode=Compression.TARFILE_MODES[compression]) as archive:  # type: ignore[call-overload]
+                archive.extractall(destination, filter="data")
+        else:
+            digest = hashlib.sha256()
+            with open(destination, "wb") as f:
+                while chunk := reader.read(CHUNK_SIZE):
+                    digest.update(chunk)
+                    f.write(chunk)
+            stats.sha256 = digest.hexdigest()
+        # drain whatever is left, a tar's trailing padding is not read by tarfile
+        while reader.read(CHUNK_SIZE):
+            pass
+        while channel.recv_stderr_ready():
+            stderr += channel.recv_stderr(CHUNK_SIZE)
+        exit_status = channel.recv_exit_status()
+    finally:
+        channel.close()
+    stats.elapsed_sec = time.perf_counter() - start
+    tar_status, messages = _tar_status(stderr.decode(errors="replace"))
+    if exit_status != 0 or tar_status is None or tar_status > 1:
+        status = exit_status if tar_status is None or tar_status <= 1 else tar_status
+        raise RuntimeError(f"{tar_command(remote_path, compression, level)} exited {status}: {messages}")
+    if tar_status == 1:
+        stats.warning = messages or "tar exited 1"
+    return stats
+
+
+def stream_data(
+    ssh_client: paramiko.SSHClient,
+    destination: Path,
+    compression: str = Compression.GZIP,
+    level: int = 6,
+    extract: bool = False,
+    remote_path: str = DATA_DIR,
+    progress: Progress | None = None,
+    task_id: TaskID | None = None,
+) -> StreamStats:
+    """Stream remote_path from the robot with no temporary archive on its storage, reporting to a progress task."""
+    expected_bytes = remote_size(ssh_client, remote_path)
+
+    def on_chunk(stats: StreamStats) -> None:
+        if progress is not None and task_id is not None:
+            # the tar headers can push past du's estimate
+            total = max(expected_bytes or 0, stats.uncompressed_bytes) or None
+            progress.update(task_id, completed=stats.uncompressed_bytes, total=total)
+
+    transport = ssh_client.get_transport()
+    assert transport is not None
+    stats = stream_tar(
+        transport.open_session(),
+        destination,
+        compression=compression,
+        level=level,
+        extract=extract,
+        remote_path=remote_path,
+        expected_bytes=expected_bytes,
+        on_chunk=on_chunk,
+    )
+    if progress is not None and task_id is not None:
+        progress.update(task_id, completed=stats.uncompressed_bytes, total=stats.uncompressed_bytes)
+    return stats
+
+
+def stream_progress() -> Progress:
+    return Progress(
+        TextColumn("{task.description}"), BarColumn(), DownloadColumn(), TransferSpeedColumn(), TimeRemainingColumn(), console=console
+    )
+
+
+def ssh(_robot_ip: str, action: str, compression: str = Compression.GZIP, level: int = 6, pool: SessionPool = sessions) -> None:
+    """Do the work on the robot's pooled session, so chained actions only pay for the handshake once."""
+    with pool.session(_robot_ip) as ssh_client:
+        run_action(ssh_client, _robot_ip, action, compression=compression, level=level)
+
+
+def run_action(ssh_client: paramiko.SSHClient, _robot_ip: str, action: str, compression: str = Compression.GZIP, level: int = 6) -> None:
+    if action in [Action.GET_STREAM, Action.GET_EXTRACT]:
+        extract = action == Action.GET_EXTRACT
+        destination = Path(f"{str(time.time_ns())}data" + ("" if extract else Compression.SUFFIXES[compression]))
+        console.print(Panel(f"[bold green] Streaming the /data directory to {destination}.[/]", style="bold magenta"))
+        with stream_progress() as progresso:
+            task = progresso.add_task(f"[red]{_robot_ip}")
+            stats = stream_data(
+                ssh_client, destination, compression=compression, level=level, extract=extract, progress=progresso, task_id=task
+            )
+        console.print(f"[bold purple]({_robot_ip}) {destination} {stats.describe()}")
+        return
     text_column = TextColumn("{task.description}")
     bar_column = BarColumn()
     with Progress(text_column, bar_column, console=console) as progresso:
@@ -84,37 +334,14 @@ def ssh(_robot_ip: str, action: str) -> None:
                 with SCPClient(ssh_client.get_transport(), progress4=progress) as scp:
                     scp.get("/data/data.tar.gz", local_path=f"{str(time.time_ns())}data.tar.gz")
             case Action.PUT_DB:
-                upload_task = progresso.add_task("[red]Uploading...", start=False)
-                current_task_id = upload_task
-                # stop the robot-server
-                stdin, stdout, stderr = ssh_client.exec_command("systemctl stop opentrons-robot-server")
-                exit_status = stdout.channel.recv_exit_status()  # Blocking call
-                # delete the database dir
-                stdin, stdout, stderr = ssh_client.exec_command("rm -rf /data/opentrons_robot_server")
-                exit_status = stdout.channel.recv_exit_status()  # Blocking call
-                # push the new dir
-                with SCPClient(ssh_client.get_transport(), progress4=progress) as scp:
-                    scp.put("results/opentrons_robot_server", "/data/opentrons_robot_server", recursive=True)
-                # stdin, stdout, stderr = ssh_client.exec_command("cd /data && tar -xf data.tar.gz")
-                # exit_status = stdout.channel.recv_exit_status()  # Blocking call
-                # if exit_status == 0:
-                #     console.print("File Put")
-                # else:
-                #     console.print("Error", exit_status)
-                # stdin, stdout, stderr = ssh_client.exec_command("rm /data/data.tar.gz")
-                # exit_status = stdout.channel.recv_exit_status()  # Blocking call
-                # if exit_status == 0:
-                #     console.print("File Put")
-                # else:
-                #     console.print("Error", exit_status)
-                # stdin, stdout, stderr = ssh_client.exec_command("systemctl restart opentrons-robot-server")
-                # exit_status = stdout.channel.recv_exit_status()  # Blocking call
-                # if exit_status == 0:
-                #     console.print("File Put")
-                # else:
-                #     console.print("Error", exit_status)
-                # # requests.post(f"http://{robot_ip}}:31950/server/restart")
-                # # restart robot server `systemctl restart opentrons-robot-server`
+                upload_task = progresso.add_task("[red]Uploading changed files...")
+                # the database must not be written while we replace it
+                run(ssh_client, "systemctl stop opentrons-robot-server")
+                try:
+                    summary = delta_sync(ssh_client, LOCAL_DB_DIR, REMOTE_DB_DIR, progress=progresso, task_id=upload_task)
+                finally:
+                    run(ssh_client, "systemctl start opentrons-robot-server")
+                progresso.console.print(f"[bold purple]({_robot_ip}) {REMOTE_DB_DIR} {summary.describe()}, robot-server restarted")
             case Action.DELETE:
                 console.print(
                     Panel(
@@ -122,12 +349,14 @@ def ssh(_robot_ip: str, action: str) -> None:
                         style="bold magenta",
                     )
                 )
-                stdin, stdout, stderr = ssh_client.exec_command("rm -rf /data/opentrons_robot_server")
-    ssh_client.close()
+                run(ssh_client, "rm -rf /data/opentrons_robot_server")
 
 
 if __name__ == "__main__":
     wizard = Wizard(console)
     robot_ip = wizard.validate_ip()
-    action = wizard.choices(question="What action to take?", choices=Action.CHOICES, default=Action.GET)
-    ssh(_robot_ip=robot_ip, action=action)
+    action = wizard.choices(question="What action to take?", choices=Action.CHOICES, default=Action.GET_STREAM)
+    compression = Compression.GZIP
+    if action in [Action.GET_STREAM, Action.GET_EXTRACT]:
+        compression = wizard.choices(question="Compression on the robot?", choices=Compression.CHOICES, default=Compression.GZIP)
+    ssh(_robot_ip=robot_ip, action=action, compression=compression)
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta, timezone
+
+import pytest
+from clients.bulk_delete import ResourceFilter, bulk_delete
+from clients.polling import Backoff
+from clients.resilience import NO_RETRY
+from clients.robot_client import RobotClient
+from clients.robot_interactions import RobotInteractions
+from fake_robot.fake_robot import FailureRule, FakeRobot, FakeRobotConfig
+from rich.console import Console
+from util.json_body import body
+
+FAST = Backoff(initial_sec=0.001, ceiling_sec=0.001)
+CUTOFF = datetime(2024, 6, 1, 12, 0, tzinfo=UTC)
+
+
+@pytest.mark.parametrize(
+    ("created_at", "matches"),
+    [
+        ("2024-06-01T11:59:00+00:00", True),
+        ("2024-06-01T12:00:00+00:00", False),
+        # naive times are UTC, like the robot's
+        ("2024-06-01T11:59:00", True),
+        ("2024-06-01T12:01:00", False),
+        # 13:30 in UTC+2 is 11:30 UTC
+        ("2024-06-01T13:30:00+02:00", True),
+        ("yesterday", False),
+        (None, False),
+    ],
+)
+def test_created_before(created_at: str | None, matches: bool) -> None:
+    assert ResourceFilter(created_before=CUTOFF).matches({"createdAt": created_at}) is matches
+
+
+def test_naive_cutoff_is_utc() -> None:
+    cutoff = ResourceFilter(created_before=datetime(2024, 6, 1, 12, 0))
+    assert cutoff.matches({"createdAt": datetime(2024, 6, 1, 13, 0, tzinfo=timezone(timedelta(hours=2))).isoformat()})
+    assert not cutoff.matches({"createdAt": "2024-06-01T12:30:00+00:00"})
+
+
+@pytest.mark.asyncio
+async def test_bulk_delete_retries_server_errors() -> None:
+    config = FakeRobotConfig(run_count=20, failures=[FailureRule(route="DELETE /runs/{run_id}", probability=0.5, status_code=503)])
+    # no transport retries, so bulk_delete's own are the ones exercised
+    async with RobotClient.make(host="http://fake", port="31950", version="*", transport=FakeRobot(config), resilience=NO_RETRY) as client:
+        ids = [run["id"] for run in body(await client.get_runs())["data"]]
+        summary = await bulk_delete("runs", ids + ["no-such-run"], client.delete_run, concurrency=4, retries=3, backoff=FAST)
+        remaining = {run["id"] for run in body(await client.get_runs())["data"]}
+    assert summary.requested == len(ids) + 1
+    assert summary.retries > 0
+    # a 404 is as good as deleted
+    assert "no-such-run" in summary.deleted
+    assert sorted(summary.deleted + list(summary.failed)) == sorted(ids + ["no-such-run"])
+    assert remaining == set(summary.failed)
+    assert all("503" in error for error in summary.failed.values())
+    assert summary.describe().startswith(f"runs: deleted {len(summary.deleted)}/{summary.requested}, failed {len(summary.failed)}")
+
+
+@pytest.mark.asyncio
+async def test_client_errors_are_not_retried() -> None:
+    config = FakeRobotConfig(run_count=5, failures=[FailureRule(route="DELETE /runs/{run_id}", probability=1.0, status_code=409)])
+    async with RobotClient.make(host="http://fake", port="31950", version="*", transport=FakeRobot(config), resilience=NO_RETRY) as client:
+        ids = [run["id"] for run in body(await client.get_runs())["data"]]
+        summary = await bulk_delete("runs", ids, client.delete_run, retries=3, backoff=FAST)
+    assert summary.retries == 0
+    assert summary.deleted == []
+    assert set(summary.failed) == set(ids)
+
+
+@pytest.mark.asyncio
+async def test_delete_runs_with_filter() -> None:
+    async with RobotClient.make(
+        host="http://fake", port="31950", version="*", transport=FakeRobot(FakeRobotConfig(run_count=10))
+    ) as client:
+        interactions = RobotInteractions(client, console=Console(quiet=True))
+        # the new run is current and idle, the seeded ones are stopped
+        current = body(await client.post_run({"data": {}}))["data"]["id"]
+        summary = await interactions.delete_runs(ResourceFilter(statuses=frozenset(["stopped"])), show_progress=False)
+        remaining = body(await client.get_runs())["data"]
+    assert summary.failed == {}
+    assert len(summary.deleted) == 10
+    assert [run["id"] for run in remaining] == [current]
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import time
+
+import httpx
+import pytest
+from clients.command_pipeline import REJECTED, UNOBSERVED, CommandPipeline
+from clients.resilience import NO_RETRY
+from clients.robot_client import RobotClient
+from clients.robot_interactions import RobotInteractions
+from fake_robot.fake_robot import FailureRule, FakeRobot, FakeRobotConfig, Fixed
+from rich.console import Console
+
+HOME = {"data": {"commandType": "home", "params": {}}}
+
+
+@pytest.mark.asyncio
+async def test_pipelined_commands_run_back_to_back() -> None:
+    fake_robot = FakeRobot(FakeRobotConfig(default_latency=Fixed(0.01), command_duration_sec=0.05))
+    async with RobotClient.make(host="http://fake", port="31950", version="*", transport=fake_robot) as client:
+        run_id = str((await client.post_run(req_body={"data": {}})).json()["data"]["id"])
+        start = time.perf_counter()
+        report = await CommandPipeline(client, run_id).run([HOME] * 10)
+        elapsed = time.perf_counter() - start
+
+    assert report.ok
+    assert [timing.index for timing in report.timings] == list(range(10))
+    assert all(timing.status == "succeeded" for timing in report.timings)
+    # one after the other on the robot, without a round trip between them
+    assert elapsed < 10 * (0.05 + 2 * 0.01)
+    assert report.timings[0].queue_sec == pytest.approx(0, abs=0.01)
+    # the later commands wait behind the earlier ones
+    queues = [timing.queue_sec or 0.0 for timing in report.timings]
+    assert queues == sorted(queues) and queues[-1] > 0.2
+    for timing in report.timings:
+        assert timing.execution_sec == pytest.approx(0.05, abs=0.01)
+        assert timing.round_trip_sec is not None and timing.submit_sec is not None
+        assert timing.round_trip_sec >= timing.submit_sec
+
+
+@pytest.mark.asyncio
+async def test_refused_command_is_reported() -> None:
+    async with RobotClient.make(host="http://fake", port="31950", version="*", transport=FakeRobot()) as client:
+        report = await CommandPipeline(client, "no-such-run").run([HOME])
+
+    assert not report.ok
+    assert report.failed[0].status == REJECTED
+    assert report.polls == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("status_code", [404, 500])
+async def test_failed_poll_is_reported(status_code: int) -> None:
+    config = FakeRobotConfig(
+        command_duration_sec=0.05,
+        failures=[FailureRule(route="GET /runs/{run_id}/commands/{command_id}", probability=1.0, status_code=status_code)],
+    )
+    async with RobotClient.make(host="http://fake", port="31950", version="*", transport=FakeRobot(config)) as client:
+        run_id = str((await client.post_run(req_body={"data": {}})).json()["data"]["id"])
+        report = await CommandPipeline(client, run_id).run([HOME] * 2)
+
+    assert not report.ok
+    assert [timing.status for timing in report.timings] == [UNOBSERVED, UNOBSERVED]
+    assert report.polls == 2
+    for timing in report.timings:
+        assert f"returned {status_code}" in timing.error and "InjectedFailure" in timing.error
+        assert timing.round_trip_sec is not None
+
+
+@pytest.mark.asyncio
+async def test_unreachable_poll_is_reported() -> None:
+    config = FakeRobotConfig(
+        command_duration_sec=0.05,
+        failures=[FailureRule(route="GET /runs/{run_id}/commands/{command_id}", probability=1.0, error=httpx.ConnectError)],
+    )
+    async with RobotClient.make(host="http://fake", port="31950", version="*", transport=FakeRobot(config), resilience=NO_RETRY) as client:
+        run_id = str((await client.post_run(req_body={"data": {}})).json()["data"]["id"])
+        report = await CommandPipeline(client, run_id).run([HOME] * 2)
+
+    assert [timing.status for timing in report.timings] == [UNOBSERVED, UNOBSERVED]
+    assert report.polls == 2
+    assert all(timing.error.startswith("ConnectError(") for timing in report.timings)
+
+
+@pytest.mark.asyncio
+async def test_execute_commands() -> None:
+    fake_robot = FakeRobot(FakeRobotConfig(default_latency=Fixed(0.001), command_duration_sec=0.01))
+    async with RobotClient.make(host="http://fake", port="31950", version="*", transport=fake_robot) as client:
+        interactions = RobotInteractions(client, console=Console(quiet=True))
+        run_id = await interactions.force_create_new_run()
+        report = await interactions.execute_commands(run_id, [HOME] * 3, print_timing=True)
+        commands = (await client.get_run_commands(run_id)).json()["data"]
+
+    assert report.ok
+    assert [command["id"] for command in commands] == [timing.command_id for timing in report.timings]
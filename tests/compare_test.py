@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import random
+from pathlib import Path
+
+from perf.compare import main, mann_whitney_p
+from perf.histogram import LatencyHistogram, LatencyRecorder
+from perf.results import ResultSet
+from rich.console import Console
+
+
+def _result_set(path: Path, median_sec: float, seed: int) -> Path:
+    rng = random.Random(seed)
+    recorder = LatencyRecorder(name="steady")
+    for _ in range(500):
+        recorder.record("/runs", "GET", rng.lognormvariate(0, 0.3) * median_sec)
+    recorder.duration_sec = 10.0
+    ResultSet(name=path.stem, phases={"steady": recorder}).save(path)
+    return path
+
+
+def test_mann_whitney_detects_shift() -> None:
+    rng = random.Random(1)
+    same, also_same, slower = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+    for _ in range(300):
+        same.record(rng.uniform(0.01, 0.02))
+        also_same.record(rng.uniform(0.01, 0.02))
+        slower.record(rng.uniform(0.012, 0.022))
+    assert mann_whitney_p(same, also_same) > 0.05
+    assert mann_whitney_p(same, slower) < 0.001
+
+
+def test_compare_exit_code(tmp_path: Path) -> None:
+    baseline = _result_set(Path(tmp_path, "baseline.json"), median_sec=0.05, seed=1)
+    unchanged = _result_set(Path(tmp_path, "unchanged.json"), median_sec=0.05, seed=2)
+    slower = _result_set(Path(tmp_path, "slower.json"), median_sec=0.08, seed=3)
+    console = Console(quiet=True)
+    assert main([str(baseline), str(unchanged)], console=console) == 0
+    assert main([str(baseline), str(unchanged), str(slower)], console=console) == 1
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from collections.abc import AsyncGenerator
+from pathlib import Path
+
+import httpx
+import pytest
+import pytest_asyncio
+from clients.robot_client import RobotClient
+from clients.robot_interactions import RobotInteractions
+from fake_robot.fake_robot import FailureRule, FakeRobot, FakeRobotConfig, Fixed
+from rich.console import Console
+
+
+@pytest.fixture()
+def fake_robot() -> FakeRobot:
+    return FakeRobot(FakeRobotConfig(run_count=30, analysis_duration_sec=0.2, default_latency=Fixed(0.001)))
+
+
+@pytest_asyncio.fixture
+async def fake_client(fake_robot: FakeRobot) -> AsyncGenerator[RobotClient, None]:
+    async with RobotClient.make(host="http://fake", port="31950", version="*", transport=fake_robot) as client:
+        yield client
+
+
+@pytest.mark.asyncio
+async def test_health_and_runs(fake_client: RobotClient, fake_robot: FakeRobot) -> None:
+    health = await fake_client.get_health()
+    assert health.status_code == 200
+    assert health.elapsed.total_seconds() >= 0.001
+    runs = await fake_client.get_runs()
+    assert len(runs.json()["data"]) == 30
+    assert len(runs.json()["data"][0]["labwareOffsets"]) == FakeRobotConfig().offsets_per_run
+    assert fake_robot.requests["GET /runs"] == 1
+
+
+@pytest.mark.asyncio
+async def test_analysis_completes(fake_client: RobotClient, tmp_path: Path) -> None:
+    protocol_file = Path(tmp_path, "protocol.json")
+    protocol_file.write_text("{}")
+    upload = await fake_client.post_protocol([protocol_file])
+    assert upload.status_code == 201
+    assert upload.json()["data"]["analysisSummaries"][0]["status"] == "pending"
+    robot_interactions = RobotInteractions(robot_client=fake_client, console=Console(quiet=True))
+    await robot_interactions.wait_for_all_analyses_to_complete(timeout_sec=5)
+    assert await robot_interactions.all_analyses_are_complete()
+
+
+@pytest.mark.asyncio
+async def test_run_lifecycle(fake_client: RobotClient) -> None:
+    robot_interactions = RobotInteractions(robot_client=fake_client, console=Console(quiet=True))
+    run_id = await robot_interactions.force_create_new_run()
+    assert await robot_interactions.get_current_run() == run_id
+    await robot_interactions.stop_run(run_id)
+    run = await robot_interactions.wait_until_run_status(run_id=run_id, expected_status="stopped", timeout_sec=5)
+    assert run["id"] == run_id
+
+
+@pytest.mark.asyncio
+async def test_failure_injection() -> None:
+    config = FakeRobotConfig(failures=[FailureRule(route="GET /health", probability=1.0, error=httpx.ConnectError)])
+    async with RobotClient.make(host="http://fake", port="31950", version="*", transport=FakeRobot(config)) as client:
+        with pytest.raises(httpx.ConnectError):
+            await client.get_health()
+        assert client.pool_stats is not None
+        assert client.pool_stats.in_flight == 0
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import httpx
+import pytest
+from clients.fleet import Fleet, Robot
+from clients.robot_client import RobotClient
+from fake_robot.fake_robot import FailureRule, FakeRobot, FakeRobotConfig, Fixed
+from httpx import Response
+
+CONFIGS = {
+    "fast": FakeRobotConfig(default_latency=Fixed(0.01)),
+    "slow": FakeRobotConfig(default_latency=Fixed(5.0)),
+    "broken": FakeRobotConfig(failures=[FailureRule(route="GET /runs", probability=1.0, status_code=500)]),
+}
+
+
+def _fake(robot: Robot) -> httpx.AsyncBaseTransport:
+    return FakeRobot(CONFIGS[robot.name])
+
+
+@pytest.mark.asyncio
+async def test_results_stream_in_completion_order() -> None:
+    robots = [Robot.parse(f"{name}=10.0.0.{i}") for i, name in enumerate(CONFIGS)]
+
+    async def get_runs(client: RobotClient) -> Response:
+        return await client.get_runs()
+
+    async with Fleet.make(robots, timeout_sec=0.5, transport_factory=_fake) as fleet:
+        async with fleet.stream(get_runs) as results:
+            statuses = [(result.robot.name, result.status) async for result in results]
+    # the failure comes back before the fast robot's latency, the slow robot last when its budget runs out
+    assert statuses == [("broken", "HTTP 500"), ("fast", "HTTP 200"), ("slow", "timeout")]
+
+
+@pytest.mark.asyncio
+async def test_concurrency_cap() -> None:
+    robots = [Robot(name=f"robot-{i}", host=f"10.0.0.{i}") for i in range(6)]
+    in_flight = peak = 0
+
+    async def health(client: RobotClient) -> Response:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        try:
+            return await client.get_health()
+        finally:
+            in_flight -= 1
+
+    async with Fleet.make(robots, concurrency=2, transport_factory=lambda robot: FakeRobot(CONFIGS["fast"])) as fleet:
+        report = await fleet.run(health)
+    assert peak == 2
+    assert len(report.results) == 6
+    assert not report.failed
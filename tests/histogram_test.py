@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from datetime import timedelta
+from pathlib import Path
+
+import httpx
+import pytest
+from perf.histogram import LatencyHistogram, LatencyRecorder
+
+
+def test_percentiles_within_precision() -> None:
+    histogram = LatencyHistogram(precision=0.01)
+    for millis in range(1, 1001):
+        histogram.record(millis / 1000)
+    assert histogram.count == 1000
+    for percent, expected in [(50, 0.5), (90, 0.9), (99, 0.99)]:
+        assert histogram.percentile(percent) == pytest.approx(expected, rel=0.011)
+    assert histogram.percentile(100) == 1.0
+    assert histogram.percentile(0) == 0.001
+
+
+def test_merge_requires_same_layout() -> None:
+    first, second = LatencyHistogram(), LatencyHistogram()
+    first.record(0.1)
+    second.record(0.3)
+    first.merge(second)
+    assert (first.count, first.min_sec, first.max_sec) == (2, 0.1, 0.3)
+    with pytest.raises(ValueError):
+        first.merge(LatencyHistogram(precision=0.05))
+
+
+def test_recorder_round_trip(tmp_path: Path) -> None:
+    recorder = LatencyRecorder(name="steady")
+    for _ in range(10):
+        recorder.record("/health", "GET", 0.02)
+    recorder.record_error("/health", "GET")
+    recorder.duration_sec = 2.0
+    path = Path(tmp_path, "steady.json")
+    recorder.save_json(path)
+    loaded = LatencyRecorder.load_json(path)
+    assert loaded.summary_rows() == recorder.summary_rows()
+    row = loaded.summary_rows()[0]
+    assert row["requests"] == 11
+    assert row["throughput_per_sec"] == 5.0
+
+
+def test_record_response_by_route() -> None:
+    recorder = LatencyRecorder(name="steady")
+    for run_id, status_code in [("4a7d0f9e-94b1-4c4b-a1a3-5d6bd1b3e9a2", 200), ("b81c2e3f-0d4e-4f6a-9b7c-8d9e0f1a2b3c", 404)]:
+        request = httpx.Request("GET", f"http://fake:31950/runs/{run_id}/commands/17")
+        response = httpx.Response(status_code, request=request)
+        response.elapsed = timedelta(milliseconds=20)
+        recorder.record_response(response)
+    assert [row["endpoint"] for row in recorder.summary_rows()] == ["/runs/{id}/commands/{id}"]
+    assert recorder.summary_rows()[0]["requests"] == 2
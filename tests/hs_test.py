@@ -79,9 +79,10 @@ async def ensure_latch_closed_not_heating_or_shaking(hs_run: HSTestRun) -> None:
     assert stop_shake.status_code == 201
     assert close_latch.json()["data"]["status"] == "succeeded"
 
-    # wait then make sure shake speed is zero
-    await asyncio.sleep(2)
-    hs_module_data = await hs_run.robot_interactions.get_module_data_by_id(hs_run.hs_id)
+    # wait until the shake speed is zero
+    hs_module_data = await hs_run.robot_interactions.wait_until_module_data(
+        hs_run.hs_id, lambda data: shake_speed_in_range(data["data"]["currentSpeed"], 0), timeout_sec=10
+    )
     assert shake_speed_in_range(hs_module_data["data"]["currentSpeed"], 0)
     # We are now in a known state, no heating, no shaking, latch closed
 
@@ -114,9 +115,10 @@ async def test_shake_happy_path(robot_client: RobotClient, console: Console) ->
     assert stop_shake.status_code == 201
     assert stop_shake.json()["data"]["status"] == "succeeded"
 
-    # wait then make sure shake speed is zero
-    await asyncio.sleep(2)
-    hs_module_data = await robot_interactions.get_module_data_by_id(hs_run.hs_id)
+    # wait until the shake speed is zero
+    hs_module_data = await robot_interactions.wait_until_module_data(
+        hs_run.hs_id, lambda data: shake_speed_in_range(data["data"]["currentSpeed"], 0), timeout_sec=10
+    )
     assert shake_speed_in_range(hs_module_data["data"]["currentSpeed"], 0)
 
 
@@ -415,12 +417,12 @@ async def test_boundary_shake_speed(robot_client: RobotClient, console: Console,
     assert shake.status_code == 201
     assert shake.json()["data"]["status"] == "succeeded"
 
-    if rpm > 200:
-        # TODO it seems heaterShaker/setAndWaitForShakeSpeed is not waiting?
-        await asyncio.sleep(3)
+    # TODO it seems heaterShaker/setAndWaitForShakeSpeed is not waiting above 200 rpm?
+    hs_module_data = await robot_interactions.wait_until_module_data(
+        hs_run.hs_id, lambda data: data["data"]["speedStatus"] == "holding at target", timeout_sec=10
+    )
 
     # is shaking at desired rpm?
-    hs_module_data = await robot_interactions.get_module_data_by_id(hs_run.hs_id)
     assert shake_speed_in_range(hs_module_data["data"]["currentSpeed"], rpm, 100)
     assert hs_module_data["data"]["speedStatus"] == "holding at target"
 
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import json
+from typing import Any
+
+import httpx
+import pytest
+from util import json_body
+from util.json_body import body, extract
+
+DOCUMENT = {
+    "data": [{"id": "first", "status": "succeeded", "$schema": 1}, {"id": "second", "status": None}],
+    "links": {"current": {"href": "/runs/second"}},
+    "meta": None,
+}
+
+
+def _response(document: Any = DOCUMENT) -> httpx.Response:
+    return httpx.Response(200, content=json.dumps(document).encode())
+
+
+@pytest.fixture(params=["fast", "stdlib"])
+def backend(request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch) -> str:
+    if request.param == "stdlib":
+        monkeypatch.setattr(json_body, "loads", json_body._stdlib_loads)
+        monkeypatch.setattr(json_body, "_msgspec_decode", None)
+    return str(request.param)
+
+
+def test_body_is_decoded_once(backend: str) -> None:
+    response = _response()
+    decoded = body(response)
+    assert decoded == DOCUMENT
+    assert body(response) is decoded
+
+
+@pytest.mark.parametrize(
+    ("path", "expected"),
+    [
+        (("links", "current", "href"), "/runs/second"),
+        (("data", 0, "$schema"), 1),
+        (("data", -1, "id"), "second"),
+        (("data", 1, "status"), None),
+        (("data", 0), DOCUMENT["data"][0]),  # type: ignore[index]
+        ((), DOCUMENT),
+    ],
+)
+def test_extract(backend: str, path: tuple[str | int, ...], expected: Any) -> None:
+    assert extract(_response(), *path) == expected
+
+
+@pytest.mark.parametrize("path", [("links", "previous"), ("data", 5, "id"), ("meta", "cursor"), ("data", "id")])
+def test_extract_missing(backend: str, path: tuple[str | int, ...]) -> None:
+    assert extract(_response(), *path, default="missing") == "missing"
+    with pytest.raises(KeyError):
+        extract(_response(), *path)
+
+
+def test_extract_uses_decoded_body(backend: str) -> None:
+    response = _response()
+    body(response)["links"]["current"]["href"] = "/runs/changed"
+    assert extract(response, "links", "current", "href") == "/runs/changed"
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import argparse
+import time
+
+import pytest
+from clients.resilience import NO_RETRY
+from clients.robot_client import RobotClient
+from fake_robot.fake_robot import FakeRobot, FakeRobotConfig, Fixed
+from interactions.OT3_perf import parse_rate
+from perf.histogram import LatencyRecorder
+from perf.load import ENDPOINTS, BackgroundLoad, EndpointLoad, Phase, Scenario, analyze_protocol, ramp_phases, run_scenario
+
+
+def _requests(recorder: LatencyRecorder) -> int:
+    return sum(row["requests"] for row in recorder.summary_rows())
+
+
+def test_ramp_phases() -> None:
+    assert [phase.name for phase in ramp_phases(1.0, 2.0, 0.0)] == ["ramp-up", "steady"]
+    ramp_up, steady, ramp_down = ramp_phases(1.0, 2.0, 1.0)
+    assert ramp_up.scale_at(0.0) == 0.0 and ramp_up.scale_at(0.5) == 0.5 and ramp_up.scale_at(5.0) == 1.0
+    assert steady.scale_at(1.0) == 1.0
+    assert ramp_down.scale_at(0.25) == 0.75
+
+
+@pytest.mark.asyncio
+async def test_phase_request_counts() -> None:
+    fake_robot = FakeRobot(FakeRobotConfig(default_latency=Fixed(0.001)))
+    scenario = Scenario(
+        name="ramp", phases=ramp_phases(0.5, 1.0, 0.5), endpoints=[EndpointLoad("GET /health", 20, ENDPOINTS["GET /health"])]
+    )
+    async with RobotClient.make(host="http://fake", port="31950", version="*", transport=fake_robot, resilience=NO_RETRY) as client:
+        results = await run_scenario(client, scenario)
+    counts = {result.phase: _requests(result.latency) for result in results}
+    # 20/s for 1s steady, the linear ramps average 10/s over 0.5s
+    assert 18 <= counts["steady"] <= 20
+    assert 3 <= counts["ramp-up"] <= 7
+    assert 3 <= counts["ramp-down"] <= 7
+    assert all(result.latency.summary_rows()[0]["errors"] == 0 for result in results)
+
+
+@pytest.mark.asyncio
+async def test_arrivals_do_not_wait_for_responses() -> None:
+    # each response takes 0.2s, a closed loop would manage 5/s
+    fake_robot = FakeRobot(FakeRobotConfig(default_latency=Fixed(0.2)))
+    scenario = Scenario(name="open", phases=[Phase("steady", 1.0)], endpoints=[EndpointLoad("GET /runs", 20, ENDPOINTS["GET /runs"])])
+    async with RobotClient.make(host="http://fake", port="31950", version="*", transport=fake_robot, resilience=NO_RETRY) as client:
+        start = time.perf_counter()
+        (result,) = await run_scenario(client, scenario)
+        elapsed = time.perf_counter() - start
+    (row,) = result.latency.summary_rows()
+    assert 18 <= row["requests"] <= 20
+    assert row["errors"] == 0
+    # the last arrivals are still answered before run_scenario returns, at most one latency later
+    assert elapsed < 1.0 + 0.2 + 0.2
+    assert result.service.summary_rows()[0]["p50_sec"] == pytest.approx(0.2, abs=0.05)
+
+
+@pytest.mark.asyncio
+async def test_background_load_runs_alongside() -> None:
+    fake_robot = FakeRobot(FakeRobotConfig(default_latency=Fixed(0.001), analysis_duration_sec=0.1))
+    in_flight = peak = analyses = 0
+
+    async def analysis(client: RobotClient) -> None:
+        nonlocal in_flight, peak, analyses
+        in_flight += 1
+        peak = max(peak, in_flight)
+        try:
+            await analyze_protocol(client, b"{}")
+            analyses += 1
+        finally:
+            in_flight -= 1
+
+    scenario = Scenario(
+        name="busy",
+        phases=[Phase("steady", 1.0)],
+        endpoints=[EndpointLoad("GET /health", 10, ENDPOINTS["GET /health"])],
+        background=[BackgroundLoad("analysis", 2, analysis)],
+    )
+    async with RobotClient.make(host="http://fake", port="31950", version="*", transport=fake_robot, resilience=NO_RETRY) as client:
+        (result,) = await run_scenario(client, scenario)
+    assert peak == 2
+    assert analyses >= 4
+    assert len(fake_robot.protocols) >= analyses
+    # stopped with the scenario, nothing left running
+    assert in_flight == 0
+    assert 8 <= result.latency.summary_rows()[0]["requests"] <= 10
+
+
+def test_parse_rate() -> None:
+    load = parse_rate("GET /runs=2.5")
+    assert (load.name, load.rate_per_sec) == ("GET /runs", 2.5)
+    for bad in ["GET /runs=abc", "GET /runs=0", "GET /runs=-1", "GET /runs=nan", "GET /runs=", "GET /nope=5"]:
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_rate(bad)
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from clients.robot_client import RobotClient
+from fake_robot.fake_robot import FakeRobot, FakeRobotConfig, Fixed
+from offset_mirror.offset_mirror import OffsetMirror
+
+TIPRACK = "opentrons/opentrons_96_tiprack_300ul/1"
+
+
+@pytest.mark.asyncio
+async def test_incremental_sync(tmp_path: Path) -> None:
+    fake_robot = FakeRobot(FakeRobotConfig(run_count=100, offsets_per_run=3, default_latency=Fixed(0)))
+    mirror = OffsetMirror(Path(tmp_path, "offsets.sqlite"))
+    async with RobotClient.make(host="http://fake", port="31950", version="*", transport=fake_robot) as client:
+        first = await mirror.sync(client, robot="fake")
+        assert (first.new_runs, first.new_offsets) == (100, 300)
+
+        second = await mirror.sync(client, robot="fake")
+        assert (second.new_runs, second.new_offsets, second.requests) == (0, 0, 1)
+
+        run_id = (await client.post_run(req_body={"data": {}})).json()["data"]["id"]
+        third = await mirror.sync(client, robot="fake")
+        assert (third.new_runs, third.new_offsets) == (1, 3)
+
+        # the new run is still idle, offsets added to it arrive on the next sync
+        offset = {"definitionUri": TIPRACK, "location": {"slotName": "5"}, "vector": {"x": 0.25, "y": -0.5, "z": 1.0}}
+        await client.post_labware_offset(run_id, req_body={"data": offset})
+        fourth = await mirror.sync(client, robot="fake")
+        assert (fourth.new_runs, fourth.refreshed_runs, fourth.new_offsets) == (0, 1, 1)
+
+    found = mirror.find_offsets(definition_uri=TIPRACK, slot_name="5", near=(0.25, -0.5, 1.0), tolerance_mm=0.01)
+    assert [o["runId"] for o in found] == [run_id]
+    assert len(mirror.find_offsets(robot="fake")) == 304
+    mirror.close()
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import time
+
+import anyio
+import pytest
+from clients.polling import Backoff, poll_until
+from clients.robot_client import RobotClient
+from clients.robot_interactions import RobotInteractions
+from fake_robot.fake_robot import FakeRobot
+from rich.console import Console
+
+FAST = Backoff(initial_sec=0.001, ceiling_sec=0.01)
+
+
+class Counter:
+    def __init__(self, values: list[int]) -> None:
+        self.values = values
+        self.calls = 0
+
+    async def probe(self) -> int:
+        value = self.values[min(self.calls, len(self.values) - 1)]
+        self.calls += 1
+        return value
+
+
+def test_backoff_grows_to_ceiling() -> None:
+    delays = Backoff(initial_sec=0.1, factor=2.0, ceiling_sec=0.4, jitter=0.5).delays()
+    first, second, third, fourth = (next(delays) for _ in range(4))
+    assert 0.05 <= first <= 0.1
+    assert 0.1 <= second <= 0.2
+    assert 0.2 <= third <= 0.4 and 0.2 <= fourth <= 0.4
+
+
+@pytest.mark.asyncio
+async def test_poll_until_returns_the_done_value() -> None:
+    counter = Counter([1, 1, 2, 3, 5])
+    assert await poll_until(counter.probe, lambda value: value >= 3, timeout_sec=5, backoff=FAST) == 3
+    assert counter.calls == 4
+
+
+@pytest.mark.asyncio
+async def test_poll_until_done_on_first_probe_does_not_sleep() -> None:
+    counter = Counter([7])
+    start = time.perf_counter()
+    assert await poll_until(counter.probe, lambda value: value == 7, timeout_sec=5, backoff=Backoff(initial_sec=10)) == 7
+    assert counter.calls == 1
+    assert time.perf_counter() - start < 1
+
+
+@pytest.mark.asyncio
+async def test_poll_until_times_out() -> None:
+    counter = Counter([0])
+    start = time.perf_counter()
+    with pytest.raises(TimeoutError):
+        await poll_until(counter.probe, lambda value: value == 1, timeout_sec=0.1, backoff=FAST)
+    assert 0.1 <= time.perf_counter() - start < 1
+    assert counter.calls > 1
+
+
+@pytest.mark.asyncio
+async def test_wait_until_module_data() -> None:
+    fake_robot = FakeRobot()
+    async with RobotClient.make(host="http://fake", port="31950", version="*", transport=fake_robot) as client:
+        interactions = RobotInteractions(client, console=Console(quiet=True))
+
+        async def spin_up() -> None:
+            await anyio.sleep(0.05)
+            fake_robot.modules[0]["data"].update(currentSpeed=400, speedStatus="holding at target")
+
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(spin_up)
+            module = await interactions.wait_until_module_data(
+                "heater-shaker-id", lambda data: data["data"]["speedStatus"] == "holding at target", polling_interval_sec=0.01
+            )
+        assert module["data"]["currentSpeed"] == 400
+        with pytest.raises(TimeoutError):
+            await interactions.wait_until_module_data(
+                "heater-shaker-id", lambda data: data["data"]["currentSpeed"] == 0, timeout_sec=0.1, polling_interval_sec=0.01
+            )
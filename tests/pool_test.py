@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from collections import Counter
+
+import anyio
+import httpx
+import pytest
+from clients.pool import PoolLimits, PooledTransport
+
+
+class Gate:
+    """Holds every request until opened, recording how many were in flight per host at most."""
+
+    def __init__(self) -> None:
+        self.open = anyio.Event()
+        self.in_flight: Counter[str] = Counter()
+        self.peak: Counter[str] = Counter()
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        self.in_flight[host] += 1
+        self.peak[host] = max(self.peak[host], self.in_flight[host])
+        await self.open.wait()
+        self.in_flight[host] -= 1
+        return httpx.Response(200)
+
+
+@pytest.mark.asyncio
+async def test_per_host_cap() -> None:
+    gate = Gate()
+    transport = PooledTransport(PoolLimits(max_connections_per_host=2), transport=httpx.MockTransport(gate.handler))
+    async with httpx.AsyncClient(transport=transport) as client:
+        async with anyio.create_task_group() as tg:
+            for host in ["a"] * 6 + ["b"] * 2:
+                tg.start_soon(client.get, f"http://{host}/health")
+            await anyio.sleep(0.05)
+            assert transport.stats.per_host_in_flight == {"a": 2, "b": 2}
+            # four queued behind robot a's cap
+            assert transport.stats.waiting == 4
+            gate.open.set()
+    stats = transport.stats
+    assert gate.peak == {"a": 2, "b": 2}
+    assert stats.requests == 8
+    assert stats.peak_in_flight == 4
+    assert stats.peak_waiting == 8
+    assert stats.in_flight == stats.waiting == 0
+    assert stats.max_wait_sec >= 0.05
+
+
+@pytest.mark.asyncio
+async def test_cancelled_while_waiting_is_not_left_waiting() -> None:
+    gate = Gate()
+    transport = PooledTransport(PoolLimits(max_connections_per_host=1), transport=httpx.MockTransport(gate.handler))
+    async with httpx.AsyncClient(transport=transport) as client:
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(client.get, "http://a/health")
+            await anyio.sleep(0.01)
+            with anyio.move_on_after(0.05):
+                await client.get("http://a/runs")
+            assert transport.stats.waiting == 0
+            assert transport.stats.in_flight == 1
+            gate.open.set()
+        # the slot the cancelled request never got is still free for the next one
+        assert (await client.get("http://a/runs")).status_code == 200
+    assert transport.stats.requests == 3
+    assert transport.stats.in_flight == transport.stats.waiting == 0
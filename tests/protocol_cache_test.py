@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from clients.protocol_cache import ProtocolCache, protocol_key
+from clients.robot_client import RobotClient
+from fake_robot.fake_robot import FakeRobot
+
+
+@pytest.mark.asyncio
+async def test_reuses_protocol_across_caches(tmp_path: Path) -> None:
+    protocol_file = Path(tmp_path, "basic.json")
+    protocol_file.write_text('{"commands": []}')
+    fake_robot = FakeRobot()
+    async with RobotClient.make(host="http://fake", port="31950", version="*", transport=fake_robot) as client:
+        cache = ProtocolCache(client)
+        first = await cache.post_protocol([protocol_file])
+        second = await cache.post_protocol([protocol_file])
+        assert (first.hit, second.hit) == (False, True)
+        assert second.protocol_id == first.protocol_id
+        # different run-time parameters are a different protocol
+        assert not (await cache.post_protocol([protocol_file], run_time_parameter_values={"volume": 10})).hit
+        assert fake_robot.requests["POST /protocols"] == 2
+
+        # a later script finds the upload through the key on the robot
+        fresh = ProtocolCache(client)
+        assert (await fresh.post_protocol([protocol_file])).protocol_id == first.protocol_id
+        assert fresh.stats.snapshot() == {"hits": 1, "misses": 0, "invalidations": 0, "hit_rate": 1.0}
+
+        await fresh.invalidate([protocol_file])
+        reuploaded = await fresh.post_protocol([protocol_file])
+        assert not reuploaded.hit
+        assert reuploaded.protocol_id != first.protocol_id
+
+
+def test_key_depends_on_content(tmp_path: Path) -> None:
+    protocol_file = Path(tmp_path, "basic.json")
+    protocol_file.write_text("{}")
+    key = protocol_key([protocol_file])
+    assert key == protocol_key([protocol_file])
+    protocol_file.write_text("{ }")
+    assert key != protocol_key([protocol_file])
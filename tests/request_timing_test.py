@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import threading
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from clients.request_timing import TIMING_EXTENSION, RequestTiming, route
+from clients.robot_client import RobotClient
+from fake_robot.fake_robot import FakeRobot, FakeRobotConfig, Fixed
+from util.response_log import response_record
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        body = b'{"status": "ok"}' * 100
+        self.send_response(200)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+@pytest.fixture()
+def server() -> Iterator[str]:
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_route_collapses_ids() -> None:
+    assert route("GET", "/runs/4a7d0f9e-94b1-4c4b-a1a3-5d6bd1b3e9a2/commands/17") == "GET /runs/{id}/commands/{id}"
+    assert route("GET", "/health") == "GET /health"
+
+
+@pytest.mark.asyncio
+async def test_network_phases(server: str) -> None:
+    host, port = server.rsplit(":", 1)
+    async with RobotClient.make(host=host, port=port, version="*") as client:
+        first = await client.get_health()
+        second = await client.get_health()
+    timings = [response.extensions[TIMING_EXTENSION] for response in (first, second)]
+    assert all(isinstance(timing, RequestTiming) for timing in timings)
+    opened, reused = timings
+    assert opened.new_connection and opened.connect_sec is not None
+    # keepalive, the second request goes straight onto the open connection
+    assert not reused.new_connection and reused.connect_sec is None
+    for timing in timings:
+        assert timing.response_bytes == 1600
+        assert timing.attempts == 1
+        assert timing.tls_sec is None
+        phases = [timing.pool_wait_sec, timing.send_sec, timing.ttfb_sec, timing.transfer_sec]
+        assert all(value is not None for value in phases)
+        assert timing.total_sec is not None and timing.total_sec >= sum(value or 0.0 for value in phases)
+    entry = client.request_timings.routes["GET /health"]
+    assert (entry.requests, entry.new_connections) == (2, 1)
+    assert entry.phases["connect"].count == 1 and entry.phases["ttfb"].count == 2
+
+
+@pytest.mark.asyncio
+async def test_fake_robot_phases_and_log_record() -> None:
+    fake_robot = FakeRobot(FakeRobotConfig(default_latency=Fixed(0.02)))
+    async with RobotClient.make(host="http://fake", port="31950", version="*", transport=fake_robot) as client:
+        run = await client.post_run(req_body={"data": {}})
+        await client.get_run(run.json()["data"]["id"])
+    assert set(client.request_timings.routes) == {"POST /runs", "GET /runs/{id}"}
+    timing = run.extensions[TIMING_EXTENSION]
+    # no trace events from the fake, only what the hooks see
+    assert timing.pool_wait_sec is None and timing.connect_sec is None
+    assert timing.ttfb_sec == pytest.approx(0.02, abs=0.02)
+    assert timing.response_bytes == len(run.content)
+    assert timing.request_bytes == len(run.request.content)
+    record = response_record(run)
+    assert record["timing"]["route"] == "POST /runs"
+    assert record["timing"]["total_sec"] >= record["timing"]["ttfb_sec"]
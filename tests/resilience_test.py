@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+
+import httpx
+import pytest
+from clients.polling import Backoff
+from clients.resilience import BudgetExceededError, CircuitOpenError, ResiliencePolicy, ResilientTransport
+from clients.robot_client import RobotClient
+
+FAST = ResiliencePolicy(backoff=Backoff(initial_sec=0.001, ceiling_sec=0.001), failure_threshold=4, reset_sec=0.2)
+
+
+class Flaky:
+    """Answers from a script of outcomes per route, then 200, counting every request."""
+
+    def __init__(self, outcomes: dict[str, list[int | type[httpx.TransportError]]]) -> None:
+        self.outcomes = outcomes
+        self.calls: Counter[str] = Counter()
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        route = f"{request.method} {request.url.path}"
+        self.calls[route] += 1
+        script = self.outcomes.get(route, [])
+        outcome = script.pop(0) if script else 200
+        if isinstance(outcome, int):
+            return httpx.Response(outcome, json={"data": {"id": "run-1"}})
+        raise outcome("scripted", request=request)
+
+
+def test_budget_lookup() -> None:
+    transport = ResilientTransport(httpx.MockTransport(lambda request: httpx.Response(200)))
+    assert transport.budget_for("GET", "/protocols") == 180.0
+    assert transport.budget_for("GET", "/protocols/abc/analyses/def") == 6000.0
+    assert transport.budget_for("GET", "/protocols/abc/analyses/def/asDocument") == 6000.0
+    assert transport.budget_for("DELETE", "/runs/abc") == 15.0
+    assert transport.budget_for("GET", "/runs") == 5.0
+
+
+def test_retries_respect_idempotency() -> None:
+    flaky = Flaky(
+        {
+            "GET /runs": [503, httpx.ReadError, 200],
+            # the robot may have created the run, never post it twice
+            "POST /runs": [503],
+            # but a request that never connected is safe to send again
+            "POST /runs/run-1/actions": [httpx.ConnectError],
+        }
+    )
+
+    async def scenario() -> None:
+        async with RobotClient.make(
+            host="http://fake", port="31950", version="*", transport=httpx.MockTransport(flaky.handler), resilience=FAST
+        ) as client:
+            assert (await client.get_runs()).status_code == 200
+            assert (await client.post_run({"data": {}})).status_code == 503
+            await client.post_run_action("run-1", {"data": {"actionType": "stop"}})
+            assert client.resilience_stats is not None and client.resilience_stats.retries == 3
+
+    asyncio.run(scenario())
+    assert flaky.calls == {"GET /runs": 3, "POST /runs": 1, "POST /runs/run-1/actions": 2}
+
+
+def test_circuit_breaker_fails_fast() -> None:
+    flaky = Flaky({"GET /runs": [httpx.ConnectError] * 7, "GET /health": [httpx.ConnectError]})
+    policy = ResiliencePolicy(backoff=Backoff(initial_sec=0.001, ceiling_sec=0.001), failure_threshold=2, reset_sec=0.2)
+
+    async def scenario() -> None:
+        async with RobotClient.make(
+            host="http://fake", port="31950", version="*", transport=httpx.MockTransport(flaky.handler), resilience=policy
+        ) as client:
+            assert client.resilience is not None
+            breaker_key = "fake:31950"
+            with pytest.raises(httpx.ConnectError):
+                await client.get_runs()
+            # three failed attempts are one failed request
+            assert client.resilience.breakers[breaker_key].failures == 1
+            assert client.resilience.breakers[breaker_key].state == "closed"
+            with pytest.raises(httpx.ConnectError):
+                await client.get_runs()
+            # two failed requests in a row opened the circuit, nothing is sent
+            with pytest.raises(CircuitOpenError):
+                await client.get_runs()
+            assert flaky.calls["GET /runs"] == 6
+            # health checks still get through, and while the robot is down they say so
+            assert not await client.alive()
+            await asyncio.sleep(0.25)
+            # half-open: one probe with a single attempt, which fails, opening it again
+            with pytest.raises(httpx.ConnectError):
+                await client.get_runs()
+            assert flaky.calls["GET /runs"] == 7
+            with pytest.raises(CircuitOpenError):
+                await client.get_runs()
+            await asyncio.sleep(0.25)
+            assert (await client.get_runs()).status_code == 200
+            assert (await client.get_runs()).status_code == 200
+            assert client.resilience.breakers[breaker_key].state == "closed"
+
+    asyncio.run(scenario())
+
+
+def test_budget_covers_every_attempt() -> None:
+    async def slow(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(1.0)
+        return httpx.Response(200)
+
+    async def scenario() -> None:
+        async with RobotClient.make(
+            host="http://fake", port="31950", version="*", transport=httpx.MockTransport(slow), resilience=FAST
+        ) as client:
+            with pytest.raises(BudgetExceededError):
+                await client.post_simple_command({"data": {}}, params={}, timeout_sec=0.05)
+            # still a ReadTimeout for the handlers that already catch one
+            with pytest.raises(httpx.ReadTimeout):
+                await client.post_simple_command({"data": {}}, params={}, timeout_sec=0.05)
+
+    asyncio.run(scenario())
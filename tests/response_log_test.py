@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+import anyio
+import pytest
+from util.response_log import OverflowPolicy, ResponseLogWriter
+
+
+def _record(n: int) -> dict[str, Any]:
+    return {"n": n, "request_body": b"", "response_body": json.dumps({"id": n}).encode()}
+
+
+def _lines(path: Path) -> list[dict[str, Any]]:
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def _gate(writer: ResponseLogWriter, monkeypatch: pytest.MonkeyPatch) -> tuple[threading.Event, threading.Event]:
+    """Hold the writer thread in its first write until released, so the queue fills up."""
+    entered, release = threading.Event(), threading.Event()
+    write = writer._write
+
+    def gated(records: list[dict[str, Any]]) -> None:
+        entered.set()
+        release.wait()
+        write(records)
+
+    monkeypatch.setattr(writer, "_write", gated)
+    return entered, release
+
+
+def test_batches_and_close_flushes(tmp_path: Path) -> None:
+    path = tmp_path / "responses.jsonl"
+    writer = ResponseLogWriter(path, batch_size=3, flush_interval_sec=5.0)
+    for n in range(7):
+        assert writer.submit(_record(n))
+    start = time.monotonic()
+    writer.close()
+    # the last, partial batch is written on close without waiting out the flush interval
+    assert time.monotonic() - start < 5.0
+    assert _lines(path) == [{"n": n, "request_body": None, "response_body": {"id": n}} for n in range(7)]
+    assert writer.written == 7
+    assert writer.batches == 3
+
+
+def test_drop_when_full(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    path = tmp_path / "responses.jsonl"
+    writer = ResponseLogWriter(path, max_queue=2, batch_size=1)
+    entered, release = _gate(writer, monkeypatch)
+    assert writer.submit(_record(0))
+    assert entered.wait(timeout=5)
+    assert writer.submit(_record(1))
+    assert writer.submit(_record(2))
+    assert not writer.submit(_record(3))
+    release.set()
+    writer.close()
+    assert [line["n"] for line in _lines(path)] == [0, 1, 2]
+    assert writer.dropped == 1
+
+
+@pytest.mark.asyncio
+async def test_block_waits_for_room(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    path = tmp_path / "responses.jsonl"
+    writer = ResponseLogWriter(path, max_queue=1, batch_size=1, policy=OverflowPolicy.BLOCK)
+    entered, release = _gate(writer, monkeypatch)
+    assert await writer.asubmit(_record(0))
+    assert entered.wait(timeout=5)
+    assert await writer.asubmit(_record(1))
+    done = anyio.Event()
+
+    async def blocked() -> None:
+        await writer.asubmit(_record(2))
+        done.set()
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(blocked)
+        await anyio.sleep(0.05)
+        # still waiting for room, without holding up the event loop
+        assert not done.is_set()
+        release.set()
+    writer.close()
+    assert [line["n"] for line in _lines(path)] == [0, 1, 2]
+    assert writer.dropped == 0
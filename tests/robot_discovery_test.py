@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import asyncio
+import io
+import time
+from pathlib import Path
+
+import httpx
+from rich.console import Console
+from robot_discovery.robots import (
+    FAST_POLL_SEC,
+    SLOW_POLL_SEC,
+    DeviceRegistry,
+    DeviceTable,
+    load_cache,
+    parse_interfaces,
+    save_cache,
+    sweep,
+    sweep_hosts,
+)
+
+STATUS = {"interfaces": {"eth0": {"gatewayAddress": "10.0.0.1", "macAddress": "aa", "type": "ethernet"}}}
+
+
+def test_poll_interval_adapts() -> None:
+    registry = DeviceRegistry()
+    registry.upsert("bay-1", "10.0.0.5")
+    due, _ = registry.due(now=0.0)
+    assert [device.instance for device in due] == ["bay-1"]
+    # claimed until the poll result comes back
+    assert registry.due(now=0.0)[0] == []
+
+    assert registry.update_status("bay-1", STATUS, parse_interfaces(STATUS))
+    intervals = []
+    version, seen = registry.version, registry.seen
+    for _ in range(12):
+        assert not registry.update_status("bay-1", STATUS, parse_interfaces(STATUS))
+        intervals.append(registry.snapshot()[0].poll_interval_sec)
+    # nothing changed, but every answer moved last_seen
+    assert registry.version == version
+    assert registry.seen == seen + 12
+    assert intervals[0] == FAST_POLL_SEC * 2
+    assert intervals[-1] == SLOW_POLL_SEC
+
+    # a change brings it straight back to fast polling
+    version = registry.version
+    assert registry.update_status("bay-1", {"error": "timed out"}, [])
+    assert registry.snapshot()[0].poll_interval_sec == FAST_POLL_SEC
+    assert registry.version > version
+
+
+def test_snapshot_is_a_copy() -> None:
+    registry = DeviceRegistry()
+    registry.upsert("bay-1", "10.0.0.5")
+    registry.snapshot()[0].ip = "changed"
+    assert registry.snapshot()[0].ip == "10.0.0.5"
+    registry.upsert("bay-1", "10.0.0.6")
+    registry.remove("bay-1")
+    assert len(registry) == 0
+
+
+def test_device_table_lays_out_only_after_update() -> None:
+    registry = DeviceRegistry()
+    registry.upsert("bay-1", "10.0.0.5")
+    console = Console(width=120, record=True, file=io.StringIO())
+    device_table = DeviceTable()
+    device_table.update(registry.snapshot())
+    console.print(device_table)
+    rendered = device_table._rendered
+    # refreshes without an update replay the lines laid out the first time
+    for _ in range(3):
+        console.print(device_table)
+        assert device_table._rendered is rendered
+    assert "10.0.0.5" in console.export_text()
+
+    registry.upsert("bay-1", "10.0.0.6")
+    device_table.update(registry.snapshot())
+    console.print(device_table)
+    assert device_table._rendered is not rendered
+    assert "10.0.0.6" in console.export_text()
+
+
+def test_cache_warm_start(tmp_path: Path) -> None:
+    path = tmp_path / "discovered.json"
+    assert load_cache(path) == []
+    registry = DeviceRegistry()
+    registry.upsert("bay-1", "10.0.0.5")
+    registry.update_status("bay-1", STATUS, parse_interfaces(STATUS))
+    registry.upsert("gone", "10.0.0.6")
+    save_cache(path, registry.snapshot())
+
+    restored = DeviceRegistry()
+    # already found by mDNS before the cache loaded, discovery wins
+    restored.upsert("gone", "10.0.0.7")
+    restored.restore(load_cache(path))
+    devices = {device.instance: device for device in restored.snapshot()}
+    assert devices["bay-1"].cached and devices["bay-1"].interfaces[0].name == "eth0"
+    assert not devices["gone"].cached and devices["gone"].ip == "10.0.0.7"
+    # revalidated first thing
+    assert "bay-1" in [device.instance for device in restored.due(now=0.0)[0]]
+    assert restored.update_status("bay-1", STATUS, parse_interfaces(STATUS))
+    assert not restored.snapshot()[0].cached
+
+    # entries older than max_age_sec are not loaded
+    assert load_cache(path, max_age_sec=-1) == []
+
+
+def test_expire_keeps_healthy_devices() -> None:
+    registry = DeviceRegistry()
+    registry.upsert("healthy", "10.0.0.5")
+    registry.update_status("healthy", STATUS, parse_interfaces(STATUS))
+    registry.upsert("dead", "10.0.0.6")
+    registry.update_status("dead", {"error": "timed out"}, [])
+    assert registry.expire(max_age_sec=3600) == []
+    time.sleep(0.01)
+    assert registry.expire(max_age_sec=0.0) == ["dead"]
+    assert [device.instance for device in registry.snapshot()] == ["healthy"]
+
+
+def test_sweep_finds_robots() -> None:
+    robots = {"10.0.1.7": "bay-1", "10.0.3.254": "bay-2"}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "10.0.2.9":
+            return httpx.Response(200, text="not a robot")
+        if request.url.host not in robots:
+            raise httpx.ConnectTimeout("timed out", request=request)
+        assert request.url.port == 31950 and request.url.path == "/health"
+        return httpx.Response(200, json={"name": robots[request.url.host], "api_version": "8.0.0"})
+
+    assert len(sweep_hosts(["10.0.0.0/22"])) == 1022
+    assert sweep_hosts(["10.0.0.5", "10.0.0.4/31", "10.0.0.5/32"]) == ["10.0.0.5", "10.0.0.4"]
+    registry = DeviceRegistry()
+    summary = asyncio.run(sweep(registry, ["10.0.0.0/22"], concurrency=64, rate_per_sec=0, transport=httpx.MockTransport(handler)))
+    assert summary.probed == 1022 and summary.found == 2
+    assert {(device.instance, device.ip) for device in registry.snapshot()} == {("bay-1", "10.0.1.7"), ("bay-2", "10.0.3.254")}
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import pytest
+from clients.robot_client import RobotClient
+from fake_robot.fake_robot import FakeRobot, FakeRobotConfig, Fixed
+
+
+async def _run_with_commands(client: RobotClient, count: int) -> str:
+    run_id = str((await client.post_run(req_body={"data": {}})).json()["data"]["id"])
+    for _ in range(count):
+        await client.post_run_command(run_id, req_body={"data": {"commandType": "home", "params": {}}}, params={})
+    return run_id
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("prefetch", [True, False])
+async def test_walks_every_command(prefetch: bool) -> None:
+    fake_robot = FakeRobot(FakeRobotConfig(default_latency=Fixed(0), command_duration_sec=0))
+    async with RobotClient.make(host="http://fake", port="31950", version="*", transport=fake_robot) as client:
+        run_id = await _run_with_commands(client, 450)
+        async with client.iter_run_commands(run_id, page_length=100, prefetch=prefetch) as commands:
+            ids = [command["id"] async for command in commands]
+        assert len(ids) == len(set(ids)) == 450
+        assert commands.pages_fetched == 5
+        assert commands.cursor == 450
+
+
+@pytest.mark.asyncio
+async def test_resumes_from_cursor() -> None:
+    fake_robot = FakeRobot(FakeRobotConfig(default_latency=Fixed(0), command_duration_sec=0))
+    async with RobotClient.make(host="http://fake", port="31950", version="*", transport=fake_robot) as client:
+        run_id = await _run_with_commands(client, 30)
+        async with client.iter_run_commands(run_id, page_length=7) as commands:
+            first = [await commands.__anext__() for _ in range(10)]
+        resumed = [command async for command in client.iter_run_commands(run_id, cursor=commands.cursor, page_length=7)]
+        everything = [command async for command in client.iter_run_commands(run_id, page_length=50)]
+        assert [command["id"] for command in first + resumed] == [command["id"] for command in everything]
@@ -0,0 +1,284 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tarfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import IO, cast
+
+import paramiko
+import pytest
+from clients.fleet import Robot
+from ssh.collect import MANIFEST_NAME, archive_stems, collect
+from ssh.delta_sync import delta_sync, local_manifest
+from ssh.sessions import SessionPool
+from ssh.ssh import Compression, StreamStats, _tar_status, stream_tar
+
+
+class LocalChannel:
+    """Runs the command on this machine the way the robot would, so tar_command is exercised for real."""
+
+    def __init__(self) -> None:
+        self.process: subprocess.Popen[bytes] | None = None
+        self.stderr_read = False
+
+    def exec_command(self, command: str) -> None:
+        self.process = subprocess.Popen(command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    def recv(self, nbytes: int) -> bytes:
+        assert self.process is not None and self.process.stdout is not None
+        return os.read(self.process.stdout.fileno(), nbytes)
+
+    def recv_stderr_ready(self) -> bool:
+        # only asked once stdout is done, by then stderr is complete
+        return not self.stderr_read
+
+    def recv_stderr(self, nbytes: int) -> bytes:
+        assert self.process is not None and self.process.stderr is not None
+        self.stderr_read = True
+        return self.process.stderr.read()
+
+    def recv_exit_status(self) -> int:
+        assert self.process is not None
+        return self.process.wait()
+
+    def close(self) -> None:
+        assert self.process is not None
+        self.process.wait()
+
+
+class LocalOutput:
+    """stdout or stderr of a local command, shaped like paramiko's ChannelFile."""
+
+    def __init__(self, process: subprocess.Popen[bytes], stream: IO[bytes]) -> None:
+        self.process = process
+        self.stream = stream
+        self.channel = self
+
+    def read(self) -> bytes:
+        return self.stream.read()
+
+    def recv_exit_status(self) -> int:
+        return self.process.wait()
+
+
+class LocalSFTP:
+    def put(self, localpath: str, remotepath: str, callback: Callable[[int, int], None]) -> None:
+        shutil.copyfile(localpath, remotepath)
+        size = Path(localpath).stat().st_size
+        callback(size, size)
+
+    def utime(self, path: str, times: tuple[int, int]) -> None:
+        os.utime(path, times)
+
+    def posix_rename(self, oldpath: str, newpath: str) -> None:
+        os.rename(oldpath, newpath)
+
+    def close(self) -> None:
+        pass
+
+
+class LocalSSHClient:
+    """Just enough of paramiko.SSHClient for ssh.ssh, every command runs locally."""
+
+    def __init__(self) -> None:
+        self.commands: list[str] = []
+        self.closed = False
+
+    def exec_command(self, command: str) -> tuple[None, LocalOutput, LocalOutput]:
+        self.commands.append(command)
+        process = subprocess.Popen(command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        assert process.stdout is not None and process.stderr is not None
+        return None, LocalOutput(process, process.stdout), LocalOutput(process, process.stderr)
+
+    def get_transport(self) -> LocalSSHClient:
+        return self
+
+    def is_active(self) -> bool:
+        return not self.closed
+
+    def open_session(self) -> LocalChannel:
+        return LocalChannel()
+
+    def open_sftp(self) -> LocalSFTP:
+        return LocalSFTP()
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def local_session(host: str) -> paramiko.SSHClient:
+    if host == "10.0.0.99":
+        raise TimeoutError("no route to host")
+    return cast(paramiko.SSHClient, LocalSSHClient())
+
+
+@pytest.fixture
+def data_dir(tmp_path: Path) -> Path:
+    data = tmp_path / "data"
+    (data / "opentrons_robot_server").mkdir(parents=True)
+    (data / "opentrons_robot_server" / "robot_server.db").write_bytes(b"\0" * 3_000_000)
+    (data / "log.txt").write_text("hello\n" * 1000)
+    return data
+
+
+@pytest.mark.parametrize("compression", Compression.CHOICES)
+def test_stream_to_file(tmp_path: Path, data_dir: Path, compression: str) -> None:
+    destination = tmp_path / f"out{Compression.SUFFIXES[compression]}"
+    seen: list[int] = []
+    stats = stream_tar(
+        LocalChannel(),
+        destination,
+        compression=compression,
+        level=1,
+        remote_path=str(data_dir),
+        on_chunk=lambda s: seen.append(s.uncompressed_bytes),
+    )
+    with tarfile.open(destination) as archive:
+        assert {"./log.txt", "./opentrons_robot_server/robot_server.db"} <= set(archive.getnames())
+    # the tar is what was counted, whatever the compression
+    assert stats.uncompressed_bytes > 3_006_000 and seen == sorted(seen) and seen[-1] == stats.uncompressed_bytes
+    assert stats.compressed_bytes == destination.stat().st_size
+    if compression != Compression.NONE:
+        assert stats.compressed_bytes < stats.uncompressed_bytes / 10
+
+
+def test_stream_extract(tmp_path: Path, data_dir: Path) -> None:
+    stats = stream_tar(LocalChannel(), tmp_path / "extracted", extract=True, remote_path=str(data_dir))
+    assert (tmp_path / "extracted" / "log.txt").read_text() == (data_dir / "log.txt").read_text()
+    assert (tmp_path / "extracted" / "opentrons_robot_server" / "robot_server.db").stat().st_size == 3_000_000
+    assert isinstance(stats, StreamStats) and stats.throughput > 0
+
+
+@pytest.mark.parametrize("compression", [Compression.NONE, Compression.GZIP])
+def test_stream_failure(tmp_path: Path, compression: str) -> None:
+    # with a compressor the pipeline exits 0 however tar did
+    with pytest.raises(RuntimeError, match="exited 2"):
+        stream_tar(LocalChannel(), tmp_path / "out.tar", compression=compression, remote_path=str(tmp_path / "missing"))
+
+
+def test_changed_files_are_a_warning(tmp_path: Path, data_dir: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    changing_tar = bin_dir / "tar"
+    changing_tar.write_text(f'#!/bin/sh\n{shutil.which("tar")} "$@"\necho "tar: ./log: file changed as we read it" >&2\nexit 1\n')
+    changing_tar.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}:{os.environ['PATH']}")
+    stats = stream_tar(LocalChannel(), tmp_path / "out.tar.gz", compression=Compression.GZIP, remote_path=str(data_dir))
+    assert stats.warning == "tar: ./log: file changed as we read it"
+    with tarfile.open(tmp_path / "out.tar.gz") as archive:
+        assert archive.getnames()
+
+
+def test_tar_status() -> None:
+    assert _tar_status("tar: ./log: file changed as we read it\ntar exited 1\n") == (1, "tar: ./log: file changed as we read it")
+    assert _tar_status("tar exited 0") == (0, "")
+    assert _tar_status("Killed") == (None, "Killed")
+
+
+def test_collect_many(tmp_path: Path, data_dir: Path) -> None:
+    robots = [Robot.parse("bay-1=10.0.0.1"), Robot.parse("bay-2=10.0.0.2"), Robot.parse("10.0.0.99")]
+    output = tmp_path / "collected"
+    results = collect(
+        robots,
+        output,
+        compression=Compression.GZIP,
+        level=1,
+        concurrency=2,
+        remote_path=str(data_dir),
+        pool=SessionPool(connector=local_session),
+    )
+    assert [result.ok for result in results] == [True, True, False]
+    manifest = json.loads((output / MANIFEST_NAME).read_text())
+    by_name = {entry["name"]: entry for entry in manifest["robots"]}
+    assert "TimeoutError" in by_name["10.0.0.99"]["error"]
+    for name in ["bay-1", "bay-2"]:
+        archive = output / by_name[name]["file"]
+        assert by_name[name]["sha256"] == hashlib.sha256(archive.read_bytes()).hexdigest()
+        assert by_name[name]["bytes"] == archive.stat().st_size
+        assert by_name[name]["expected_bytes"] >= 3_000_000
+
+
+def test_collect_same_names(tmp_path: Path, data_dir: Path) -> None:
+    robots = [Robot.parse("bay-1=10.0.0.1"), Robot.parse("bay-1=10.0.0.2"), Robot.parse("bay-2=10.0.0.3")]
+    results = collect(robots, tmp_path, compression=Compression.NONE, remote_path=str(data_dir), pool=SessionPool(connector=local_session))
+    assert all(result.ok for result in results)
+    assert len({result.path for result in results}) == 3
+    assert all(result.path.stat().st_size == result.stats.compressed_bytes for result in results)
+
+
+def test_archive_stems() -> None:
+    robots = [Robot.parse(spec) for spec in ["bay-1=10.0.0.1", "bay-1=10.0.0.2", "bay-2=10.0.0.3", "bay-3=10.0.0.4", "bay-3=10.0.0.4"]]
+    assert archive_stems(robots) == ["bay-1-10.0.0.1", "bay-1-10.0.0.2", "bay-2", "bay-3-10.0.0.4-1", "bay-3-10.0.0.4-2"]
+
+
+def test_failed_collect_leaves_no_archive(tmp_path: Path) -> None:
+    output = tmp_path / "collected"
+    results = collect(
+        [Robot.parse("bay-1=10.0.0.1")],
+        output,
+        remote_path=str(tmp_path / "missing"),
+        pool=SessionPool(connector=local_session),
+    )
+    assert not results[0].ok and "exited 2" in str(results[0].error)
+    assert [path.name for path in output.iterdir()] == [MANIFEST_NAME]
+
+
+def test_delta_sync(tmp_path: Path, data_dir: Path) -> None:
+    local = data_dir / "opentrons_robot_server"
+    (local / "protocols" / "abc").mkdir(parents=True)
+    (local / "protocols" / "abc" / "main.py").write_text("metadata = {}")
+    remote = tmp_path / "robot" / "opentrons_robot_server"
+    client = LocalSSHClient()
+    ssh_client = cast(paramiko.SSHClient, client)
+
+    first = delta_sync(ssh_client, local, str(remote))
+    assert (first.uploaded, first.deleted, first.unchanged) == (2, 0, 0)
+    assert local_manifest(remote) == local_manifest(local)
+
+    # uploads carry the local mtime, so nothing is hashed or sent
+    assert delta_sync(ssh_client, local, str(remote)).unchanged == 2
+
+    (local / "robot_server.db").write_bytes(b"\1" * 3_000_000)
+    os.utime(local / "robot_server.db", (2, 2))
+    (remote / "robot_server.db-wal").write_bytes(b"stale")
+    # touched but identical, settled by hash
+    os.utime(local / "protocols" / "abc" / "main.py", (1, 1))
+    client.commands.clear()
+    second = delta_sync(ssh_client, local, str(remote))
+    assert (second.uploaded, second.deleted, second.unchanged, second.hashed) == (1, 1, 1, 2)
+    assert any(command.startswith("cd ") and "sha256sum" in command for command in client.commands)
+    assert second.bytes_sent == 3_000_000
+    assert (remote / "robot_server.db").read_bytes() == (local / "robot_server.db").read_bytes()
+    assert not (remote / "robot_server.db-wal").exists()
+    assert not list(remote.rglob("*.delta-sync"))
+
+
+def test_session_pool_reuses_and_evicts() -> None:
+    pool = SessionPool(connector=local_session, idle_sec=60)
+    try:
+        with pool.session("10.0.0.1") as first:
+            with pool.session("10.0.0.1") as nested:
+                assert nested is first
+        assert pool.run("10.0.0.1", "echo hi") == "hi\n"
+        with pool.session("10.0.0.2"):
+            # busy sessions are never evicted, idle ones are
+            assert pool.evict_idle(now=time.monotonic() + 120) == 1
+        assert (pool.stats.connects, pool.stats.reuses, len(pool)) == (2, 2, 1)
+
+        # a session that died is replaced on the next use
+        with pool.session("10.0.0.2") as dead:
+            dead.close()
+        with pool.session("10.0.0.2") as replacement:
+            assert replacement is not dead
+        assert pool.stats.connects == 3
+        with pytest.raises(RuntimeError, match="exited 3"):
+            pool.run("10.0.0.2", "exit 3")
+    finally:
+        pool.close_all()
+    assert len(pool) == 0
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import anyio
+import pytest
+from perf.tracing import Tracer
+
+
+def test_nested_spans_record_parents() -> None:
+    tracer = Tracer(enabled=True)
+    with tracer.span("outer") as outer:
+        with tracer.span("inner", well="A1"):
+            pass
+        with tracer.span("inner"):
+            pass
+    inner_first, inner_second, outer_record = tracer.spans
+    assert outer_record.name == "outer" and outer_record.parent_id is None
+    assert inner_first.parent_id == inner_second.parent_id == outer.span_id
+    assert inner_first.attrs == {"well": "A1"}
+    assert outer_record.duration_ns >= inner_first.duration_ns + inner_second.duration_ns
+    assert tracer.stats["inner"].histogram.count == 2
+
+
+@pytest.mark.asyncio
+async def test_timed_keeps_sync_and_async_functions_as_they_are() -> None:
+    tracer = Tracer(enabled=True)
+
+    @tracer.timed()
+    def add(a: int, b: int) -> int:
+        return a + b
+
+    @tracer.timed("sleepy")
+    async def sleepy() -> str:
+        await anyio.sleep(0.01)
+        return "done"
+
+    assert add(1, 2) == 3
+    assert await sleepy() == "done"
+    assert set(tracer.stats) == {"test_timed_keeps_sync_and_async_functions_as_they_are.<locals>.add", "sleepy"}
+    assert tracer.stats["sleepy"].histogram.min_sec >= 0.01
+
+
+@pytest.mark.asyncio
+async def test_concurrent_tasks_get_their_own_parents() -> None:
+    tracer = Tracer(enabled=True)
+
+    async def worker(name: str) -> None:
+        async with tracer.span(name):
+            await anyio.sleep(0.01)
+            with tracer.span(f"{name} step"):
+                await anyio.sleep(0.01)
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(worker, "first")
+        tg.start_soon(worker, "second")
+    by_name = {record.name: record for record in tracer.spans}
+    for name in ["first", "second"]:
+        assert by_name[f"{name} step"].parent_id == by_name[name].span_id
+        assert by_name[f"{name} step"].track == by_name[name].track
+    assert by_name["first"].track != by_name["second"].track
+
+
+def test_errors_are_counted() -> None:
+    tracer = Tracer(enabled=True)
+    with pytest.raises(ValueError), tracer.span("boom"):
+        raise ValueError()
+    assert tracer.stats["boom"].errors == 1
+    assert tracer.spans[0].error == "ValueError"
+
+
+def test_disabled_records_nothing() -> None:
+    tracer = Tracer(enabled=False)
+
+    @tracer.timed()
+    def work() -> int:
+        return 1
+
+    with tracer.span("ignored"):
+        assert work() == 1
+    assert not tracer.spans and not tracer.stats
+
+
+def test_ring_buffer_keeps_stats() -> None:
+    tracer = Tracer(enabled=True, max_spans=3)
+    for _ in range(5):
+        with tracer.span("tick"):
+            pass
+    assert len(tracer.spans) == 3
+    assert tracer.dropped == 2
+    assert tracer.stats["tick"].histogram.count == 5
+
+
+def test_chrome_trace(tmp_path: Path) -> None:
+    tracer = Tracer(enabled=True)
+    with tracer.span("outer"):
+        with tracer.span("inner", path=Path("x")):
+            pass
+    path = tmp_path / "trace.json"
+    tracer.export_chrome_trace(path)
+    trace = json.loads(path.read_text())
+    complete = [event for event in trace["traceEvents"] if event["ph"] == "X"]
+    assert [event["name"] for event in complete] == ["inner", "outer"]
+    inner, outer = complete
+    assert inner["args"]["parent_id"] == outer["args"]["span_id"]
+    assert inner["args"]["path"] == repr(Path("x"))
+    assert outer["ts"] <= inner["ts"] and inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+    assert any(event["ph"] == "M" and event["tid"] == outer["tid"] for event in trace["traceEvents"])
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import IO, Any
+
+import anyio
+import pytest
+from clients.robot_client import RobotClient
+from clients import uploads
+from clients.uploads import MultipartFiles, UploadSource, UploadStats
+from fake_robot.fake_robot import FakeRobot, FakeRobotConfig, Fixed
+
+
+@pytest.mark.asyncio
+async def test_same_source_to_many_robots(tmp_path: Path) -> None:
+    protocol_file = Path(tmp_path, "protocol.json")
+    protocol_file.write_bytes(b"{}" + b" " * 300_000)
+    robots = [FakeRobot(FakeRobotConfig(default_latency=Fixed(0.001))) for _ in range(3)]
+    sizes: list[int] = []
+
+    async def upload(robot: FakeRobot, protocol: UploadSource) -> None:
+        async with RobotClient.make(host="http://fake", port="31950", version="*", transport=robot) as client:
+            response = await client.post_protocol([protocol])
+            sizes.append(response.json()["data"]["files"][0]["size"])
+            assert client.upload_stats.bytes_sent == protocol.size
+
+    with UploadSource.from_path(protocol_file) as protocol:
+        async with anyio.create_task_group() as tg:
+            for robot in robots:
+                tg.start_soon(upload, robot, protocol)
+    assert sizes == [protocol_file.stat().st_size] * 3
+
+
+@pytest.mark.asyncio
+async def test_paths_stream_and_count(tmp_path: Path) -> None:
+    csv_file = Path(tmp_path, "plate.csv")
+    csv_file.write_text("well,volume\n" * 10_000)
+    async with RobotClient.make(host="http://fake", port="31950", version="*", transport=FakeRobot()) as client:
+        for _ in range(2):
+            response = await client.post_data_file([csv_file])
+            assert response.status_code == 201
+        assert client.upload_stats.uploads == 2
+        assert client.upload_stats.bytes_sent == 2 * csv_file.stat().st_size
+
+
+def test_failed_open_closes_earlier_files(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    present = Path(tmp_path, "present.csv")
+    present.write_text("well,volume\n")
+    opened: list[IO[Any]] = []
+
+    def recording_open(*args: Any, **kwargs: Any) -> IO[Any]:
+        f: IO[Any] = open(*args, **kwargs)
+        opened.append(f)
+        return f
+
+    monkeypatch.setattr(uploads, "open", recording_open, raising=False)
+    stats = UploadStats()
+    with pytest.raises(FileNotFoundError):
+        with MultipartFiles("files", [present, Path(tmp_path, "missing.csv")], stats):
+            pass
+    assert len(opened) == 1 and opened[0].closed
+    assert stats.uploads == 0
@@ -0,0 +1,129 @@
+"""Decode each response body once, with orjson or msgspec when either is installed.
+
+httpx's Response.json() parses the body again on every call. body(response) parses it the first
+time and keeps the result in response.extensions, so every later caller gets the same object.
+Treat it as read-only, it is shared; copy it before changing it.
+
+extract(response, "links", "current", "href") reads one value out of a body. With msgspec installed
+and nothing decoded yet, only the objects along that path are built and the rest of the document is
+skipped over, which matters for /runs and multi-megabyte analyses. Without msgspec it falls back to body().
+
+    status = extract(await robot_client.get_run(run_id), "data", "status")
+    runs = body(await robot_client.get_runs())["data"]
+
+Backends, fastest first: orjson, msgspec, the standard library. uv pip install orjson msgspec to get them.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+from collections.abc import Callable
+from typing import Any
+
+from httpx import Response
+
+CACHE_EXTENSION = "otietalk.json_body"
+
+Path = tuple[str | int, ...]
+
+
+class _Missing:
+    def __repr__(self) -> str:
+        return "MISSING"
+
+
+MISSING: Any = _Missing()
+
+
+def _stdlib_loads(content: bytes | str) -> Any:
+    return json.loads(content)
+
+
+loads: Callable[[bytes | str], Any] = _stdlib_loads
+BACKEND = "json"
+_msgspec_decode: Callable[..., Any] | None = None
+_msgspec_defstruct: Callable[..., Any] | None = None
+_msgspec_unset: Any = None
+
+try:
+    import msgspec
+
+    loads = msgspec.json.decode
+    BACKEND = "msgspec"
+    _msgspec_decode = msgspec.json.decode
+    _msgspec_defstruct = msgspec.defstruct
+    _msgspec_unset = msgspec.UNSET
+except ImportError:
+    pass
+
+try:
+    import orjson
+
+    loads = orjson.loads
+    BACKEND = "orjson"
+except ImportError:
+    pass
+
+
+def body(response: Response) -> Any:
+    """The decoded JSON body of response, parsed on the first call only."""
+    if CACHE_EXTENSION not in response.extensions:
+        response.extensions[CACHE_EXTENSION] = loads(response.content)
+    return response.extensions[CACHE_EXTENSION]
+
+
+def walk(value: Any, path: Path, default: Any = MISSING) -> Any:
+    """value[path[0]][path[1]]..., default where the path does not exist, KeyError if there is no default."""
+    for step in path:
+        try:
+            value = value[step]
+        except (KeyError, IndexError, TypeError):
+            if default is MISSING:
+                raise KeyError(path) from None
+            return default
+    return value
+
+
+@functools.cache
+def _path_type(path: Path) -> Any:
+    """A msgspec type that decodes only path, every key off it is skipped without building anything."""
+    assert _msgspec_defstruct is not None
+    leaf: Any = Any
+    for depth, step in reversed(list(enumerate(path))):
+        if isinstance(step, int):
+            leaf = list[leaf]
+        else:
+            # keys are not always valid identifiers, rename maps a safe field name onto the real one
+            leaf = _msgspec_defstruct(f"_Path{depth}", [("value", leaf | None, _msgspec_unset)], rename={"value": step})
+    return leaf
+
+
+def _unwrap(decoded: Any, path: Path, default: Any) -> Any:
+    value = decoded
+    for step in path:
+        if isinstance(step, int):
+            if not isinstance(value, list) or not -len(value) <= step < len(value):
+                return walk(None, path, default)
+            value = value[step]
+        else:
+            if value is None or value.value is _msgspec_unset:
+                return walk(None, path, default)
+            value = value.value
+    return value
+
+
+def extract(response: Response, *path: str | int, default: Any = MISSING) -> Any:
+    """The value at path in the body of response without decoding the rest of it when msgspec is available.
+
+    Returns default if the path does not exist, or raises KeyError if no default is given.
+    Values are not cached, call body() instead when most of the document will be read anyway.
+    """
+    if CACHE_EXTENSION in response.extensions or _msgspec_decode is None or not path:
+        return walk(body(response), path, default)
+    try:
+        decoded = _msgspec_decode(response.content, type=_path_type(path))
+    except ValueError:
+        # the shape along the path is not what was asked for, let walk() report it the usual way
+        return walk(body(response), path, default)
+    return _unwrap(decoded, path, default)
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import atexit
+import json
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from anyio import to_thread
+from clients.request_timing import TIMING_EXTENSION, RequestTiming
+from httpx import Response
+from util.json_body import loads
+
+
+class OverflowPolicy:
+    """What to do when the writer queue is full."""
+
+    DROP = "drop"
+    BLOCK = "block"
+    CHOICES = [DROP, BLOCK]
+
+
+_STOP = object()
+
+
+def _decode_body(content: bytes) -> Any:
+    """Decode a body as JSON, falling back to text so nothing is lost."""
+    if not content:
+        return None
+    try:
+        return loads(content)
+    except ValueError:
+        return content.decode("utf8", errors="replace")
+
+
+def response_record(response: Response) -> dict[str, Any]:
+    """Capture what we log about a response without decoding anything.
+
+    Bodies are kept as raw bytes so the JSON parsing and serialization happen on the writer thread.
+    Only JSON request bodies are captured, multipart uploads are summarized by size.
+    """
+    request = response.request
+    content_type = request.headers.get("content-type", "")
+    request_content = request.content if content_type == "application/json" else b""
+    elapsed = response.elapsed.total_seconds()
+    timing = response.extensions.get(TIMING_EXTENSION)
+    return {
+        "time_ns": time.time_ns(),
+        "status_code": response.status_code,
+        "method": request.method,
+        "url": str(response.url),
+        "elapsed_sec": elapsed,
+        "long": elapsed > 1,
+        "request_content_type": content_type,
+        "request_bytes": int(request.headers.get("content-length", 0)),
+        "request_body": request_content,
+        "response_body": response.content,
+        # where elapsed went, see clients.request_timing
+        "timing": timing.to_json() if isinstance(timing, RequestTiming) else None,
+    }
+
+
+class ResponseLogWriter:
+    """Batch log records onto a dedicated thread and append them to a JSON Lines file.
+
+    The event loop only enqueues, the thread decodes bodies, serializes and writes.
+    The file is reopened per batch, so deleting it between runs (Wizard.reset_log) is safe.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        max_queue: int = 10_000,
+        batch_size: int = 500,
+        flush_interval_sec: float = 0.5,
+        policy: str = OverflowPolicy.DROP,
+    ) -> None:
+        if policy not in OverflowPolicy.CHOICES:
+            raise ValueError(f"policy must be one of {OverflowPolicy.CHOICES}, not {policy}")
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval_sec = flush_interval_sec
+        self.policy = policy
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self._queue: queue.Queue[Any] = queue.Queue(maxsize=max_queue)
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="response-log-writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, record: dict[str, Any]) -> bool:
+        """Enqueue without ever blocking, returning False if the record was dropped."""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    async def asubmit(self, record: dict[str, Any]) -> bool:
+        """Enqueue honoring the overflow policy; BLOCK waits on a worker thread until there is room, the event loop keeps running."""
+        if self.policy == OverflowPolicy.DROP:
+            return self.submit(record)
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            await to_thread.run_sync(self._queue.put, record)
+        return True
+
+    def flush(self) -> None:
+        """Block until every record enqueued so far is on disk."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+
+    def close(self) -> None:
+        """Flush and stop the writer thread. A later submit starts a new one."""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None and thread.is_alive():
+            self._queue.put(_STOP)
+            thread.join()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval_sec
+            while len(batch) < self.batch_size and batch[-1] is not _STOP:
+                try:
+                    batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            try:
+                self._write([item for item in batch if item is not _STOP])
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if batch[-1] is _STOP:
+                return
+
+    def _write(self, records: list[dict[str, Any]]) -> None:
+        if not records:
+            return
+        lines = []
+        for record in records:
+            record["request_body"] = _decode_body(record["request_body"])
+            record["response_body"] = _decode_body(record["response_body"])
+            lines.append(json.dumps(record))
+        with open(self.path, "a") as log:
+            log.write("\n".join(lines))
+            log.write("\n")
+        self.written += len(records)
+        self.batches += 1
+
+
+_writers: list[ResponseLogWriter] = []
+
+
+def make_writer(path: Path, **kwargs: Any) -> ResponseLogWriter:
+    """Create a writer that is flushed and closed when the interpreter exits."""
+    writer = ResponseLogWriter(path, **kwargs)
+    _writers.append(writer)
+    return writer
+
+
+@atexit.register
+def _close_writers() -> None:
+    for writer in _writers:
+        writer.close()
@@ -1,20 +1,18 @@
-import asyncio
 import ipaddress
-import json
 import sys
-import time
 from pathlib import Path
-from typing import Any, Callable
 
 from anyio import to_thread
+from clients.request_timing import PHASES
 from httpx import Response
 from rich.console import Console
+from util.response_log import make_writer, response_record
 
 PROJECT_ROOT = Path(__file__).parent.parent
 
-LOG_FILE_PATH = Path(PROJECT_ROOT, "responses.log")
+LOG_FILE_PATH = Path(PROJECT_ROOT, "responses.jsonl")
 
-_console = Console()
+response_log_writer = make_writer(LOG_FILE_PATH)
 
 
 async def prompt(message: str) -> str:
@@ -26,41 +24,23 @@ async def prompt(message: str) -> str:
 
 
 async def log_response(response: Response, print_timing: bool = False, console: Console = Console()) -> None:
-    """Log the response status, url, timing, and json response."""
-    endpoint = f"\nstatus_code = {response.status_code}\n{response.request.method} {response.url}"  # noqa: E501
-    formatted_response_body = json.dumps(response.json(), indent=4)
-    formatted_request_body = ""
-    try:
-        if response.request.read():
-            req_body = json.loads(response.request.read().decode("utf8").replace("'", '"'))
-            formatted_request_body = json.dumps(req_body, indent=4)
-    except:
-        console.print("Error parsing request body")
-        # console.print_exception()
+    """Log the response status, url, timing, and json response.
 
-    elapsed = response.elapsed.total_seconds()
-    elapsed_output = str(elapsed)
-    if elapsed > 1:
-        elapsed_output = f"{str(elapsed)} *LONG*"
+    The record is handed to a background writer, nothing is decoded or written on the event loop.
+    """
+    record = response_record(response)
     if print_timing:
-        console.print(endpoint)
+        elapsed_output = str(record["elapsed_sec"])
+        if record["long"]:
+            elapsed_output = f"{elapsed_output} *LONG*"
+        console.print(f"\nstatus_code = {record['status_code']}\n{record['method']} {record['url']}")
         console.print(elapsed_output)
-        # console.print(formatted_response_body) # too big to do in console usefully
-    with open(LOG_FILE_PATH, "a") as log:
-        log.write(str(time.time_ns()))
-        log.write(endpoint)
-        log.write("\n")
-        if formatted_request_body != "":
-            log.write("Request Body")
-            log.write("\n")
-            log.write(formatted_request_body)
-            log.write("\n")
-        log.write("Elapsed time seconds")
-        log.write("\n")
-        log.write(elapsed_output)
-        log.write("\n")
-        log.write(formatted_response_body)
-        log.write("\n____________________________________\n")
+        timing = record["timing"]
+        if timing is not None:
+            phases = [f"{name} {timing[f'{name}_sec']:.3f}" for name in PHASES[:-1] if timing[f"{name}_sec"] is not None]
+            console.print(f"{', '.join(phases)} ({timing['request_bytes']} bytes out, {timing['response_bytes']} in)")
+    if not await response_log_writer.asubmit(record):
+        console.print("Response log queue is full, record dropped")
 
 
 def is_valid_IPAddress(sample_str: str) -> bool:
@@ -84,26 +64,3 @@ def is_valid_port(port: str | int) -> bool:
     if 1 <= port <= 65535:
         return True
     return False
-
-def timeit(func: Callable[..., Any]) -> Callable[..., Any]:
-    async def process(func: Callable[..., Any], *args: Any, **params: Any) -> Any:
-        if asyncio.iscoroutinefunction(func):
-            _console.print("[salmon1]This function is a coroutine.")
-            return await func(*args, **params)
-        else:
-            _console.print("[salmon1]This is not a coroutine.")
-            return func(*args, **params)
-
-    async def helper(*args: Any, **params: Any) -> Any:
-        _console.print("[bold bright_yellow]----------------------[/bold bright_yellow]")
-        _console.print(f"[bold salmon1]Timing function {func.__name__}")
-        _console.print(f"[bold dark_blue]params {params}[/bold dark_blue]")
-        start = time.time()
-        result = await process(func, *args, **params)
-        _console.print(
-            f"[bold green4]This function took [bold bright_green]{time.time() - start}",
-        )
-        return result
-
-    return helper
-    return helper
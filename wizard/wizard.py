@@ -6,7 +6,7 @@ from typing import Optional
 from rich.console import Console
 from rich.panel import Panel
 from rich.prompt import Confirm, Prompt
-from util.util import LOG_FILE_PATH, is_valid_IPAddress, is_valid_port
+from util.util import LOG_FILE_PATH, is_valid_IPAddress, is_valid_port, response_log_writer
 
 
 class Wizard:
@@ -78,6 +78,7 @@ class Wizard:
         return self.validate_port(port)
 
     def reset(self) -> None:
+        response_log_writer.flush()
         if os.path.exists(LOG_FILE_PATH):
             os.remove(LOG_FILE_PATH)
             self.console.print(